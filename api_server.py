@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import logging
+import asyncio
 from datetime import datetime
 
 # Add current directory to Python path for imports
@@ -28,7 +29,7 @@ from src.api import (
 
 # Lifespan helper
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import uvicorn
@@ -46,9 +47,34 @@ async def lifespan(app: FastAPI):
     """Runs once on startup (before yield) and once on shutdown (after)."""
     logger.info("Starting API server…")
     initialize_models()          # <── your original startup logic
+    # Train the local intent classifier now so the first message doesn't pay for it
+    from src.models.intent_classifier import reload_local_classifier
+    await asyncio.to_thread(reload_local_classifier)
+    # Semantic answer cache: load the persisted index, embed only newer approvals
+    from src.cache import doctor_semantic_index
+    await asyncio.to_thread(doctor_semantic_index.load_and_sync)
+    sync_task = asyncio.create_task(_semantic_sync_loop())
+    # ...and apply approvals / removals made by other workers as they happen
+    events_task = asyncio.create_task(doctor_semantic_index.subscriber().run())
+    # Hot-answer L1: drop answers approved / edited on other workers
+    from src.cache import redis_cache
+    answers_task = asyncio.create_task(redis_cache.answer_subscriber().run())
     yield                        # ── app runs between these two lines
+    sync_task.cancel()
+    events_task.cancel()
+    answers_task.cancel()
     logger.info("API shutting down — bye!")
 
+async def _semantic_sync_loop():
+    """Pick up answers approved by other workers and persist the semantic index."""
+    from src.cache import doctor_semantic_index
+    while True:
+        await asyncio.sleep(settings.semantic_sync_interval_s)
+        try:
+            await asyncio.to_thread(doctor_semantic_index.sync_and_save)
+        except Exception as e:
+            logger.warning(f"Semantic index sync failed: {e}")
+
 # ── FastAPI app ──────────────────────────────────────────────────────────────
 app = FastAPI(
     title="LLM Family Doctor API",
@@ -66,6 +92,21 @@ app.include_router(intake_router)                 # /intake
 app.include_router(doctor_review_router)          # /doctor_review
 app.include_router(assistant_router)              # /assistant
 
+# Per-stage latency breakdown (Server-Timing header + one log line per request)
+timing_logger = logging.getLogger("request_timing")
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    if not settings.server_timing_enabled:
+        return await call_next(request)
+    from src.utils import timing
+    timer = timing.start_request()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = timer.server_timing()
+    timing_logger.info(timer.log_line(method=request.method, path=request.url.path,
+                                      status=response.status_code))
+    return response
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -152,6 +193,19 @@ async def health_check():
         index_exists=index_path.exists() and map_path.exists()
     )
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process metrics for this worker (LLM queue, cache tiers, latencies)."""
+    from src.utils import metrics
+    from src.models.llm_limiter import get_limiter_stats
+    from src.cache.redis_cache import answer_cache_stats
+    
+    return {
+        "llm_limiter": get_limiter_stats(),
+        "answer_cache": answer_cache_stats(),
+        **metrics.snapshot()
+    }
+
 @app.post("/diagnose", response_model=DiagnosisResponse)
 async def generate_diagnosis(request: DiagnosisRequest, background_tasks: BackgroundTasks):
     """Generate diagnosis based on symptoms."""
@@ -162,9 +216,10 @@ async def generate_diagnosis(request: DiagnosisRequest, background_tasks: Backgr
         raise HTTPException(status_code=400, detail="Symptoms cannot be empty")
     
     try:
-        # Generate symptoms hash for caching
-        from hashlib import sha256
-        symptoms_hash = sha256(f"{request.gender}|{request.age}|{request.symptoms.strip().lower()}".encode()).hexdigest()
+        # Generate symptoms hash for caching (same canonical key as /diagnoses)
+        from src.utils.symptom_key import legacy_symptoms_hash, symptom_query, symptoms_key
+        symptoms_hash = symptoms_key(request.gender, request.age, request.symptoms)
+        legacy_hash = legacy_symptoms_hash(request.gender, request.age, request.symptoms)
         
         # Check for cached approved answer
         from src.db import get_session
@@ -174,7 +229,7 @@ async def generate_diagnosis(request: DiagnosisRequest, background_tasks: Backgr
         session = next(get_session())
         cached_answer = session.exec(
             select(DoctorAnswer).where(
-                DoctorAnswer.symptoms_hash == symptoms_hash,
+                DoctorAnswer.symptoms_hash.in_([symptoms_hash, legacy_hash]),
                 DoctorAnswer.approved == True
             )
         ).first()
@@ -188,9 +243,11 @@ async def generate_diagnosis(request: DiagnosisRequest, background_tasks: Backgr
             )
         
         # Generate diagnosis using RAG pipeline
-        from src.models.rag_chain import generate_rag_response
-        query = f"Стать: {request.gender}, Вік: {request.age}, Симптоми: {request.symptoms}"
-        result = generate_rag_response(query, top_k=request.top_k)
+        from src.models.rag_chain import agenerate_rag_response
+        query = symptom_query(request.gender, request.age, request.symptoms)
+        result = await agenerate_rag_response(
+            query, top_k=request.top_k, symptoms=request.symptoms, age=request.age
+        )
         answer = result["response"]
         retrieved_docs = result["documents"]
         
@@ -216,6 +273,8 @@ async def generate_diagnosis(request: DiagnosisRequest, background_tasks: Backgr
             request_id=request_id
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating diagnosis: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating diagnosis: {str(e)}")
@@ -280,7 +339,9 @@ def log_diagnosis_request(request_id: str, request: DiagnosisRequest, diagnosis:
                 request.user_id or "",
                 request.chat_id or "",
                 request.symptoms[:200],  # Truncate for CSV
-                diagnosis[:200]  # Truncate for CSV
+                diagnosis[:200],  # Truncate for CSV
+                request.gender,  # gender/age let replay_symptom_keys.py rebuild the exact-cache keys
+                request.age
             ])
             
     except Exception as e:
@@ -0,0 +1,23 @@
+"""add 'query' column to doctor_answers
+
+Revision ID: ren_04
+Revises: ren_03
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "ren_04"
+down_revision = "ren_03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("doctor_answers") as batch:
+        batch.add_column(sa.Column("query", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("doctor_answers") as batch:
+        batch.drop_column("query")
@@ -0,0 +1,28 @@
+"""add 'updated_at' column to doctor_answers
+
+Revision ID: ren_05
+Revises: ren_04
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "ren_05"
+down_revision = "ren_04"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("doctor_answers") as batch:
+        batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE doctor_answers SET updated_at = created_at")
+    with op.batch_alter_table("doctor_answers") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+        batch.create_index("ix_doctor_answers_updated_at", ["updated_at"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("doctor_answers") as batch:
+        batch.drop_index("ix_doctor_answers_updated_at")
+        batch.drop_column("updated_at")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""CLI: calibrate the semantic-cache similarity threshold per partition.
+
+Replays queries against the approved-answer index and prints, for every
+demographic partition and candidate threshold, the hit rate and the
+(estimated) false-hit rate. The chosen thresholds are written to
+SEMANTIC_THRESHOLDS_PATH, which API workers re-read on change.
+
+Sources
+-------
+* ``--labelled set.csv`` (preferred): columns ``query`` (or ``gender``,
+  ``age``, ``symptoms``) and ``answer_id``: the approved answer(s)
+  acceptable for the query, ``;``-separated, blank when none is. A hit is
+  false unless it returns one of them.
+* ``--log`` (default, DIAGNOSIS_LOG_PATH): answers /diagnoses generated on
+  a cache miss, with their query, at full length. There is no ground
+  truth, so a hit counts as false when the cached answer disagrees with
+  the answer that was actually generated for the query (``agreement``
+  below ``--agreement``). Paragraphs both answers share verbatim (headings,
+  the disclaimer) are left out; every other paragraph is matched to its
+  closest counterpart in the other answer, weighted by length. Draft-edit
+  rows are skipped, since they were derived from a cached answer. Treat the
+  false-hit rate as a rough estimate and confirm with a labelled set.
+
+For each partition the lowest threshold whose false-hit rate stays within
+``--max-false-rate`` is chosen (lower threshold = more hits). Partitions
+with fewer than ``--min-samples`` replayed queries keep the default.
+
+Examples
+--------
+# Print the curves only (estimated from the diagnosis log)
+python scripts/calibrate_semantic_threshold.py
+
+# Use a labelled set and write the thresholds
+python scripts/calibrate_semantic_threshold.py --labelled data/semantic_labels.csv --write
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+
+# Add the project root to Python path so we can import from src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+
+ALL = "all"
+
+class Sample(NamedTuple):
+    partition: str              # lookup partition, "unknown" without demographics
+    score: Optional[float]      # similarity of the closest approved query (None = nothing indexed)
+    correct: bool               # serving that answer would have been right
+
+# ---------- threshold sweep --------------------------------------------------
+
+def grid(start: float, stop: float, step: float) -> List[float]:
+    return [round(start + i * step, 4) for i in range(int(round((stop - start) / step)) + 1)]
+
+def sweep(samples: List[Sample], thresholds: List[float]) -> List[Dict[str, float]]:
+    """Hit rate and false-hit rate (share of hits that are wrong) per threshold."""
+    curve = []
+    for t in thresholds:
+        hits = [s for s in samples if s.score is not None and s.score > t]
+        false = sum(not s.correct for s in hits)
+        curve.append({
+            "threshold": t,
+            "hits": len(hits),
+            "hit_rate": len(hits) / len(samples) if samples else 0.0,
+            "false_hit_rate": false / len(hits) if hits else 0.0,
+        })
+    return curve
+
+def choose(curve: List[Dict[str, float]], max_false_rate: float) -> Optional[float]:
+    """Lowest threshold within the false-hit budget (None if no threshold is)."""
+    ok = [row["threshold"] for row in curve if row["hits"] and row["false_hit_rate"] <= max_false_rate]
+    return min(ok) if ok else None
+
+def calibrate(samples: List[Sample], thresholds: List[float], max_false_rate: float,
+              min_samples: int) -> Dict[str, Dict]:
+    """{partition: {"curve", "samples", "threshold"}}, with ALL covering every sample."""
+    by_partition: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_partition[sample.partition].append(sample)
+    by_partition[ALL] = list(samples)
+    result = {}
+    for key, group in sorted(by_partition.items()):
+        curve = sweep(group, thresholds)
+        chosen = choose(curve, max_false_rate) if len(group) >= min_samples else None
+        result[key] = {"curve": curve, "samples": len(group), "threshold": chosen}
+    return result
+
+# ---------- replay -----------------------------------------------------------
+
+def _query(gender: str, age: str, symptoms: str) -> str:
+    if gender and age:
+        return f"Стать: {gender}, Вік: {age}, Симптоми: {symptoms}"
+    return symptoms
+
+def _answer_texts(ids: Set[int]) -> Dict[int, str]:
+    from sqlmodel import Session, select
+    from src.db import engine
+    from src.db.models import DoctorAnswer
+    with Session(engine) as s:
+        rows = s.exec(select(DoctorAnswer.id, DoctorAnswer.answer_md).where(DoctorAnswer.id.in_(ids))).all()
+    return {answer_id: answer_md for answer_id, answer_md in rows}
+
+def _partition(query: str) -> str:
+    from src.cache.doctor_semantic_index import UNPARTITIONED
+    from src.cache.semantic_partitions import partition_for
+    return partition_for(query) or UNPARTITIONED
+
+def _paragraphs(md: str) -> List[str]:
+    return [p.strip() for p in re.split(r"\n\s*\n", md) if p.strip()]
+
+def agreement(cached: str, generated: str) -> float:
+    """Length-weighted paragraph agreement of two full answers, 0..1 (boilerplate both share is ignored)."""
+    from src.models.embeddings import embed_queries
+
+    a, b = _paragraphs(cached), _paragraphs(generated)
+    shared = set(a) & set(b)
+    a, b = [p for p in a if p not in shared], [p for p in b if p not in shared]
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    vecs = embed_queries(a + b)
+    sim = vecs[:len(a)] @ vecs[len(a):].T
+    wa, wb = np.array([len(p) for p in a], float), np.array([len(p) for p in b], float)
+    return float((sim.max(axis=1) @ wa / wa.sum() + sim.max(axis=0) @ wb / wb.sum()) / 2)
+
+def replay_log(path: Path, min_agreement: float) -> List[Sample]:
+    """Samples from the /diagnoses log (correctness estimated, see module docstring)."""
+    from src.cache.doctor_semantic_index import closest_match
+
+    replayed = []
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 5 or row[2] == "draft_edit" or not row[3].strip() or not row[4].strip():
+                continue
+            replayed.append((row[3], row[4], closest_match(row[3])))
+
+    answers = _answer_texts({match[0] for _, _, match in replayed if match})
+    samples = []
+    for query, diagnosis, match in replayed:
+        correct = bool(match) and match[0] in answers and agreement(answers[match[0]], diagnosis) >= min_agreement
+        samples.append(Sample(_partition(query), match[1] if match else None, correct))
+    return samples
+
+def replay_labelled(path: Path) -> List[Sample]:
+    from src.cache.doctor_semantic_index import closest_match
+
+    samples = []
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            query = row.get("query") or _query(row.get("gender", ""), row.get("age", ""), row.get("symptoms", ""))
+            acceptable = {int(i) for i in (row.get("answer_id") or "").split(";") if i.strip()}
+            match = closest_match(query)
+            samples.append(Sample(_partition(query), match[1] if match else None,
+                                  bool(match) and match[0] in acceptable))
+    return samples
+
+# ---------- output -----------------------------------------------------------
+
+def print_report(result: Dict[str, Dict], max_false_rate: float) -> None:
+    for key, part in result.items():
+        chosen = part["threshold"]
+        print(f"\n📊 {key}: {part['samples']} queries, chosen threshold: "
+              f"{chosen if chosen is not None else '— (default)'}")
+        print(f"   {'threshold':>9}  {'hits':>5}  {'hit rate':>8}  {'false-hit rate':>14}")
+        for row in part["curve"]:
+            flag = "  ✅" if row["threshold"] == chosen else ("  ⚠️" if row["false_hit_rate"] > max_false_rate else "")
+            print(f"   {row['threshold']:>9.2f}  {row['hits']:>5}  {row['hit_rate']:>8.1%}  "
+                  f"{row['false_hit_rate']:>14.1%}{flag}")
+
+def write_thresholds(result: Dict[str, Dict], source: str, path: Path) -> Dict:
+    default = result.get(ALL, {}).get("threshold")
+    config = {
+        "default": default if default is not None else settings.semantic_similarity_threshold,
+        "partitions": {key: part["threshold"] for key, part in result.items()
+                       if key != ALL and part["threshold"] is not None},
+        "calibrated_at": datetime.now(timezone.utc).isoformat(),
+        "source": source,
+        "samples": {key: part["samples"] for key, part in result.items()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(config, ensure_ascii=False, indent=2))
+    os.replace(tmp, path)               # workers never read a half-written file
+    return config
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate semantic cache thresholds per partition")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--log", type=Path, default=Path(settings.diagnosis_log_path),
+                        help="Replay answers generated by /diagnoses (default; rough estimate)")
+    source.add_argument("--labelled", type=Path, help="Replay a labelled CSV (query/answer_id), preferred")
+    parser.add_argument("--min", type=float, default=0.80, help="Lowest threshold to try")
+    parser.add_argument("--max", type=float, default=0.99, help="Highest threshold to try")
+    parser.add_argument("--step", type=float, default=0.01, help="Threshold step")
+    parser.add_argument("--max-false-rate", type=float, default=0.02,
+                        help="Highest acceptable share of wrong hits")
+    parser.add_argument("--min-samples", type=int, default=20,
+                        help="Partitions with fewer queries keep the default threshold")
+    parser.add_argument("--agreement", type=float, default=0.9,
+                        help="(--log) cached vs generated answer agreement counted as a correct hit")
+    parser.add_argument("--write", action="store_true",
+                        help=f"Write the chosen thresholds to {settings.semantic_thresholds_path}")
+    args = parser.parse_args()
+
+    path = args.labelled or args.log
+    if not path.exists():
+        sys.exit(f"❌ {path} not found")
+    print(f"🔄 Replaying {path}...")
+    samples = replay_labelled(path) if args.labelled else replay_log(path, args.agreement)
+    if not samples:
+        sys.exit("❌ Nothing to replay")
+
+    result = calibrate(samples, grid(args.min, args.max, args.step), args.max_false_rate, args.min_samples)
+    print_report(result, args.max_false_rate)
+
+    if args.write:
+        config = write_thresholds(result, str(path), Path(settings.semantic_thresholds_path))
+        print(f"\n✅ Wrote default {config['default']} and {len(config['partitions'])} partition "
+              f"thresholds to {settings.semantic_thresholds_path}")
+    else:
+        print("\nℹ️  Dry run, pass --write to save the thresholds")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""CLI: replay logged requests to measure the canonical symptom key.
+
+Replays logs/diagnosis_requests.csv in order. Each request counts as an
+exact-cache hit when an earlier request had the same key, once with the
+legacy v1 hash (lower-cased raw text) and once with the canonical key from
+src/utils/symptom_key.py. The report prints both hit rates, the gain, and the
+phrasings the canonical key merged, so the merges can be checked by eye.
+
+Logged symptoms are truncated to 200 characters, and rows logged before
+gender and age were recorded are keyed on symptoms alone.
+
+Examples
+--------
+python scripts/replay_symptom_keys.py
+python scripts/replay_symptom_keys.py --age-bands --examples 20
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+# Add the project root to Python path so we can import from src
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.utils.symptom_key import KEY_VERSION, legacy_symptoms_hash, symptoms_key
+
+def load_requests(path: Path) -> List[Tuple[str, int, str]]:
+    """(gender, age, symptoms) per logged request, oldest first."""
+    requests = []
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 5 or not row[4].strip():
+                continue
+            gender, age = (row[6], int(row[7])) if len(row) >= 8 and row[7].isdigit() else ("", 0)
+            requests.append((gender, age, row[4]))
+    return requests
+
+def replay(requests: List[Tuple[str, int, str]]) -> Dict[str, object]:
+    seen_legacy: Set[str] = set()
+    seen_canonical: Set[str] = set()
+    legacy_hits = canonical_hits = 0
+    merged: Dict[str, Set[str]] = defaultdict(set)       # canonical key → distinct raw phrasings
+    for gender, age, symptoms in requests:
+        legacy = legacy_symptoms_hash(gender, age, symptoms)
+        canonical = symptoms_key(gender, age, symptoms)
+        legacy_hits += legacy in seen_legacy
+        canonical_hits += canonical in seen_canonical
+        seen_legacy.add(legacy)
+        seen_canonical.add(canonical)
+        merged[canonical].add(f"{gender}/{age}: {symptoms.strip()}")
+    n = len(requests)
+    return {
+        "requests": n,
+        "legacy_hit_rate": legacy_hits / n if n else 0.0,
+        "canonical_hit_rate": canonical_hits / n if n else 0.0,
+        "legacy_keys": len(seen_legacy),
+        "canonical_keys": len(seen_canonical),
+        "merged": sorted((p for p in merged.values() if len(p) > 1), key=len, reverse=True),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay logged requests with legacy vs canonical symptom keys")
+    parser.add_argument("--log", type=Path, default=Path("logs/diagnosis_requests.csv"))
+    parser.add_argument("--age-bands", action="store_true", help="Key by age band (SYMPTOM_KEY_AGE_BANDS)")
+    parser.add_argument("--examples", type=int, default=10, help="Merged phrasings to show")
+    args = parser.parse_args()
+
+    if not args.log.exists():
+        sys.exit(f"❌ {args.log} not found")
+    if args.age_bands:
+        settings.symptom_key_age_bands = True
+
+    report = replay(load_requests(args.log))
+    if not report["requests"]:
+        sys.exit("❌ Nothing to replay")
+
+    gain = report["canonical_hit_rate"] - report["legacy_hit_rate"]
+    print(f"📊 {report['requests']} requests from {args.log}")
+    print(f"   {'legacy (v1) keys:':<22}{report['legacy_keys']:>6}  hit rate {report['legacy_hit_rate']:.1%}")
+    print(f"   {f'canonical ({KEY_VERSION}) keys:':<22}{report['canonical_keys']:>6}  hit rate {report['canonical_hit_rate']:.1%}")
+    print(f"   gain: {gain:+.1%} of requests served from the exact cache")
+
+    if report["merged"]:
+        print(f"\n🔗 Merged phrasings (top {min(args.examples, len(report['merged']))} of {len(report['merged'])}):")
+        for phrasings in report["merged"][:args.examples]:
+            print("   • " + "\n     ".join(sorted(phrasings)))
+
+if __name__ == "__main__":
+    main()
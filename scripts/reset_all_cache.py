@@ -10,7 +10,7 @@ import asyncio
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.cache.redis_cache import clear_cache
-from src.cache.doctor_semantic_index import clear_semantic_index, get_semantic_index_stats
+from src.cache.doctor_semantic_index import clear_semantic_index, get_semantic_index_stats, publish
 from sqlmodel import Session, select
 from src.db import engine
 from src.db.models import DoctorAnswer
@@ -44,7 +44,8 @@ async def reset_all_cache():
     # 3. Clear semantic index
     print("🧠 Clearing semantic cache...")
     try:
-        clear_semantic_index()
+        cleared_at = clear_semantic_index()
+        await publish("clear", cleared_at=cleared_at)      # running API workers drop their copies too
         print("   ✅ Semantic index cleared")
     except Exception as e:
         print(f"   ⚠️  Semantic cache clear failed: {e}")
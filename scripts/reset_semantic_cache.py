@@ -6,9 +6,10 @@ This script can be used to reset or clear the semantic index.
 
 import sys
 import os
+import asyncio
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.cache.doctor_semantic_index import reset_semantic_index, clear_semantic_index, get_semantic_index_stats
+from src.cache.doctor_semantic_index import reset_semantic_index, clear_semantic_index, get_semantic_index_stats, publish
 
 def main():
     """Main function to reset semantic cache."""
@@ -38,11 +39,13 @@ def main():
     
     if args.clear:
         print("🧠 Clearing semantic index...")
-        clear_semantic_index()
+        cleared_at = clear_semantic_index()
+        asyncio.run(publish("clear", cleared_at=cleared_at))    # running API workers drop their copies too
         print("✅ Semantic index cleared!")
     else:
         print("🔄 Resetting semantic index...")
         reset_semantic_index()
+        asyncio.run(publish("reset"))       # running API workers reconcile with the DB
         print("✅ Semantic index reset!")
     
     # Show stats after operation
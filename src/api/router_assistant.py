@@ -2,18 +2,24 @@
 """Assistant router - façade endpoint for all user interactions."""
 from __future__ import annotations
 
-from typing import Dict, Any, Optional
+import re
+from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
+from src.cache import clinic_card, doctor_directory
+from src.cache.session_store import get_session_store
+from src.cache.doctor_directory import DoctorEntry
 from src.db import get_session
-from src.db.models import Clinic, Doctor
-from src.models.intent_classifier import classify_intent, IntentEnum
+from src.db.models import Clinic
+from src.models.intent_classifier import IntentEnum
+from src.models.patient_extractor import PatientSlots, aextract, extract_slots
+from src.models import llm_client
 from src.api.router_diagnose import diagnose
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from src.config import settings
+from src.utils import metrics, speculative, timing
 
 router = APIRouter(prefix="/assistant", tags=["assistant"])
 
@@ -30,118 +36,68 @@ class AssistantResponse(BaseModel):
     intent: str  # Intent classification
     data: dict   # Response data
     message: str  # Natural language response for the user
+    intent_confidence: Optional[float] = None  # Local classifier confidence (None for LLM path)
+    intent_path: Optional[str] = None          # rule | local | llm | fallback
 
 # ─────────────────────────────────────────────────────────────────────────────
 # LLM Setup for Response Generation
 # ─────────────────────────────────────────────────────────────────────────────
 
-_llm = ChatOpenAI(
-    model=settings.openai_model,
-    temperature=0.7,
-    api_key=settings.openai_api_key,
-)
+_llm = llm_client.make_chat_model("assistant", temperature=0.7)
+
+async def _ainvoke(chain, inputs: Optional[Dict[str, Any]] = None):
+    """Run a prompt chain under the shared limiter / deadline / retry policy."""
+    return await llm_client.ainvoke(chain, inputs or {}, call_site="assistant")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Conversation State Management
 # ─────────────────────────────────────────────────────────────────────────────
 
-# In-memory storage for conversation state (in production, use Redis)
-_conversation_states: Dict[str, Dict[str, Any]] = {}
+# Conversation state lives in the shared session store (Redis or bounded LRU)
+_CONVERSATION_NS = "conversation"
 
-def _get_conversation_state(user_id: str, chat_id: str) -> Dict[str, Any]:
+async def _get_conversation_state(user_id: str, chat_id: str) -> Dict[str, Any]:
     """Get conversation state for user/chat."""
     key = f"{user_id}:{chat_id}"
-    return _conversation_states.get(key, {})
+    return await get_session_store().get(_CONVERSATION_NS, key) or {}
+
+async def _save_conversation_state(user_id: str, chat_id: str, state: Dict[str, Any]):
+    """Start a new conversation state for user/chat."""
+    key = f"{user_id}:{chat_id}"
+    await get_session_store().save(_CONVERSATION_NS, key, state)
+
+async def _update_conversation_state(user_id: str, chat_id: str, fields: Dict[str, Any]) -> bool:
+    """Write only the changed fields of the conversation state for user/chat.
 
-def _save_conversation_state(user_id: str, chat_id: str, state: Dict[str, Any]):
-    """Save conversation state for user/chat."""
+    False if the conversation expired or was cleared meanwhile; nothing is
+    written then, and the next message starts a new conversation.
+    """
     import logging
     logger = logging.getLogger(__name__)
     key = f"{user_id}:{chat_id}"
-    _conversation_states[key] = state
-    logger.info(f"Saved conversation state with key '{key}': {state}")
-    logger.info(f"Total conversation states: {len(_conversation_states)}")
+    if not await get_session_store().update(_CONVERSATION_NS, key, fields):
+        logger.info(f"Conversation state with key '{key}' is gone, not updating")
+        return False
+    logger.info(f"Updated conversation state with key '{key}': {fields}")
+    return True
 
-def _clear_conversation_state(user_id: str, chat_id: str):
+async def _clear_conversation_state(user_id: str, chat_id: str) -> bool:
     """Clear conversation state for user/chat."""
     key = f"{user_id}:{chat_id}"
-    if key in _conversation_states:
-        del _conversation_states[key]
+    return await get_session_store().delete(_CONVERSATION_NS, key)
 
-def _extract_patient_info(text: str) -> tuple[Optional[str], Optional[int]]:
+def _extract_patient_info(text: str, expect_age: bool = False) -> tuple[Optional[str], Optional[int]]:
     """
     Extract gender and age from text.
     Returns (gender, age) where gender is 'm', 'f', or None, and age is int or None.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    text_lower = text.lower()
-    gender = None
-    age = None
-    
-    logger.info(f"Extracting patient info from text: '{text}' (lower: '{text_lower}')")
-    
-    # Extract gender
-    if any(word in text_lower for word in ["жінка", "дівчина", "донька", "доньці", "жіноча", "female", "woman", "girl"]):
-        gender = "f"
-        logger.info(f"Extracted gender: {gender}")
-    elif any(word in text_lower for word in ["чоловік", "хлопець", "син", "хлопчик", "чоловіча", "male", "man", "boy"]):
-        gender = "m"
-        logger.info(f"Extracted gender: {gender}")
-    
-    # Extract age
-    import re
-    # Look for age patterns like "30 років", "30 years", "вік 30", etc.
-    age_patterns = [
-        r'(\d+)\s*(?:років?|роки|years?)',
-        r'вік\s*(\d+)',
-        r'age\s*(\d+)',
-        r'(\d+)\s*рік',
-        r'(\d+)\s*року',
-        r'(\d+)\s*років'  # Explicit pattern for "років"
-    ]
-    
-    for pattern in age_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            age = int(match.group(1))
-            logger.info(f"Extracted age: {age} using pattern: {pattern}")
-            break
-        else:
-            logger.debug(f"Pattern '{pattern}' did not match text: '{text_lower}'")
-    
-    logger.info(f"Final extraction result: gender={gender}, age={age}")
-    return gender, age
+    slots = extract_slots(text, expect_age=expect_age)
+    return slots.gender, slots.age
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Helper Functions
 # ─────────────────────────────────────────────────────────────────────────────
 
-def extract_doctor_info(text: str) -> Optional[str]:
-    """
-    Extract doctor name or ID from text.
-    Simple extraction - in production, use NER or more sophisticated parsing.
-    """
-    # Look for common patterns
-    text_lower = text.lower()
-    
-    # Check for "Dr." or "doctor" followed by name
-    if "dr." in text_lower or "doctor" in text_lower:
-        # Simple extraction - find words after "dr." or "doctor"
-        words = text.split()
-        for i, word in enumerate(words):
-            if word.lower() in ["dr.", "doctor"] and i + 1 < len(words):
-                return words[i + 1]
-    
-    # Check for doctor ID patterns (numbers)
-    import re
-    numbers = re.findall(r'\d+', text)
-    if numbers:
-        return numbers[0]
-    
-    return None
-
 async def generate_clinic_info_response(clinic_data: Dict[str, Any]) -> str:
     """Generate natural language response for clinic information."""
     prompt = ChatPromptTemplate.from_messages([
@@ -157,7 +113,7 @@ async def generate_clinic_info_response(clinic_data: Dict[str, Any]) -> str:
     ])
     
     chain = prompt | _llm
-    response = chain.invoke({})
+    response = await _ainvoke(chain)
     return response.content
 
 async def generate_doctor_schedule_response(doctor_data: Dict[str, Any]) -> str:
@@ -174,10 +130,24 @@ async def generate_doctor_schedule_response(doctor_data: Dict[str, Any]) -> str:
     ])
     
     chain = prompt | _llm
-    response = chain.invoke({})
+    response = await _ainvoke(chain)
     return response.content
 
 async def translate_and_format_clinic_data(clinic) -> Dict[str, Any]:
+    """Translated clinic card; the LLM runs only when this clinic row changed."""
+    cached = await clinic_card.get_card(clinic)
+    if cached is not None:
+        return cached
+    
+    translated = await _translate_clinic_data(clinic)
+    if translated is None:
+        # Fallback to original data if translation fails (not cached, retried next time)
+        return clinic_card.source_card(clinic)
+    
+    await clinic_card.set_card(clinic, translated)
+    return translated
+
+async def _translate_clinic_data(clinic) -> Optional[Dict[str, Any]]:
     """Translate and format clinic data from English to Ukrainian using LLM."""
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are a helpful medical clinic assistant. Translate and format clinic information from English to Ukrainian.
@@ -206,7 +176,7 @@ async def translate_and_format_clinic_data(clinic) -> Dict[str, Any]:
     ])
     
     chain = prompt | _llm
-    response = chain.invoke({})
+    response = await _ainvoke(chain)
     
     # Parse the JSON response
     import json
@@ -234,14 +204,35 @@ async def translate_and_format_clinic_data(clinic) -> Dict[str, Any]:
             except json.JSONDecodeError as e2:
                 logger.warning(f"Failed to parse extracted JSON: {e2}")
         
-        # Fallback to original data if translation fails
         logger.info("Using fallback to original clinic data")
-        return {
-            "address": clinic.address,
-            "opening_hours": clinic.opening_hours,
-            "services": clinic.services,
-            "phone": getattr(clinic, 'phone', None)
-        }
+        return None
+
+# Common clinic questions answered from the card without an LLM call:
+# (topic, question pattern, card field, answer line)
+_CLINIC_TEMPLATES = [
+    ("address", re.compile(r"адрес|де\s+(?:ви|ваша|клініка|знаходит|розташ)|як\s+(?:до\s+вас\s+)?(?:доїхати|дістатися|дійти)", re.IGNORECASE),
+     "address", "📍 Адреса клініки: {value}"),
+    ("hours", re.compile(r"годин\w*\s+роботи|режим\w*\s+роботи|графік\w*\s+роботи|до\s+котрої|коли\s+(?:ви\s+)?(?:працюєте|відкрит)|працюєте", re.IGNORECASE),
+     "opening_hours", "🕒 Години роботи: {value}"),
+    ("phone", re.compile(r"телефон|номер|зателефонувати|подзвонити", re.IGNORECASE),
+     "phone", "📞 Телефон: {value}"),
+    ("services", re.compile(r"послуг|що\s+(?:ви\s+)?робите|які\s+(?:аналізи|обстеження)", re.IGNORECASE),
+     "services", "🩺 Послуги: {value}"),
+]
+
+def answer_clinic_question_from_template(user_question: str, clinic_data: Dict[str, Any]) -> Optional[str]:
+    """Template answer for address / hours / phone / services questions, else None."""
+    lines = []
+    for topic, pattern, field, line in _CLINIC_TEMPLATES:
+        if not pattern.search(user_question):
+            continue
+        value = clinic_data.get(field)
+        if not value:
+            return None             # let the LLM explain what is missing
+        lines.append(line.format(value=value))
+    if not lines:
+        return None
+    return "\n".join(lines) + "\n\nЧим ще можу допомогти?"
 
 async def generate_contextual_clinic_response(user_question: str, clinic_data: Dict[str, Any]) -> str:
     """Generate contextual, natural language response for clinic questions."""
@@ -261,7 +252,7 @@ async def generate_contextual_clinic_response(user_question: str, clinic_data: D
     ])
     
     chain = prompt | _llm
-    response = chain.invoke({})
+    response = await _ainvoke(chain)
     return response.content
 
 async def generate_contextual_doctor_response(user_question: str, doctor_data: Dict[str, Any]) -> str:
@@ -280,16 +271,20 @@ async def generate_contextual_doctor_response(user_question: str, doctor_data: D
     ])
     
     chain = prompt | _llm
-    response = chain.invoke({})
+    response = await _ainvoke(chain)
     return response.content
 
-async def generate_general_doctor_response(user_question: str, session: Session) -> str:
-    """Generate response for general doctor availability questions."""
-    # Get all doctors
-    doctors = session.exec(select(Doctor)).all()
-    
+def format_doctor_list(doctors: List[DoctorEntry]) -> str:
+    """Templated list of doctors (no LLM call)."""
     if not doctors:
         return "Вибачте, зараз немає інформації про лікарів. Спробуйте пізніше або зверніться до адміністрації."
+    lines = [f"• {d.full_name} ({d.position}): {d.schedule}" for d in doctors]
+    return "👩‍⚕️ Лікарі нашої клініки:\n\n" + "\n".join(lines) + "\n\nЧим ще можу допомогти?"
+
+async def generate_general_doctor_response(user_question: str, doctors: List[DoctorEntry]) -> str:
+    """Generate response for availability questions about the matched doctors only."""
+    if not doctors:
+        return format_doctor_list(doctors)
     
     doctors_info = []
     for doctor in doctors:
@@ -302,14 +297,14 @@ async def generate_general_doctor_response(user_question: str, session: Session)
         Answer general questions about doctor availability in a natural, conversational way."""),
         ("user", f"""The user asked: "{user_question}"
         
-        Here are all the doctors at the clinic:
+        Here are the clinic doctors relevant to the question:
         {doctors_text}
         
         Provide a natural, conversational answer to their question about doctor availability."""),
     ])
     
     chain = prompt | _llm
-    response = chain.invoke({})
+    response = await _ainvoke(chain)
     return response.content
 
 async def handle_clinic_info(session: Session) -> str:
@@ -330,34 +325,12 @@ async def handle_clinic_info(session: Session) -> str:
 
 async def handle_doctor_schedule(text: str, session: Session) -> str:
     """Handle doctor schedule requests and return natural language response."""
-    doctor_info = extract_doctor_info(text)
+    matches = doctor_directory.get_directory(session).search(text)
     
-    if not doctor_info:
+    if not matches:
         return "Вибачте, не вдалося знайти інформацію про лікаря. Будь ласка, уточніть ім'я лікаря або його ID."
     
-    # Try to find doctor by name or ID
-    doctor = None
-    
-    # First try by ID if it's a number
-    if doctor_info.isdigit():
-        doctor = session.exec(
-            select(Doctor).where(Doctor.id == int(doctor_info))
-        ).first()
-    
-    # If not found by ID, try by name
-    if not doctor:
-        doctor = session.exec(
-            select(Doctor).where(Doctor.full_name.ilike(f"%{doctor_info}%"))
-        ).first()
-    
-    if not doctor:
-        return f"Вибачте, не знайдено лікаря з іменем або ID '{doctor_info}'. Перевірте правильність введених даних."
-    
-    doctor_data = {
-        "full_name": doctor.full_name,
-        "position": doctor.position,
-        "schedule": doctor.schedule
-    }
+    doctor_data = matches[0][0].as_dict()
     
     return await generate_doctor_schedule_response(doctor_data)
 
@@ -365,10 +338,12 @@ async def handle_diagnose_with_conversation(
     text: str, 
     user_id: Optional[str], 
     chat_id: Optional[str], 
-    session: Session
+    session: Session,
+    slots: Optional[PatientSlots] = None
 ) -> tuple[str, Dict[str, Any]]:
     """
     Handle diagnosis requests with conversation flow to collect missing patient info.
+    `slots` are the gender / age / symptoms already extracted with the intent.
     Returns (message, data) where data contains conversation state info.
     """
     import logging
@@ -380,7 +355,7 @@ async def handle_diagnose_with_conversation(
         return await handle_diagnose_legacy(text, session), {}
     
     # Get current conversation state
-    state = _get_conversation_state(user_id, chat_id)
+    state = await _get_conversation_state(user_id, chat_id)
     logger.info(f"Current conversation state for {user_id}:{chat_id}: {state}")
     
     # Check if we're in the middle of collecting patient info
@@ -388,20 +363,22 @@ async def handle_diagnose_with_conversation(
         logger.info(f"Continuing info collection for {user_id}:{chat_id}")
         return await _handle_info_collection(text, user_id, chat_id, state, session)
     
-    # Try to extract patient info from the current message
-    gender, age = _extract_patient_info(text)
+    # Patient info extracted together with the intent (or locally if not given)
+    slots = slots or extract_slots(text)
+    gender, age = slots.gender, slots.age
+    symptoms = slots.symptoms or text
     
     # If we have both gender and age, proceed with diagnosis
-    if gender and age:
+    if gender and age is not None:
         # Clear any existing conversation state
-        _clear_conversation_state(user_id, chat_id)
+        await _clear_conversation_state(user_id, chat_id)
         
         # Create diagnosis request
         from src.api.router_diagnose import DiagnoseRequest, diagnose
         diagnose_request = DiagnoseRequest(
             gender=gender,
             age=age,
-            symptoms=text
+            symptoms=symptoms
         )
         
         # Generate diagnosis
@@ -416,19 +393,19 @@ async def handle_diagnose_with_conversation(
     missing_info = []
     if not gender:
         missing_info.append("стать")
-    if not age:
+    if age is None:
         missing_info.append("вік")
     
     # Start conversation to collect missing info
     new_state = {
         "collecting_info": True,
         "missing_gender": not gender,
-        "missing_age": not age,
-        "symptoms": text,
+        "missing_age": age is None,
+        "symptoms": symptoms,
         "extracted_gender": gender,
         "extracted_age": age
     }
-    _save_conversation_state(user_id, chat_id, new_state)
+    await _save_conversation_state(user_id, chat_id, new_state)
     
     # Generate appropriate message asking for missing info
     if len(missing_info) == 2:
@@ -456,19 +433,19 @@ async def _handle_info_collection(
     logger.info(f"Handling info collection for {user_id}:{chat_id} with text: '{text}'")
     logger.info(f"Current state: {state}")
     
-    # Try to extract gender and age from the response
-    gender, age = _extract_patient_info(text)
+    # Try to extract gender and age from the response (a bare number is the age)
+    gender, age = _extract_patient_info(text, expect_age=bool(state.get("missing_age")))
     logger.info(f"Extracted from response: gender={gender}, age={age}")
     
     # Update state with any new information
+    changes: Dict[str, Any] = {}
     if gender and state.get("missing_gender"):
-        state["extracted_gender"] = gender
-        state["missing_gender"] = False
+        changes.update(extracted_gender=gender, missing_gender=False)
         logger.info(f"Updated state with gender: {gender}")
-    if age and state.get("missing_age"):
-        state["extracted_age"] = age
-        state["missing_age"] = False
+    if age is not None and state.get("missing_age"):
+        changes.update(extracted_age=age, missing_age=False)
         logger.info(f"Updated state with age: {age}")
+    state.update(changes)
     
     logger.info(f"Updated state: {state}")
     
@@ -480,7 +457,7 @@ async def _handle_info_collection(
         symptoms = state["symptoms"]
         
         # Clear conversation state
-        _clear_conversation_state(user_id, chat_id)
+        await _clear_conversation_state(user_id, chat_id)
         
         # Create diagnosis request
         from src.api.router_diagnose import DiagnoseRequest, diagnose
@@ -505,9 +482,8 @@ async def _handle_info_collection(
     if state.get("missing_age"):
         missing_info.append("вік")
     
-    # Save updated state
-    _save_conversation_state(user_id, chat_id, state)
-    logger.info(f"Saved conversation state for {user_id}:{chat_id}: {state}")
+    # Save the newly collected fields
+    await _update_conversation_state(user_id, chat_id, changes)
     
     # Generate message asking for remaining info
     if len(missing_info) == 2:
@@ -554,6 +530,21 @@ async def handle_diagnose_legacy(text: str, session: Session) -> str:
     # Return the diagnosis message directly (assuming it's already in natural language)
     return result.diagnosis
 
+async def _start_speculative_diagnosis(request: AssistantRequest) -> None:
+    """Start cache lookups + retrieval for a one-shot diagnosis before the intent is known.
+    
+    Only when this message alone can be diagnosed (gender and age found
+    locally, no info collection in progress) — otherwise nothing would use it.
+    """
+    if not request.user_id or not request.chat_id:
+        return                          # legacy handler, different defaults
+    if (await _get_conversation_state(request.user_id, request.chat_id)).get("collecting_info"):
+        return
+    slots = extract_slots(request.text)
+    if slots.gender and slots.age is not None:
+        from src.api.router_diagnose import start_diagnosis_prefetch
+        start_diagnosis_prefetch(slots.gender, slots.age, slots.symptoms or request.text)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Endpoints
 # ─────────────────────────────────────────────────────────────────────────────
@@ -571,93 +562,105 @@ async def handle_message(
     import logging
     logger = logging.getLogger(__name__)
     
-    # Classify user intent
-    intent = classify_intent(request.text)
-    logger.info(f"Classified intent: {intent} for text: '{request.text}'")
-    
-    try:
-        # Dispatch based on intent
-        if intent == IntentEnum.CLINIC_INFO:
-            # Get clinic data and generate natural language response
-            clinic = session.exec(select(Clinic).limit(1)).first()
-            if clinic:
-                try:
-                    # Translate and format clinic data using LLM
-                    translated_clinic_data = await translate_and_format_clinic_data(clinic)
-                    # Generate contextual response based on the specific question
-                    message = await generate_contextual_clinic_response(request.text, translated_clinic_data)
-                    data = {"message": message}  # Return natural language response
-                except Exception as e:
-                    logger.warning(f"Translation failed, using original data: {e}")
-                    # Fallback to original data if translation fails
-                    clinic_data = {
-                        "address": clinic.address,
-                        "opening_hours": clinic.opening_hours,
-                        "services": clinic.services,
-                        "phone": getattr(clinic, 'phone', None)
-                    }
-                    message = await generate_contextual_clinic_response(request.text, clinic_data)
-                    data = {"message": message}
-            else:
-                message = "Вибачте, інформація про клініку зараз недоступна. Спробуйте пізніше або зверніться до адміністрації."
-                data = {"message": message}
-        elif intent == IntentEnum.DOCTOR_SCHEDULE:
-            # Get doctor data and generate natural language response
-            doctor_info = extract_doctor_info(request.text)
-            if doctor_info:
-                doctor = None
-                if doctor_info.isdigit():
-                    doctor = session.exec(select(Doctor).where(Doctor.id == int(doctor_info))).first()
-                if not doctor:
-                    doctor = session.exec(select(Doctor).where(Doctor.full_name.ilike(f"%{doctor_info}%"))).first()
-                
-                if doctor:
-                    doctor_data = {
-                        "full_name": doctor.full_name,
-                        "position": doctor.position,
-                        "schedule": doctor.schedule
-                    }
-                    message = await generate_contextual_doctor_response(request.text, doctor_data)
-                    data = {"message": message}  # Return natural language response
+    # One time budget for every LLM call made while answering this message
+    with llm_client.time_budget(settings.assistant_time_budget_s), speculative.scope():
+        if settings.speculative_retrieval_enabled:
+            await _start_speculative_diagnosis(request)
+        
+        # Intent and patient slots (gender / age / symptoms) in one pass
+        with timing.stage("intent"):
+            slots = await aextract(request.text)
+        intent_result = slots.intent
+        intent = intent_result.intent
+        timing.mark("intent", f"{intent.value}/{intent_result.path}")
+        logger.info(f"Classified intent: {intent} via {intent_result.path} "
+                    f"(confidence={intent_result.confidence}) for text: '{request.text}'")
+        if intent != IntentEnum.DIAGNOSE:
+            speculative.cancel_all()
+    
+        try:
+            # Dispatch based on intent
+            if intent == IntentEnum.CLINIC_INFO:
+                # Get clinic data and generate natural language response
+                with timing.stage("db"):
+                    clinic = session.exec(select(Clinic).limit(1)).first()
+                if clinic:
+                    try:
+                        # Translate and format clinic data using LLM
+                        with timing.stage("clinic_card"):
+                            translated_clinic_data = await translate_and_format_clinic_data(clinic)
+                        # Common questions are answered from a template, the rest by the LLM
+                        message = answer_clinic_question_from_template(request.text, translated_clinic_data)
+                        metrics.incr("clinic_answer_total", path="template" if message else "llm")
+                        if message is None:
+                            message = await generate_contextual_clinic_response(request.text, translated_clinic_data)
+                        data = {"message": message}  # Return natural language response
+                    except HTTPException:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"Translation failed, using original data: {e}")
+                        # Fallback to original data if translation fails
+                        clinic_data = clinic_card.source_card(clinic)
+                        message = await generate_contextual_clinic_response(request.text, clinic_data)
+                        data = {"message": message}
                 else:
-                    message = f"Вибачте, не знайдено лікаря з іменем або ID '{doctor_info}'. Перевірте правильність введених даних."
+                    message = "Вибачте, інформація про клініку зараз недоступна. Спробуйте пізніше або зверніться до адміністрації."
                     data = {"message": message}
-            else:
-                # Handle general doctor availability questions
-                message = await generate_general_doctor_response(request.text, session)
+            elif intent == IntentEnum.DOCTOR_SCHEDULE:
+                # In-memory fuzzy lookup; the LLM only sees the matched doctors
+                with timing.stage("doctor_lookup"):
+                    directory = doctor_directory.get_directory(session)
+                    matches = [doctor for doctor, _ in directory.search(request.text)]
+                if len(matches) == 1:
+                    message = await generate_contextual_doctor_response(request.text, matches[0].as_dict())
+                elif matches:
+                    message = await generate_general_doctor_response(request.text, matches)
+                else:
+                    # General availability question (or unknown name): list from template
+                    message = format_doctor_list(directory.all())
+                metrics.incr("doctor_lookup_total", matched=str(min(len(matches), 2)))
                 data = {"message": message}
-        elif intent == IntentEnum.DIAGNOSE:
-            # Use conversation-aware diagnosis handler
-            message, data = await handle_diagnose_with_conversation(
-                request.text, 
-                request.user_id, 
-                request.chat_id, 
-                session
-            )
-        else:
-            # Fallback to diagnose with conversation
-            message, data = await handle_diagnose_with_conversation(
-                request.text, 
-                request.user_id, 
-                request.chat_id, 
-                session
-            )
+            elif intent == IntentEnum.DIAGNOSE:
+                # Use conversation-aware diagnosis handler
+                message, data = await handle_diagnose_with_conversation(
+                    request.text, 
+                    request.user_id, 
+                    request.chat_id, 
+                    session,
+                    slots=slots
+                )
+            else:
+                # Fallback to diagnose with conversation
+                message, data = await handle_diagnose_with_conversation(
+                    request.text, 
+                    request.user_id, 
+                    request.chat_id, 
+                    session
+                )
         
-        return AssistantResponse(
-            intent=intent.value,
-            data=data,
-            message=message
-        )
+            return AssistantResponse(
+                intent=intent.value,
+                data=data,
+                message=message,
+                intent_confidence=intent_result.confidence,
+                intent_path=intent_result.path,
+            )
         
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        # Handle other errors gracefully
-        logger.error(f"Error processing request '{request.text}': {str(e)}", exc_info=True)
-        error_message = "Вибачте, сталася помилка при обробці вашого запиту. Спробуйте ще раз або зверніться до адміністрації."
-        return AssistantResponse(
-            intent="unknown",
-            data={"error": str(e)},
-            message=error_message
-        ) 
\ No newline at end of file
+        except HTTPException:
+            # Re-raise HTTP exceptions
+            raise
+        except Exception as e:
+            # Handle other errors gracefully
+            logger.error(f"Error processing request '{request.text}': {str(e)}", exc_info=True)
+            error_message = "Вибачте, сталася помилка при обробці вашого запиту. Спробуйте ще раз або зверніться до адміністрації."
+            return AssistantResponse(
+                intent="unknown",
+                data={"error": str(e)},
+                message=error_message
+            )
+
+@router.delete("/conversation/{user_id}/{chat_id}")
+async def reset_conversation(user_id: str, chat_id: str) -> Dict[str, Any]:
+    """Forget the conversation state of a user/chat (Telegram /reset)."""
+    cleared = await _clear_conversation_state(user_id, chat_id)
+    return {"cleared": cleared}
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlmodel import Session, select
 
+from src.cache import clinic_card
 from src.db import get_session
 from src.db.models import Clinic
 
@@ -13,7 +14,8 @@ def read_clinic(session: Session = Depends(get_session)) -> Clinic | None:
 
 @router.post("/", summary="Create / replace clinic card",
              status_code=status.HTTP_201_CREATED)
-def upsert_clinic(data: Clinic, session: Session = Depends(get_session)) -> Clinic:
+def upsert_clinic(data: Clinic, background_tasks: BackgroundTasks,
+                  session: Session = Depends(get_session)) -> Clinic:
     db_obj = session.exec(select(Clinic).where(Clinic.id == data.id)).first()
     if db_obj:
         for field, value in data.dict(exclude_unset=True).items():
@@ -23,4 +25,6 @@ def upsert_clinic(data: Clinic, session: Session = Depends(get_session)) -> Clin
         session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    # translated card for the assistant is stale now
+    background_tasks.add_task(clinic_card.invalidate, db_obj.id)
     return db_obj 
\ No newline at end of file
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from hashlib import sha256
-from typing import Dict, Any
+import asyncio
+import csv
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
@@ -9,10 +13,17 @@ from sqlmodel import Session, select
 
 from src.db import get_session
 from src.db.models import DoctorAnswer
-from src.models.rag_chain import generate_rag_response
+from src.config import settings
+from src.models.rag_chain import agenerate_rag_response, retrieve_documents
+from src.models.diagnosis_schema import render_patient_section
+from src.models.draft_edit import agenerate_draft_edit, log_draft_edit
 from src.cache.redis_cache import get_md, set_md
-from src.cache.doctor_semantic_index import semantic_lookup
+from src.cache.doctor_semantic_index import semantic_candidate
 from src.guardrails.llm_guards import guard_input, guard_output
+from src.utils import speculative, timing
+from src.utils.symptom_key import legacy_symptoms_hash, symptom_query, symptoms_key
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/diagnoses",
@@ -37,9 +48,34 @@ class DiagnoseResponse(BaseModel):
 # Helper Functions
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _symptoms_hash(gender: str, age: int, symptoms: str) -> str:
-    raw = f"{gender}|{age}|{symptoms.strip().lower()}"
-    return sha256(raw.encode()).hexdigest()
+def _diagnosis_keys(gender: str, age: int, symptoms: str) -> Tuple[str, str, str]:
+    """(guarded symptoms, exact-cache hash, retrieval / semantic query) for a request."""
+    guarded_symptoms = guard_input(symptoms)
+    symptoms_hash = symptoms_key(gender, age, guarded_symptoms)
+    query = symptom_query(gender, age, guarded_symptoms)
+    return guarded_symptoms, symptoms_hash, query
+
+def _log_diagnosis(symptoms_hash: str, query: str, model: Optional[str], diagnosis: str) -> None:
+    """Append a generated answer (full length) to the log replayed by calibrate_semantic_threshold.py."""
+    try:
+        log_file = Path(settings.diagnosis_log_path)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with log_file.open("a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow([datetime.now().isoformat(), symptoms_hash, model or "", query, diagnosis])
+    except Exception as e:
+        logger.warning(f"Failed to log diagnosis: {e}")
+
+def start_diagnosis_prefetch(gender: str, age: int, symptoms: str) -> None:
+    """Speculatively run the cache lookups and protocol retrieval for a likely diagnosis.
+
+    Must be called inside `speculative.scope()`; `diagnose` picks the results
+    up if it runs for the same request, otherwise they are cancelled.
+    """
+    _, symptoms_hash, query = _diagnosis_keys(gender, age, symptoms)
+    speculative.start("exact", symptoms_hash, get_md(symptoms_hash))
+    speculative.start("semantic", query, asyncio.to_thread(semantic_candidate, query))
+    speculative.start("retrieval", (query, settings.diagnosis_top_k),
+                      asyncio.to_thread(retrieve_documents, query, settings.diagnosis_top_k))
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Endpoints
@@ -58,15 +94,18 @@ async def diagnose(
     """
     Generate a diagnosis based on patient symptoms.
     First checks exact cache, then semantic cache, then DB approved answers, then RAG.
+    A semantic near miss is adapted by a draft edit before falling back to RAG.
     """
-    # Apply input guardrails
-    guarded_symptoms = guard_input(request.symptoms)
-    
-    # Generate symptoms hash
-    symptoms_hash = _symptoms_hash(request.gender, request.age, guarded_symptoms)
+    # Apply input guardrails, hash for the exact cache, query for semantic cache / RAG
+    guarded_symptoms, symptoms_hash, query = _diagnosis_keys(request.gender, request.age, request.symptoms)
     
     # ---------- exact cache ----------
-    if md := await get_md(symptoms_hash):
+    with timing.stage("redis"):
+        md = await speculative.take("exact", symptoms_hash)
+        if md is speculative.MISSING:
+            md = await get_md(symptoms_hash)
+    if md:
+        timing.mark("cache", "exact")
         return DiagnoseResponse(
             diagnosis=md, 
             cached=True,
@@ -74,23 +113,30 @@ async def diagnose(
         )
     
     # ---------- semantic cache ----------
-    query = f"Стать: {request.gender}, Вік: {request.age}, Симптоми: {guarded_symptoms}"
-    if (sem := semantic_lookup(query)) is not None:
+    with timing.stage("semantic"):
+        sem = await speculative.take("semantic", query)
+        if sem is speculative.MISSING:
+            sem = await asyncio.to_thread(semantic_candidate, query)
+    if sem is not None and sem.hit:
+        timing.mark("cache", "semantic")
         return DiagnoseResponse(
-            diagnosis=sem, 
+            diagnosis=sem.answer_md, 
             cached=True,
             symptoms_hash=symptoms_hash
         )
     
-    # Check for cached approved answer in DB
-    cached_answer = session.exec(
-        select(DoctorAnswer).where(
-            DoctorAnswer.symptoms_hash == symptoms_hash,
-            DoctorAnswer.approved == True
-        )
-    ).first()
+    # Check for cached approved answer in DB (answers approved before canonical keys: legacy hash)
+    with timing.stage("db"):
+        legacy_hash = legacy_symptoms_hash(request.gender, request.age, guarded_symptoms)
+        cached_answer = session.exec(
+            select(DoctorAnswer).where(
+                DoctorAnswer.symptoms_hash.in_([symptoms_hash, legacy_hash]),
+                DoctorAnswer.approved == True
+            )
+        ).first()
     
     if cached_answer:
+        timing.mark("cache", "db")
         # also prime exact Redis cache for next time
         await set_md(symptoms_hash, cached_answer.answer_md)
         return DiagnoseResponse(
@@ -99,19 +145,38 @@ async def diagnose(
             symptoms_hash=symptoms_hash
         )
     
-    # Generate new diagnosis using RAG
-    rag_result = generate_rag_response(query)
+    # Near miss: adapt the closest approved answer instead of generating from scratch
+    draft = None
+    if sem is not None:
+        draft = await agenerate_draft_edit(query, sem.answer_md, sem.query)
+        log_draft_edit(symptoms_hash, sem.answer_id, sem.similarity, draft)
+    
+    if draft is not None and draft.response is not None:
+        timing.mark("cache", "draft")
+        rag_result = {"response": draft.response, "structured": None, "model": "draft_edit"}
+    else:
+        # Generate new diagnosis using RAG
+        timing.mark("cache", "miss")
+        rag_result = await agenerate_rag_response(query, top_k=settings.diagnosis_top_k,
+                                                  symptoms=guarded_symptoms, age=request.age)
     
     # Apply output guardrails
     guarded_response = guard_output(rag_result["response"])
     
-    # Extract patient response section
-    from src.utils import extract_patient_response
-    patient_response = extract_patient_response(guarded_response)
+    # Patient response: a field access in structured mode, heuristics otherwise
+    if rag_result.get("structured") is not None:
+        patient_response = render_patient_section(rag_result["structured"])
+    else:
+        from src.utils import extract_patient_response
+        patient_response = extract_patient_response(guarded_response)
     
-    # store both full diagnosis and patient response to Redis with TTL (not yet approved)
-    from src.cache.redis_cache import set_diagnosis_with_patient_response
-    await set_diagnosis_with_patient_response(symptoms_hash, guarded_response, patient_response)
+    # store the diagnosis record to Redis with TTL (not yet approved), including the
+    # symptom query, which keys the semantic cache once a doctor approves it
+    from src.cache.redis_cache import set_diagnosis_record
+    route = rag_result.get("route")
+    model = route.model if route else rag_result.get("model")
+    await set_diagnosis_record(symptoms_hash, guarded_response, patient_response, query=query, model=model)
+    _log_diagnosis(symptoms_hash, query, model, guarded_response)
     
     return DiagnoseResponse(
         diagnosis=guarded_response,
@@ -6,7 +6,10 @@ Provides search and retrieval functionality for the knowledge base.
 """
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import base64
+import json
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
@@ -14,9 +17,12 @@ from sqlmodel import Session, select, func
 
 from src.db import get_session
 from src.db.models import DoctorAnswer, Doctor
-from src.cache.doctor_semantic_index import semantic_lookup
+from src.cache.doctor_semantic_index import semantic_search
 
-router = APIRouter(prefix="/knowledge-base", tags=["knowledge-base"])
+router = APIRouter(
+    prefix="/knowledge-base",
+    tags=["knowledge-base"],
+)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Request/Response Models
@@ -24,8 +30,10 @@ router = APIRouter(prefix="/knowledge-base", tags=["knowledge-base"])
 
 class KnowledgeBaseSearchRequest(BaseModel):
     query: str = Field(..., description="Search query for symptoms or keywords")
-    top_k: int = Field(5, description="Number of results to return")
+    top_k: int = Field(5, ge=1, le=50, description="Number of results to return (page size)")
     min_similarity: float = Field(0.8, description="Minimum similarity threshold")
+    offset: int = Field(0, ge=0, le=500, description="Number of ranked results to skip")
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page (overrides offset)")
 
 class KnowledgeBaseEntry(BaseModel):
     id: int
@@ -43,6 +51,8 @@ class KnowledgeBaseSearchResponse(BaseModel):
     results: List[KnowledgeBaseEntry]
     total_found: int
     search_method: str  # "semantic" or "exact"
+    offset: int = 0
+    next_cursor: Optional[str] = None
 
 class KnowledgeBaseStats(BaseModel):
     total_entries: int
@@ -55,6 +65,42 @@ class KnowledgeBaseStats(BaseModel):
 # Helper Functions
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"])
+    except Exception:
+        offset = -1
+    if not 0 <= offset <= 500:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return offset
+
+def _hydrate_entries(hits: List[Tuple[int, float]], session: Session) -> List[KnowledgeBaseEntry]:
+    """Load ranked (answer id, score) hits with their doctors in one query, keeping the rank order."""
+    scores = dict(hits)
+    rows = session.exec(
+        select(DoctorAnswer, Doctor)
+        .join(Doctor, Doctor.id == DoctorAnswer.doctor_id, isouter=True)
+        .where(DoctorAnswer.id.in_(list(scores)), DoctorAnswer.approved == True)
+    ).all()
+    entries = [
+        KnowledgeBaseEntry(
+            id=answer.id,
+            symptoms_hash=answer.symptoms_hash,
+            answer_md=answer.answer_md,
+            approved=answer.approved,
+            doctor_id=answer.doctor_id,
+            doctor_name=doctor.full_name if doctor else None,
+            doctor_position=doctor.position if doctor else None,
+            created_at=answer.created_at,
+            similarity_score=round(scores[answer.id], 4),
+        )
+        for answer, doctor in rows
+    ]
+    return sorted(entries, key=lambda e: scores[e.id], reverse=True)
+
 def _extract_symptoms_from_hash(symptoms_hash: str) -> str:
     """Extract symptoms from hash for display purposes."""
     # This is a simplified version - in practice, you might want to store original symptoms
@@ -115,45 +161,20 @@ async def search_knowledge_base(
 ) -> KnowledgeBaseSearchResponse:
     """
     Search the knowledge base using semantic similarity.
-    Returns doctor-approved answers that match the query.
+    Returns doctor-approved answers ranked by similarity, one page at a time
+    (`offset`, or the `next_cursor` of the previous page).
     """
+    offset = _decode_cursor(request.cursor) if request.cursor else request.offset
     
-    # Use semantic search to find similar diagnoses
-    semantic_results = semantic_lookup(request.query, top_k=request.top_k)
+    # Rank one extra hit to know whether there is a next page
+    hits = await asyncio.to_thread(
+        semantic_search, request.query, offset + request.top_k + 1, request.min_similarity
+    )
+    page, has_more = hits[offset:offset + request.top_k], len(hits) > offset + request.top_k
     
-    if semantic_results:
-        # Get the full entries for semantic matches
-        # Note: This is a simplified approach - in practice, you'd want to map semantic results back to database entries
+    if page:
         search_method = "semantic"
-        
-        # For now, return all approved answers (you can enhance this with proper semantic mapping)
-        approved_answers = session.exec(
-            select(DoctorAnswer)
-            .where(DoctorAnswer.approved == True)
-            .order_by(DoctorAnswer.created_at.desc())
-            .limit(request.top_k)
-        ).all()
-        
-        results = []
-        for answer in approved_answers:
-            # Get doctor info
-            doctor = None
-            if answer.doctor_id:
-                doctor = session.exec(
-                    select(Doctor).where(Doctor.id == answer.doctor_id)
-                ).first()
-            
-            results.append(KnowledgeBaseEntry(
-                id=answer.id,
-                symptoms_hash=answer.symptoms_hash,
-                answer_md=answer.answer_md,
-                approved=answer.approved,
-                doctor_id=answer.doctor_id,
-                doctor_name=doctor.full_name if doctor else None,
-                doctor_position=doctor.position if doctor else None,
-                created_at=answer.created_at,
-                similarity_score=0.95  # Placeholder - you'd calculate this from semantic search
-            ))
+        results = _hydrate_entries(page, session)
     else:
         # Fallback to exact search or return empty results
         search_method = "exact"
@@ -163,7 +184,9 @@ async def search_knowledge_base(
         query=request.query,
         results=results,
         total_found=len(results),
-        search_method=search_method
+        search_method=search_method,
+        offset=offset,
+        next_cursor=_encode_cursor(offset + request.top_k) if has_more else None,
     )
 
 @router.get("/entries", response_model=List[KnowledgeBaseEntry])
@@ -8,14 +8,16 @@ from pydantic import BaseModel, Field
 from sqlmodel import Session, select
 
 from src.db import get_session
+from src.models.llm_limiter import doctor_priority
 from src.db.models import DoctorAnswer, Doctor
-from src.cache.redis_cache import set_md
-from src.cache.doctor_semantic_index import add_doc_to_index
+from src.cache.redis_cache import get_diagnosis, invalidate_md, set_diagnosis_record
+from src.cache import doctor_semantic_index
 from src.guardrails.llm_guards import guard_output
 
 router = APIRouter(
     prefix="/doctor_review",
     tags=["doctor_review"],
+    dependencies=[Depends(doctor_priority)],   # doctors skip the patient LLM queue
 )
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -62,19 +64,32 @@ def _validate_doctor(doctor_id: int, session: Session) -> Doctor:
     
     return doctor
 
-async def _update_caches(symptoms_hash: str, answer_md: str):
-    """Update all caches with new answer."""
-    # Update Redis cache
-    await set_md(symptoms_hash, answer_md)
+def _attach_query(doctor_answer: DoctorAnswer, record) -> None:
+    """Copy the symptom query stored at diagnose time onto the answer (semantic cache key)."""
+    if record is not None and record.query:
+        doctor_answer.query = record.query
+
+async def _update_caches(doctor_answer: DoctorAnswer, patient_response: Optional[str] = None):
+    """Update all caches with new answer.
     
-    # Extract and store patient response
-    from src.utils import extract_patient_response
-    from src.cache.redis_cache import set_diagnosis_with_patient_response
-    patient_response = extract_patient_response(answer_md)
-    await set_diagnosis_with_patient_response(symptoms_hash, answer_md, patient_response)
+    `patient_response` is passed when the approved answer is the cached
+    generation itself; otherwise it is extracted from the markdown.
+    """
+    symptoms_hash, answer_md = doctor_answer.symptoms_hash, doctor_answer.answer_md
     
-    # Update semantic index
-    add_doc_to_index(answer_md)
+    # Update the Redis record (answer, patient response, approval) in one round trip
+    from src.utils import extract_patient_response
+    if not patient_response:
+        patient_response = extract_patient_response(answer_md)
+    await set_diagnosis_record(symptoms_hash, answer_md, patient_response,
+                               query=doctor_answer.query, approved=True)
+    # other workers may still hold the unreviewed draft in their in-process L1
+    await invalidate_md(symptoms_hash)
+    
+    # Update semantic index (keyed by the symptom query, when we know it) on every worker
+    if doctor_answer.query:
+        doctor_semantic_index.add_doc_to_index(doctor_answer.id, doctor_answer.query)
+        await doctor_semantic_index.publish("upsert", id=doctor_answer.id, query=doctor_answer.query)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Endpoints
@@ -96,6 +111,9 @@ async def approve_diagnosis(
     
     # Get existing answer or create new one
     doctor_answer = _get_doctor_answer(request_id, session)
+    # the cached diagnosis record: answer, patient text and symptom query in one read
+    record = await get_diagnosis(request_id)
+    cached_answer = record.full_md if record else None
     
     if doctor_answer:
         # Update existing answer
@@ -103,16 +121,11 @@ async def approve_diagnosis(
         doctor_answer.doctor_id = request.doctor_id
         doctor_answer.created_at = datetime.utcnow()
         
-        # Get the answer content from Redis cache
-        from src.cache.redis_cache import get_md
-        cached_answer = await get_md(request_id)
+        # Take the answer content from the Redis cache
         if cached_answer:
             doctor_answer.answer_md = cached_answer
     else:
         # Create new approved answer
-        from src.cache.redis_cache import get_md
-        cached_answer = await get_md(request_id)
-        
         if not cached_answer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -127,13 +140,15 @@ async def approve_diagnosis(
             created_at=datetime.utcnow()
         )
         session.add(doctor_answer)
+    _attach_query(doctor_answer, record)
+    doctor_answer.updated_at = datetime.utcnow()   # semantic index sync mark
     
     # Save to database
     session.commit()
     session.refresh(doctor_answer)
     
-    # Update caches
-    await _update_caches(request_id, doctor_answer.answer_md)
+    # Update caches (the patient text generated with the cached answer is reused as is)
+    await _update_caches(doctor_answer, record.patient_md if cached_answer else None)
     
     return ReviewResponse(
         request_id=request_id,
@@ -178,13 +193,15 @@ async def edit_diagnosis(
             created_at=datetime.utcnow()
         )
         session.add(doctor_answer)
+    _attach_query(doctor_answer, await get_diagnosis(request_id))
+    doctor_answer.updated_at = datetime.utcnow()   # semantic index sync mark
     
     # Save to database
     session.commit()
     session.refresh(doctor_answer)
     
     # Update caches
-    await _update_caches(request_id, doctor_answer.answer_md)
+    await _update_caches(doctor_answer)
     
     return ReviewResponse(
         request_id=request_id,
@@ -2,6 +2,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
+from src.cache import doctor_directory
 from src.db import get_session
 from src.db.models import Doctor
 
@@ -17,4 +18,5 @@ def create_doctor(doc: Doctor, session: Session = Depends(get_session)) -> Docto
     session.add(doc)
     session.commit()
     session.refresh(doc)
+    doctor_directory.upsert(doc)        # assistant lookups see the new doctor at once
     return doc 
\ No newline at end of file
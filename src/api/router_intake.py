@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field, validator
 from sqlmodel import Session, select
 
+from src.cache.session_store import get_session_store
 from src.db import get_session
 from src.db.models import Doctor
 from src.guardrails.llm_guards import guard_input, is_input_valid, get_validation_errors
@@ -73,19 +74,34 @@ class IntakeCompleteResponse(BaseModel):
     symptoms_hash: str
 
 # ─────────────────────────────────────────────────────────────────────────────
-# In-Memory Session Storage (In production, use Redis or DB)
+# Session Storage (shared session store: Redis hash or bounded LRU)
 # ─────────────────────────────────────────────────────────────────────────────
 
-_intake_sessions: Dict[str, IntakeSession] = {}
+_INTAKE_NS = "intake"
 
-def _get_session(session_id: str) -> Optional[IntakeSession]:
+async def _get_session(session_id: str) -> Optional[IntakeSession]:
     """Get intake session by ID."""
-    return _intake_sessions.get(session_id)
+    data = await get_session_store().get(_INTAKE_NS, session_id)
+    return IntakeSession(**data) if data else None
 
-def _save_session(session: IntakeSession):
-    """Save intake session."""
+async def _save_session(session: IntakeSession, *fields: str):
+    """Write the given fields of the session plus updated_at (the whole new session if none are named).
+
+    Only changed fields are written, so concurrent steps on different workers
+    don't overwrite each other's answers. A session that expired or was
+    deleted meanwhile is not revived: the client has to start over.
+    """
     session.updated_at = datetime.utcnow()
-    _intake_sessions[session.session_id] = session
+    data = session.model_dump(mode="json")
+    if not fields:
+        await get_session_store().save(_INTAKE_NS, session.session_id, data)
+        return
+    data = {name: data[name] for name in (*fields, "updated_at")}
+    if not await get_session_store().update(_INTAKE_NS, session.session_id, data):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Сесію не знайдено"
+        )
 
 def _create_session_id() -> str:
     """Create a unique session ID."""
@@ -163,7 +179,7 @@ async def start_intake(
         step=IntakeStep.GENDER
     )
     
-    _save_session(intake_session)
+    await _save_session(intake_session)
     
     return IntakeResponse(
         session_id=session_id,
@@ -181,7 +197,7 @@ async def continue_intake(
     
     # Get or create session
     if request.session_id:
-        intake_session = _get_session(request.session_id)
+        intake_session = await _get_session(request.session_id)
         if not intake_session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -194,6 +210,7 @@ async def continue_intake(
             session_id=session_id,
             step=IntakeStep.GENDER
         )
+        await _save_session(intake_session)
     
     # Process current step
     try:
@@ -202,7 +219,7 @@ async def continue_intake(
             intake_session.gender = gender
             intake_session.step = IntakeStep.AGE
             
-            _save_session(intake_session)
+            await _save_session(intake_session, "gender", "step")
             
             return IntakeResponse(
                 session_id=intake_session.session_id,
@@ -216,7 +233,7 @@ async def continue_intake(
             intake_session.age = age
             intake_session.step = IntakeStep.DOCTOR
             
-            _save_session(intake_session)
+            await _save_session(intake_session, "age", "step")
             
             # Get available doctors
             doctors = _get_available_doctors(session)
@@ -234,7 +251,7 @@ async def continue_intake(
             intake_session.doctor_id = doctor_id
             intake_session.step = IntakeStep.SYMPTOMS
             
-            _save_session(intake_session)
+            await _save_session(intake_session, "doctor_id", "step")
             
             return IntakeResponse(
                 session_id=intake_session.session_id,
@@ -248,7 +265,7 @@ async def continue_intake(
             intake_session.symptoms = symptoms
             intake_session.step = IntakeStep.COMPLETE
             
-            _save_session(intake_session)
+            await _save_session(intake_session, "symptoms", "step")
             
             return IntakeResponse(
                 session_id=intake_session.session_id,
@@ -272,7 +289,7 @@ async def continue_intake(
 @router.get("/{session_id}", response_model=IntakeCompleteResponse)
 async def get_intake_session(session_id: str):
     """Get complete intake session data."""
-    intake_session = _get_session(session_id)
+    intake_session = await _get_session(session_id)
     
     if not intake_session:
         raise HTTPException(
@@ -286,10 +303,9 @@ async def get_intake_session(session_id: str):
             detail="Збір інформації ще не завершено"
         )
     
-    # Generate symptoms hash
-    from hashlib import sha256
-    raw = f"{intake_session.gender.value}|{intake_session.age}|{intake_session.symptoms.strip().lower()}"
-    symptoms_hash = sha256(raw.encode()).hexdigest()
+    # Same exact-cache key as /diagnoses
+    from src.utils.symptom_key import symptoms_key
+    symptoms_hash = symptoms_key(intake_session.gender.value, intake_session.age, intake_session.symptoms)
     
     return IntakeCompleteResponse(
         session_id=intake_session.session_id,
@@ -303,8 +319,7 @@ async def get_intake_session(session_id: str):
 @router.delete("/{session_id}")
 async def delete_intake_session(session_id: str):
     """Delete an intake session."""
-    if session_id in _intake_sessions:
-        del _intake_sessions[session_id]
+    if await get_session_store().delete(_INTAKE_NS, session_id):
         return {"message": "Сесію видалено"}
     else:
         raise HTTPException(
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""src/cache/clinic_card.py
+
+Ukrainian (translated) clinic card cache: process memory → Redis → LLM.
+
+Keys carry a fingerprint of the clinic row, so an edited row can never be
+served a stale translation, even by a worker that missed the invalidation.
+`upsert_clinic` still invalidates explicitly to drop the old copies.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from src.cache import redis_cache
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "clinic_card"
+_FIELDS = ("address", "opening_hours", "services", "phone")
+
+_cards: Dict[str, Dict[str, Any]] = {}      # cache key → translated card
+
+def source_card(clinic) -> Dict[str, Any]:
+    """Untranslated card straight from the `Clinic` row."""
+    return {field: getattr(clinic, field, None) for field in _FIELDS}
+
+def _cache_key(clinic) -> str:
+    raw = json.dumps(source_card(clinic), ensure_ascii=False, sort_keys=True)
+    fingerprint = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+    return f"{_KEY_PREFIX}:{clinic.id}:{fingerprint}"
+
+async def get_card(clinic) -> Optional[Dict[str, Any]]:
+    """Translated card for this exact clinic row, or None if not cached yet."""
+    key = _cache_key(clinic)
+    card = _cards.get(key)
+    if card is not None:
+        metrics.incr("clinic_card_total", source="process")
+        return card
+    try:
+        raw = await redis_cache.get(key)
+    except Exception as e:
+        logger.warning(f"Clinic card Redis read failed: {e}")
+        raw = None
+    if raw:
+        card = json.loads(raw)
+        _cards[key] = card
+        metrics.incr("clinic_card_total", source="redis")
+        return card
+    metrics.incr("clinic_card_total", source="miss")
+    return None
+
+async def set_card(clinic, card: Dict[str, Any]) -> None:
+    """Store a freshly translated card in both tiers."""
+    key = _cache_key(clinic)
+    _cards[key] = card
+    try:
+        await redis_cache.set(key, json.dumps(card, ensure_ascii=False))
+    except Exception as e:
+        logger.warning(f"Clinic card Redis write failed: {e}")
+
+async def invalidate(clinic_id: Optional[int] = None) -> None:
+    """Drop cached cards (all clinics if `clinic_id` is None)."""
+    prefix = f"{_KEY_PREFIX}:{clinic_id}:" if clinic_id is not None else f"{_KEY_PREFIX}:"
+    for key in [k for k in _cards if k.startswith(prefix)]:
+        del _cards[key]
+    try:
+        await redis_cache.clear_pattern(f"{prefix}*")
+    except Exception as e:
+        logger.warning(f"Clinic card Redis invalidation failed: {e}")
+    logger.info(f"Invalidated clinic card cache ({prefix}*)")
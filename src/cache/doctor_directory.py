@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""src/cache/doctor_directory.py
+
+Process-local doctor directory with a fuzzy trigram index.
+
+• Names and positions are transliterated to Latin before indexing, so
+  "Іваненко", "Іваненка" and "Ivanenko" all land on the same doctor, and
+  "педіатр" matches a "Pediatrician" position.
+• Loaded once from the DB, refreshed on `create_doctor` (this worker) and
+  after DOCTOR_DIRECTORY_TTL_S (writes from other workers).
+• Lookups never touch the database.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from src.config import settings
+from src.db.models import Doctor
+from src.utils.transliteration import transliterate_ukrainian
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class DoctorEntry:
+    id: int
+    full_name: str
+    position: str
+    schedule: str
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"full_name": self.full_name, "position": self.position, "schedule": self.schedule}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Normalisation & trigrams
+# ─────────────────────────────────────────────────────────────────────────────
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+_ID_RE = re.compile(r"(?<!\d)(\d{1,6})(?!\d)")
+
+# Words in schedule questions that never identify a doctor
+_STOPWORDS = {
+    "коли", "приймає", "приймають", "працює", "працюють", "лікар", "лікаря", "лікарі", "лікарів",
+    "лікарю", "доктор", "доктора", "докторка", "графік", "графіка", "роботи", "розклад", "прийому",
+    "сьогодні", "завтра", "чи", "є", "у", "в", "вас", "який", "яка", "які", "хто", "мені", "можна",
+    "записатися", "потрапити", "до", "на", "цьому", "тижні", "дні", "днях", "години", "годин",
+    "dr", "doctor", "when", "is", "the", "schedule", "show", "me", "available",
+}
+
+_RELATIVE_CUTOFF = 0.6
+
+def normalize(word: str) -> str:
+    """Lower-case Latin form used for both indexing and queries."""
+    return transliterate_ukrainian(word.lower()).replace("'", "").replace("’", "")
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    """Dice coefficient over trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def _tokens(text: str) -> List[str]:
+    return [normalize(w) for w in _WORD_RE.findall(text) if len(w) >= 3]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Directory
+# ─────────────────────────────────────────────────────────────────────────────
+
+class DoctorDirectory:
+    """Immutable snapshot: entries by id plus trigram → doctor ids."""
+
+    def __init__(self, doctors: Iterable[DoctorEntry]):
+        self.entries: Dict[int, DoctorEntry] = {d.id: d for d in doctors}
+        self._token_grams: Dict[int, List[Set[str]]] = {}
+        self._index: Dict[str, Set[int]] = defaultdict(set)
+        for doctor in self.entries.values():
+            grams = [trigrams(token) for token in _tokens(f"{doctor.full_name} {doctor.position}")]
+            self._token_grams[doctor.id] = grams
+            for gram_set in grams:
+                for gram in gram_set:
+                    self._index[gram].add(doctor.id)
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def all(self) -> List[DoctorEntry]:
+        return sorted(self.entries.values(), key=lambda d: d.full_name)
+
+    def search(self, text: str, min_score: Optional[float] = None) -> List[Tuple[DoctorEntry, float]]:
+        """Doctors matching an explicit id or a (fuzzy) name / position word."""
+        min_score = settings.doctor_match_min_score if min_score is None else min_score
+
+        for match in _ID_RE.finditer(text):
+            doctor = self.entries.get(int(match.group(1)))
+            if doctor:
+                return [(doctor, 1.0)]
+
+        scores: Dict[int, float] = {}
+        for word in _WORD_RE.findall(text):
+            if len(word) < 3 or word.lower() in _STOPWORDS:
+                continue
+            query = trigrams(normalize(word))
+            candidates = set().union(*(self._index.get(gram, ()) for gram in query))
+            for doctor_id in candidates:
+                best = max(_similarity(query, grams) for grams in self._token_grams[doctor_id])
+                if best >= min_score:
+                    scores[doctor_id] = max(scores.get(doctor_id, 0.0), best)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return []
+        # drop weak partial matches once a clearly better doctor was found
+        cutoff = ranked[0][1] * _RELATIVE_CUTOFF
+        return [(self.entries[doctor_id], score) for doctor_id, score in ranked if score >= cutoff]
+
+def _entry(doctor: Doctor) -> DoctorEntry:
+    return DoctorEntry(doctor.id, doctor.full_name, doctor.position, doctor.schedule)
+
+_directory: Optional[DoctorDirectory] = None
+
+def load(session: Session) -> DoctorDirectory:
+    """(Re)build the directory from the database."""
+    global _directory
+    _directory = DoctorDirectory(_entry(d) for d in session.exec(select(Doctor)).all())
+    logger.info(f"Doctor directory loaded: {len(_directory)} doctors")
+    return _directory
+
+def get_directory(session: Session) -> DoctorDirectory:
+    """Current directory, reloaded when missing or older than the TTL."""
+    directory = _directory
+    if directory is None or time.monotonic() - directory.loaded_at > settings.doctor_directory_ttl_s:
+        directory = load(session)
+    return directory
+
+def upsert(doctor: Doctor) -> None:
+    """Reflect a newly created / edited doctor in this worker immediately."""
+    global _directory
+    if _directory is None:
+        return                          # loaded lazily with the new row included
+    entries = dict(_directory.entries)
+    entries[doctor.id] = _entry(doctor)
+    loaded_at = _directory.loaded_at
+    _directory = DoctorDirectory(entries.values())
+    _directory.loaded_at = loaded_at    # keep the TTL for other workers' writes
+
+def reset() -> None:
+    global _directory
+    _directory = None
@@ -1,65 +1,553 @@
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
+#!/usr/bin/env python
+"""src/cache/doctor_semantic_index.py
+
+Semantic cache over doctor-approved answers.
+
+The index (`IdIndex`, keyed by `DoctorAnswer.id`) holds one vector per
+approved answer: the embedding of the symptom query that produced it
+("Стать: …, Вік: …, Симптоми: …", stored in `DoctorAnswer.query`). Edits
+replace the vector, removals leave tombstones that are compacted away.
+Incoming requests are embedded the same way, so query-to-query similarity
+is compared against the threshold. A hit returns the answer text, fetched
+by id. Answers approved before the `query` column existed have nothing to
+compare against and are skipped.
+
+Partitions
+----------
+Entries are split into one `IdIndex` per demographic partition (gender ×
+age band, see `semantic_partitions`). A symptom lookup only searches its
+own partition (plus configured neighbouring bands) and must beat that
+partition's threshold; free-text searches without demographics span all
+partitions.
+
+Concurrency
+-----------
+`SemanticIndex` is copy-on-write: lookups read the current immutable
+`_Snapshot` without taking a lock (so they can run in any thread), while
+writers serialise on a lock, copy only the partitions they touch and swap
+the new snapshot in with a single reference assignment. Writes (approvals,
+syncs) are rare compared to lookups, so the copy is cheap overall.
+
+Persistence
+-----------
+Each partition is written to `<partition>.faiss` under SEMANTIC_INDEX_PATH;
+`meta.json` holds the id maps and a high-water mark (latest `updated_at`
+seen). On start `load_and_sync()` reads them and embeds only rows approved
+since; `sync()` is re-run periodically to pick up approvals made by other
+workers, and the files are rewritten whenever something changed. `clear()`
+keeps a `cleared_at` mark (latest `updated_at` at the time) next to the
+empty index: answers approved up to then stay out of sync and reconcile,
+only later approvals are indexed again. `reset()` drops the mark. All
+workers share the directory: each writes its own temp files and renames the
+whole set under an exclusive `flock` on `.lock`, readers take it shared, so
+nobody sees one worker's meta.json next to another worker's partitions.
+
+Cross-worker updates
+--------------------
+Writers publish "upsert" / "remove" / "reset" / "clear" events on the
+"semantic_index" channel (`publish`); every API worker runs `subscriber()`
+and applies them with `apply_event`. A worker that missed events
+reconciles its index with the database (`reconcile`).
+"""
+from __future__ import annotations
+
+import fcntl
+import heapq
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
 from sqlmodel import Session, select
-from src.db import get_session
-from src.db.models import DoctorAnswer
+
 from src.config import settings
+from src.cache import events, semantic_partitions
+from src.cache.vector_index import IdIndex
+from src.db.models import DoctorAnswer
+from src.models.embeddings import embed_queries, get_embedder
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "semantic_index"
+UNPARTITIONED = "unknown"       # queries without "Стать: …, Вік: …"
+
+_META_FILE = "meta.json"
+_LOCK_FILE = ".lock"
+_META_VERSION = 2               # v1: a single unpartitioned index.faiss
+
+def _empty_index() -> IdIndex:
+    return IdIndex(get_embedder().get_sentence_embedding_dimension(),
+                   settings.semantic_index_max_tombstone_ratio)
 
-_model = SentenceTransformer(settings.model_id)
+@contextmanager
+def _dir_lock(path: Path, exclusive: bool):
+    """Cross-process lock on the index directory (the in-process lock doesn't cover other workers)."""
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / _LOCK_FILE, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
 
-def _load_vectors():
+def _partition_of(query: str) -> str:
+    return semantic_partitions.partition_for(query) or UNPARTITIONED
+
+def _approved_rows(since: Optional[datetime] = None, cleared_at: Optional[datetime] = None):
+    """(id, query, updated_at) of approved answers with a query, oldest first."""
     from src.db import engine
+    stmt = (select(DoctorAnswer.id, DoctorAnswer.query, DoctorAnswer.updated_at)
+            .where(DoctorAnswer.approved == True, DoctorAnswer.query != None))
+    if since is not None:
+        stmt = stmt.where(DoctorAnswer.updated_at >= since)    # ties are deduped by id
+    if cleared_at is not None:
+        stmt = stmt.where(DoctorAnswer.updated_at > cleared_at)
     with Session(engine) as s:
-        docs = s.exec(select(DoctorAnswer)
-                      .where(DoctorAnswer.approved==True)).all()
-    if not docs:
-        return faiss.IndexFlatIP(_model.get_sentence_embedding_dimension()), []
-    texts = [d.answer_md for d in docs]
-    vecs  = _model.encode(texts, normalize_embeddings=True).astype("float32")
-    index = faiss.IndexFlatIP(vecs.shape[1])
-    index.add(vecs)
-    return index, texts
-
-_index, _texts = _load_vectors()
-
-def semantic_lookup(query: str, top_k:int=1) -> str|None:
-    if _index.ntotal == 0:
+        return s.exec(stmt.order_by(DoctorAnswer.updated_at, DoctorAnswer.id)).all()
+
+def _latest(rows, default: Optional[datetime]) -> Optional[datetime]:
+    return max(filter(None, (updated_at for _, _, updated_at in rows)), default=default)
+
+@dataclass(frozen=True)
+class _Snapshot:
+    partitions: Dict[str, IdIndex]          # never mutated once published
+    where: Dict[int, str]                   # answer id → partition
+    high_water: Optional[datetime]          # max updated_at already indexed
+    cleared_at: Optional[datetime] = None   # rows up to here were dropped by clear()
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+    def __contains__(self, answer_id: int) -> bool:
+        return answer_id in self.where
+
+    def ids(self) -> List[int]:
+        return [answer_id for index in self.partitions.values() for answer_id in index.ids()]
+
+    @property
+    def tombstones(self) -> int:
+        return sum(index.tombstones for index in self.partitions.values())
+
+class _Draft:
+    """Writer-side copy of a snapshot; partitions are copied on first change."""
+
+    def __init__(self, snap: _Snapshot):
+        self.partitions = dict(snap.partitions)
+        self.where = dict(snap.where)
+        self.cleared_at = snap.cleared_at
+        self.changed = False
+        self._copied = set()
+
+    def _partition(self, key: str) -> IdIndex:
+        if key not in self._copied:
+            current = self.partitions.get(key)
+            self.partitions[key] = current.copy() if current is not None else _empty_index()
+            self._copied.add(key)
+        return self.partitions[key]
+
+    def remove(self, answer_id: int) -> bool:
+        key = self.where.pop(answer_id, None)
+        if key is None:
+            return False
+        index = self._partition(key)
+        index.remove(answer_id)
+        if not len(index):
+            del self.partitions[key]
+            self._copied.discard(key)
+        self.changed = True
+        return True
+
+    def upsert(self, entries: List[Tuple[int, str]], vecs) -> None:
+        """Add or replace (answer id, query) entries; `vecs` are their embeddings, in order."""
+        grouped: Dict[str, List[int]] = {}
+        for row, (answer_id, query) in enumerate(entries):
+            key = _partition_of(query)
+            if self.where.get(answer_id, key) != key:
+                self.remove(answer_id)          # an edit moved it to another partition
+            self.where[answer_id] = key
+            grouped.setdefault(key, []).append(row)
+        for key, rows in grouped.items():
+            self._partition(key).upsert([entries[row][0] for row in rows], vecs[rows])
+        self.changed = self.changed or bool(entries)
+
+class SemanticIndex:
+    """Copy-on-write semantic index: lock-free reads, serialised writers."""
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._write_lock = threading.RLock()
+        self._dirty = False                 # changed in-process since the last save
+
+    # ── snapshots ────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> _Snapshot:
+        """Current snapshot; loaded on first use (scripts, Streamlit)."""
+        snap = self._snapshot
+        if snap is None:
+            with self._write_lock:
+                if self._snapshot is None:
+                    self.load_and_sync()
+                snap = self._snapshot
+        return snap
+
+    def _publish(self, partitions: Dict[str, IdIndex], where: Dict[int, str],
+                 high_water: Optional[datetime], dirty: bool = True,
+                 cleared_at: Optional[datetime] = None) -> None:
+        """Swap in a new snapshot (caller holds the write lock)."""
+        self._snapshot = snap = _Snapshot(partitions, where, high_water, cleared_at)
+        self._dirty = self._dirty or dirty
+        metrics.set_gauge("semantic_index_entries", len(snap))
+        metrics.set_gauge("semantic_index_tombstones", snap.tombstones)
+        for key, index in partitions.items():
+            metrics.set_gauge("semantic_index_entries", len(index), partition=key)
+
+    def _commit(self, draft: _Draft, high_water: Optional[datetime], dirty: bool = True) -> None:
+        self._publish(draft.partitions, draft.where, high_water, dirty, draft.cleared_at)
+
+    def _empty(self) -> _Snapshot:
+        return _Snapshot({}, {}, None)
+
+    # ── persistence & incremental sync ───────────────────────────────────────
+
+    def _read(self, path: Path) -> Optional[_Snapshot]:
+        """Persisted partitions + id maps + high-water / clear marks; None if missing or stale."""
+        if not (path / _META_FILE).exists():
+            return None
+        try:
+            with _dir_lock(path, exclusive=False):
+                meta = json.loads((path / _META_FILE).read_text())
+                if meta.get("version") != _META_VERSION:
+                    logger.info("Semantic index is in an older format, rebuilding")
+                    return None
+                if meta.get("model_id") != settings.model_id:
+                    logger.info("Semantic index was built with another model, rebuilding")
+                    return None
+                partitions = {
+                    key: IdIndex.read(str(path / f"{key}.faiss"), ids, settings.semantic_index_max_tombstone_ratio)
+                    for key, ids in meta["partitions"].items()
+                }
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read semantic index from {path}, rebuilding: {e}")
+            return None
+        where = {answer_id: key for key, index in partitions.items() for answer_id in index.ids()}
+        high_water = datetime.fromisoformat(meta["high_water"]) if meta.get("high_water") else None
+        cleared_at = datetime.fromisoformat(meta["cleared_at"]) if meta.get("cleared_at") else None
+        return _Snapshot(partitions, where, high_water, cleared_at)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the current snapshot (compacted) and its id maps atomically.
+
+        Temp files are private to this process (pid + random suffix); the
+        renames and stale-file cleanup run under the directory lock so the
+        set on disk always comes from a single writer.
+        """
+        path = Path(path or settings.semantic_index_path)
+        with self._write_lock:
+            snap = self._snapshot
+            if snap is None:
+                return
+            self._dirty = False
+            path.mkdir(parents=True, exist_ok=True)
+            suffix = f".{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+            ids = {key: index.write(str(path / f"{key}.faiss{suffix}")) for key, index in snap.partitions.items()}
+            meta = {
+                "version": _META_VERSION,
+                "model_id": settings.model_id,
+                "partitions": ids,
+                "high_water": snap.high_water.isoformat() if snap.high_water else None,
+                "cleared_at": snap.cleared_at.isoformat() if snap.cleared_at else None,
+            }
+            (path / f"{_META_FILE}{suffix}").write_text(json.dumps(meta))
+            with _dir_lock(path, exclusive=True):
+                for key in ids:
+                    os.replace(path / f"{key}.faiss{suffix}", path / f"{key}.faiss")
+                os.replace(path / f"{_META_FILE}{suffix}", path / _META_FILE)
+                for stale in path.glob("*.faiss"):
+                    if stale.stem not in ids:
+                        stale.unlink(missing_ok=True)
+
+    def sync(self) -> int:
+        """(Re-)embed approved answers changed since the high-water mark; returns how many were upserted.
+
+        Rows newer than the mark are upserted even when their id is indexed: an
+        edit or re-approval whose upsert event this worker missed moved
+        `updated_at`. Rows exactly at the mark were synced last time unless new.
+        """
+        with self._write_lock:
+            snap = self.snapshot()
+            rows = _approved_rows(snap.high_water, snap.cleared_at)
+            if not rows:
+                return 0
+            new = [(answer_id, query) for answer_id, query, updated_at in rows
+                   if answer_id not in snap or snap.high_water is None or updated_at != snap.high_water]
+            draft = _Draft(snap)
+            if new:
+                draft.upsert(new, embed_queries([query for _, query in new]))
+            self._commit(draft, _latest(rows, snap.high_water), dirty=bool(new))
+            return len(new)
+
+    def load_and_sync(self, path: Optional[str] = None) -> int:
+        """Load the persisted index (or build it), catch up with the DB and persist if changed."""
+        with self._write_lock:
+            snap = self._read(Path(path or settings.semantic_index_path))
+            from_disk = snap is not None
+            if snap is None:
+                snap = self._empty()
+            self._publish(snap.partitions, snap.where, snap.high_water, dirty=False, cleared_at=snap.cleared_at)
+            added = self.sync()
+            if from_disk:
+                logger.info(f"Semantic index loaded from disk: {len(self._snapshot)} entries "
+                            f"in {len(self._snapshot.partitions)} partitions, {added} new")
+            else:
+                logger.info(f"Semantic index built from the database: {added} entries")
+            if added:
+                self.save(path)
+            return added
+
+    def sync_and_save(self) -> int:
+        """Periodic job: pick up approvals from other workers, persist when anything changed."""
+        added = self.sync()
+        if added or self._dirty:
+            self.save()
+        if added:
+            logger.info(f"Semantic index synced: {added} new entries")
+        return added
+
+    # ── lookups (lock-free) ──────────────────────────────────────────────────
+
+    def search(self, query: str, top_k: int = 5, min_similarity: float = 0.0,
+               partitions: Optional[Iterable[str]] = None) -> List[Tuple[int, float]]:
+        """Best `top_k` (id, similarity) pairs across `partitions` (None = all)."""
+        snap = self.snapshot()
+        keys = snap.partitions.keys() if partitions is None else partitions
+        indexes = [snap.partitions[key] for key in keys if key in snap.partitions]
+        if not indexes:
+            return []
+        vec = embed_queries([query])[0]
+        hits = heapq.nlargest(top_k, (hit for index in indexes for hit in index.search(vec, top_k)),
+                              key=lambda hit: hit[1])
+        return [(answer_id, score) for answer_id, score in hits if score >= min_similarity]
+
+    def stats(self) -> Dict[str, object]:
+        snap = self.snapshot()
+        return {
+            "total_documents": len(snap),
+            "dimension": next(iter(snap.partitions.values())).dim if snap.partitions
+                         else get_embedder().get_sentence_embedding_dimension(),
+            "texts_count": len(snap),
+            "tombstones": snap.tombstones,
+            "partitions": {key: len(index) for key, index in sorted(snap.partitions.items())},
+            "high_water": snap.high_water.isoformat() if snap.high_water else None,
+            "cleared_at": snap.cleared_at.isoformat() if snap.cleared_at else None,
+        }
+
+    # ── writes (copy-on-write) ───────────────────────────────────────────────
+
+    def upsert(self, answer_id: int, query: str) -> None:
+        vec = embed_queries([query])            # outside the lock: embedding is the slow part
+        with self._write_lock:
+            snap = self.snapshot()
+            draft = _Draft(snap)
+            draft.upsert([(answer_id, query)], vec)
+            self._commit(draft, snap.high_water)
+
+    def remove(self, answer_id: int) -> bool:
+        with self._write_lock:
+            snap = self.snapshot()
+            draft = _Draft(snap)
+            if not draft.remove(answer_id):
+                return False
+            self._commit(draft, snap.high_water)
+            return True
+
+    def reconcile(self, drop_clear: bool = False) -> None:
+        """Make the index match the approved answers in the DB (after missed events).
+
+        `drop_clear` forgets the clear mark first (another worker ran `reset()`).
+        """
+        with self._write_lock:
+            snap = self.snapshot()
+            cleared_at = None if drop_clear else snap.cleared_at
+            rows = _approved_rows(cleared_at=cleared_at)
+            live = {answer_id: query for answer_id, query, _ in rows}
+            draft = _Draft(snap)
+            draft.cleared_at = cleared_at
+            for answer_id in set(snap.where) - live.keys():
+                draft.remove(answer_id)
+            missing = [(answer_id, query) for answer_id, query in live.items() if answer_id not in snap]
+            if missing:
+                draft.upsert(missing, embed_queries([query for _, query in missing]))
+            self._commit(draft, _latest(rows, cleared_at), dirty=draft.changed or cleared_at != snap.cleared_at)
+
+    def reset(self) -> None:
+        """Rebuild from the database (dropping any clear mark) and persist."""
+        with self._write_lock:
+            self._publish({}, {}, None)
+            self.sync()
+            self.save()
+
+    def clear(self, cleared_at: Optional[datetime] = None) -> Optional[datetime]:
+        """Empty the index and persist it with a clear mark; returns the mark.
+
+        Approved answers up to the mark (default: the latest `updated_at` in
+        the DB) are not brought back by sync or reconcile; newer ones are.
+        """
+        with self._write_lock:
+            if cleared_at is None:
+                cleared_at = _latest(_approved_rows(), None)
+            self._publish({}, {}, cleared_at, dirty=False, cleared_at=cleared_at)
+            self.save()
+            return cleared_at
+
+_cache = SemanticIndex()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Module API
+# ─────────────────────────────────────────────────────────────────────────────
+
+def load_and_sync(path: Optional[str] = None) -> int:
+    return _cache.load_and_sync(path)
+
+def sync() -> int:
+    return _cache.sync()
+
+def sync_and_save() -> int:
+    return _cache.sync_and_save()
+
+def save(path: Optional[str] = None) -> None:
+    _cache.save(path)
+
+def _answer(answer_id: int) -> Optional[DoctorAnswer]:
+    from src.db import engine
+    with Session(engine) as s:
+        answer = s.get(DoctorAnswer, answer_id)
+    return answer if answer is not None and answer.approved else None
+
+def _answer_md(answer_id: int) -> Optional[str]:
+    answer = _answer(answer_id)
+    return answer.answer_md if answer is not None else None
+
+def semantic_search(query: str, top_k: int = 5, min_similarity: float = 0.0) -> List[Tuple[int, float]]:
+    """Up to `top_k` (answer id, similarity) pairs, best first, at or above `min_similarity`.
+
+    Searches every partition: used for knowledge-base search, where the doctor
+    browses answers regardless of the patient they were written for.
+    """
+    return _cache.search(query, top_k, min_similarity)
+
+def closest_match(query: str) -> Optional[Tuple[int, float]]:
+    """(answer id, similarity) of the closest approved query in the query's partitions, at any score."""
+    hits = _cache.search(query, top_k=1, partitions=semantic_partitions.lookup_partitions(query))
+    return hits[0] if hits else None
+
+def _classify(query: str) -> Tuple[Optional[Tuple[int, float]], str]:
+    """Closest match and its outcome: "hit", "near_miss", "miss" or "empty"."""
+    partition = semantic_partitions.partition_for(query)
+    best = closest_match(query)
+    label = partition or "all"
+    if best is None:
+        outcome = "empty"
+    else:
+        metrics.observe("semantic_lookup_similarity", best[1], partition=label)
+        if best[1] > semantic_partitions.threshold(partition):
+            outcome = "hit"
+        elif best[1] >= settings.semantic_draft_min_similarity:
+            outcome = "near_miss"
+        else:
+            outcome = "miss"
+    metrics.incr("semantic_lookup_total", partition=label, outcome=outcome)
+    return best, outcome
+
+def semantic_match(query: str) -> Optional[Tuple[int, float]]:
+    """(answer id, similarity) of the closest approved query in the query's partition, above its threshold."""
+    best, outcome = _classify(query)
+    return best if outcome == "hit" else None
+
+def semantic_lookup(query: str, top_k: int = 1) -> str | None:
+    """Approved answer whose symptom query is semantically closest to `query`."""
+    match = semantic_match(query)
+    if match is None:
         return None
-    v = _model.encode([query], normalize_embeddings=True).astype("float32")
-    D,I = _index.search(v, top_k)
-    if D[0][0] > 0.92:          # tweakable threshold
-        return _texts[I[0][0]]
+    return _answer_md(match[0])
+
+@dataclass(frozen=True)
+class SemanticCandidate:
+    """Closest approved answer for a lookup: a hit, or a near miss worth draft-editing."""
+    answer_id: int
+    similarity: float
+    answer_md: str
+    query: Optional[str]                # symptom query the answer was approved for
+    hit: bool
+
+def semantic_candidate(query: str) -> Optional[SemanticCandidate]:
+    """Like `semantic_lookup`, but near misses (SEMANTIC_DRAFT_MIN_SIMILARITY up to the
+    threshold) are returned too, with `hit=False`, when draft editing is enabled."""
+    best, outcome = _classify(query)
+    if outcome == "hit":
+        answer_md = _answer_md(best[0])
+        return SemanticCandidate(best[0], best[1], answer_md, None, True) if answer_md else None
+    if outcome == "near_miss" and settings.draft_edit_enabled:
+        answer = _answer(best[0])
+        if answer is not None:
+            return SemanticCandidate(best[0], best[1], answer.answer_md, answer.query, False)
     return None
 
-def add_doc_to_index(text: str):
-    """Add a new document to the semantic index."""
-    global _index, _texts
-    
-    # Encode the new text
-    vec = _model.encode([text], normalize_embeddings=True).astype("float32")
-    
-    # Add to index
-    _index.add(vec)
-    
-    # Add to texts list
-    _texts.append(text)
+def add_doc_to_index(answer_id: int, query: str):
+    """Add or replace the symptom query of an approved answer (persisted by the next sync)."""
+    _cache.upsert(answer_id, query)
+
+def remove_from_index(answer_id: int) -> bool:
+    """Drop an answer (unapproved / deleted) from the index."""
+    return _cache.remove(answer_id)
+
+def reconcile() -> None:
+    _cache.reconcile()
 
 def reset_semantic_index():
-    """Reset and reload the semantic index from the database."""
-    global _index, _texts
-    _index, _texts = _load_vectors()
+    """Rebuild the semantic index from the database and persist it."""
+    _cache.reset()
 
-def clear_semantic_index():
-    """Clear the semantic index (set to empty)."""
-    global _index, _texts
-    _index = faiss.IndexFlatIP(_model.get_sentence_embedding_dimension())
-    _texts = []
+def clear_semantic_index(cleared_at: Optional[str] = None) -> Optional[str]:
+    """Clear the semantic index (set to empty) up to `cleared_at`; returns the mark for the "clear" event."""
+    mark = _cache.clear(datetime.fromisoformat(cleared_at) if cleared_at else None)
+    return mark.isoformat() if mark else None
 
 def get_semantic_index_stats():
     """Get statistics about the semantic index."""
-    return {
-        "total_documents": _index.ntotal,
-        "dimension": _index.d,
-        "texts_count": len(_texts)
-    } 
\ No newline at end of file
+    return _cache.stats()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cross-worker events
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def publish(event_type: str, **payload) -> None:
+    """Tell every worker about a change already applied here; never fails the caller."""
+    try:
+        await events.publish(CHANNEL, event_type, payload)
+    except Exception as e:
+        logger.warning(f"Could not publish semantic index {event_type} event: {e}")
+
+def apply_event(event: events.Event) -> None:
+    """Apply another worker's change to this worker's index."""
+    if event.type == "upsert":
+        add_doc_to_index(event.payload["id"], event.payload["query"])
+    elif event.type == "remove":
+        remove_from_index(event.payload["id"])
+    elif event.type == "reset":
+        _cache.reconcile(drop_clear=True)
+    elif event.type == "clear":
+        clear_semantic_index(event.payload.get("cleared_at"))
+    else:
+        logger.warning(f"Unknown semantic index event: {event.type}")
+
+def subscriber() -> events.Subscriber:
+    return events.Subscriber(CHANNEL, apply_event, reconcile)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""src/cache/events.py
+
+Sequenced cache-invalidation events over Redis pub/sub.
+
+Every worker keeps process-local copies of shared data (semantic index,
+hot answers). A writer calls `await publish(channel, type, payload)`; the
+Redis-side sequence number (`events:seq:<channel>`) is incremented and the
+message published in one script, so numbers are gap-free per channel.
+
+Each worker runs a `Subscriber` that applies events to its local copy. Pub/sub
+is fire-and-forget: when the subscriber sees a gap in the sequence (missed
+messages, Redis restart, reconnect) it calls `resync` instead, which must
+rebuild the local state from the source of truth (the database). Events a
+worker published itself were already applied locally and are skipped.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from src.cache.redis_cache import get_redis
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+ORIGIN = uuid.uuid4().hex           # identifies this worker process
+
+# INCR + PUBLISH atomically so the sequence order is the delivery order
+_PUBLISH_LUA = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', ARGV[1], seq .. '|' .. ARGV[2])
+return seq
+"""
+
+_RECONNECT_DELAY_S = 1.0
+_RECONNECT_DELAY_MAX_S = 30.0
+
+@dataclass
+class Event:
+    channel: str
+    seq: int
+    type: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    origin: Optional[str] = None
+
+def _seq_key(channel: str) -> str:
+    return f"events:seq:{channel}"
+
+def decode(channel: str, data: str) -> Event:
+    seq, _, body = data.partition("|")
+    message = json.loads(body)
+    return Event(channel, int(seq), message["type"], message.get("payload") or {}, message.get("origin"))
+
+async def publish(channel: str, event_type: str, payload: Optional[Dict[str, Any]] = None) -> int:
+    """Publish an event to every subscribed worker; returns its sequence number."""
+    body = json.dumps({"type": event_type, "payload": payload or {}, "origin": ORIGIN}, ensure_ascii=False)
+    r = await get_redis()
+    seq = int(await r.eval(_PUBLISH_LUA, 1, _seq_key(channel), channel, body))
+    metrics.incr("cache_events_total", channel=channel, outcome="published")
+    return seq
+
+class Subscriber:
+    """Applies one channel's events to process-local state.
+
+    `apply(event)` and `resync()` are blocking callables; they run in a worker
+    thread so embedding or rebuilding never stalls the event loop. `resync`
+    also runs after every (re)connect, covering anything missed meanwhile.
+    """
+
+    def __init__(self, channel: str, apply: Callable[[Event], Any], resync: Callable[[], Any]):
+        self.channel = channel
+        self.apply = apply
+        self.resync = resync
+        self.last_seq: Optional[int] = None
+
+    async def _resync(self, reason: str) -> None:
+        logger.info(f"Resyncing {self.channel} ({reason})")
+        metrics.incr("cache_events_total", channel=self.channel, outcome=f"resync_{reason}")
+        await asyncio.to_thread(self.resync)
+
+    async def handle(self, data: str) -> None:
+        """Process one raw pub/sub message."""
+        event = decode(self.channel, data)
+        expected = None if self.last_seq is None else self.last_seq + 1
+        self.last_seq = event.seq
+        if event.seq != expected:
+            # missed messages, or the counter went back (Redis flushed / restarted)
+            await self._resync("gap")
+            return
+        if event.origin == ORIGIN:
+            metrics.incr("cache_events_total", channel=self.channel, outcome="own")
+            return
+        await asyncio.to_thread(self.apply, event)
+        metrics.incr("cache_events_total", channel=self.channel, outcome="applied")
+
+    async def _listen(self) -> None:
+        r = await get_redis()
+        pubsub = r.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            # subscribed first, then read the counter and resync: nothing can slip in between
+            self.last_seq = int(await r.get(_seq_key(self.channel)) or 0)
+            await self._resync("connect")
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    try:
+                        await self.handle(message["data"])
+                    except Exception as e:
+                        logger.warning(f"Failed to apply {self.channel} event, resyncing: {e}")
+                        await self._resync("error")
+        finally:
+            await pubsub.reset()
+
+    async def run(self) -> None:
+        """Listen forever, reconnecting with backoff; cancel the task to stop."""
+        delay = _RECONNECT_DELAY_S
+        while True:
+            try:
+                await self._listen()
+                delay = _RECONNECT_DELAY_S
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"{self.channel} subscription lost, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _RECONNECT_DELAY_MAX_S)
@@ -1,23 +1,43 @@
 import os
 import json
+import logging
 import redis.asyncio as redis
 import datetime as dt
-from typing import Optional
+from dataclasses import dataclass
+from typing import Dict, Optional
 
-# Global Redis connection pool
+from src.cache.lru import LRUCache
+from src.config import settings
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Global Redis connection pools and clients, created once per process
 _redis_pool = None
+_redis_client = None
+_binary_client = None
+
+def _redis_url() -> str:
+    return os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 async def get_redis():
-    """Get Redis connection from pool."""
-    global _redis_pool
-    if _redis_pool is None:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        print(f"🔗 Connecting to Redis: {redis_url}")
+    """Shared Redis client (str responses)."""
+    global _redis_pool, _redis_client
+    if _redis_client is None:
+        print(f"🔗 Connecting to Redis: {_redis_url()}")
         _redis_pool = redis.ConnectionPool.from_url(
-            redis_url,
+            _redis_url(),
             decode_responses=True
         )
-    return redis.Redis(connection_pool=_redis_pool)
+        _redis_client = redis.Redis(connection_pool=_redis_pool)
+    return _redis_client
+
+async def get_redis_binary():
+    """Shared Redis client with raw bytes responses (diagnosis records may be compressed)."""
+    global _binary_client
+    if _binary_client is None:
+        _binary_client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(_redis_url()))
+    return _binary_client
 
 TTL_DAYS = int(os.getenv("REDIS_TTL_DAYS", 30))
 
@@ -33,42 +53,238 @@ async def set(key: str, value: str, ttl: int = None) -> None:
         ttl = TTL_DAYS * 24 * 3600
     await r.set(key, value, ex=ttl)
 
+# ── In-process L1 for diagnosis answers ─────────────────────────────────────
+# Hot symptom hashes are served from this worker's memory without a Redis
+# round trip. Writers that change an answer other workers may hold (doctor
+# approve / edit, cache resets) call `invalidate_md`, which publishes on the
+# "answers" channel; every worker runs `answer_subscriber()` and drops the
+# key (or everything, after missed events). The TTL bounds staleness if an
+# invalidation is lost anyway.
+ANSWER_CHANNEL = "answers"
+
+_l1: LRUCache[str] = LRUCache(settings.answer_l1_max, settings.answer_l1_ttl_s)
+
+async def invalidate_md(*keys: str) -> None:
+    """Drop answers from the L1 of every worker (this one included); never fails the caller."""
+    from src.cache import events
+    for key in keys:
+        _l1.pop(key)
+    try:
+        await events.publish(ANSWER_CHANNEL, "invalidate", {"keys": list(keys)})
+    except Exception as e:
+        logger.warning(f"Could not publish answer invalidation: {e}")
+
+def _apply_answer_event(event) -> None:
+    if event.type == "invalidate":
+        for key in event.payload.get("keys", []):
+            _l1.pop(key)
+    else:
+        _l1.clear()
+
+def answer_subscriber():
+    from src.cache import events
+    return events.Subscriber(ANSWER_CHANNEL, _apply_answer_event, _l1.clear)
+
+def answer_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Lookups, hits and hit ratio per tier (L1, Redis) and overall, for this worker."""
+    def tier(name: str) -> Dict[str, float]:
+        hits = metrics.counter("answer_cache_total", tier=name, outcome="hit")
+        lookups = hits + metrics.counter("answer_cache_total", tier=name, outcome="miss")
+        return {"lookups": lookups, "hits": hits, "hit_ratio": hits / lookups if lookups else 0.0}
+    l1, remote = tier("l1"), tier("redis")
+    hits = l1["hits"] + remote["hits"]
+    return {
+        "l1": l1,
+        "redis": remote,
+        "overall": {"lookups": l1["lookups"], "hits": hits,
+                    "hit_ratio": hits / l1["lookups"] if l1["lookups"] else 0.0},
+        "l1_entries": len(_l1),
+    }
+
+# ── Diagnosis records ───────────────────────────────────────────────────────
+# One hash per diagnosis at `dx:<symptoms_hash>`: full markdown, patient text,
+# symptom query, model, created_at / updated_at, approval state and schema version,
+# written with one pipelined HSET + EXPIRE. Text fields of at least
+# REDIS_COMPRESS_MIN_BYTES are zstd-compressed when `zstandard` is installed
+# (recognised on read by the zstd frame magic, so mixed records are fine).
+# Records written before the hash layout (`<hash>`, `patient_<hash>`,
+# `query_<hash>` strings) are still read as a fallback in the same round trip.
+SCHEMA_VERSION = 2
+_RECORD_PREFIX = "dx:"
+_TEXT_FIELDS = ("full", "patient", "query")
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_ZSTD_LEVEL = 3
+
+_zstd = None
+
+def _zstd_module():
+    global _zstd
+    if _zstd is None:
+        try:
+            import zstandard
+            _zstd = zstandard
+        except ImportError:
+            logger.info("zstandard is not installed, cached answers are stored uncompressed")
+            _zstd = False
+    return _zstd or None
+
+def _encode(text: str) -> bytes:
+    data = text.encode()
+    threshold = settings.redis_compress_min_bytes
+    zstd = _zstd_module() if threshold and len(data) >= threshold else None
+    if zstd is not None:
+        packed = zstd.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+        if len(packed) < len(data):
+            metrics.incr("redis_compressed_bytes_saved_total", len(data) - len(packed))
+            return packed
+    return data
+
+def _decode(data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    if data.startswith(_ZSTD_MAGIC):
+        zstd = _zstd_module()
+        if zstd is None:
+            logger.warning("Compressed cache entry found but zstandard is not installed")
+            return None
+        data = zstd.ZstdDecompressor().decompress(data)
+    return data.decode()
+
+def _record_key(key: str) -> str:
+    return f"{_RECORD_PREFIX}{key}"
+
+def _ttl() -> int:
+    return TTL_DAYS * 24 * 3600
+
+@dataclass
+class DiagnosisRecord:
+    full_md: str
+    patient_md: Optional[str] = None
+    query: Optional[str] = None
+    model: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    approved: bool = False
+    version: int = SCHEMA_VERSION
+
+async def set_diagnosis_record(
+    key: str,
+    full_md: str,
+    patient_md: Optional[str] = None,
+    *,
+    query: Optional[str] = None,
+    model: Optional[str] = None,
+    approved: bool = False,
+    keep_patient: bool = False,
+) -> None:
+    """Store a diagnosis as one hash with rolling TTL (query / model left out keep their stored values).
+
+    Without `patient_md` the stored patient text is dropped, since it belonged
+    to the answer being replaced, unless `keep_patient` says the answer is the same.
+    """
+    now = dt.datetime.now(dt.timezone.utc).isoformat()
+    fields = {
+        "full": _encode(full_md),
+        "approved": int(approved),
+        "updated_at": now,
+        "v": SCHEMA_VERSION,
+    }
+    if patient_md is not None:
+        fields["patient"] = _encode(patient_md)
+    if query is not None:
+        fields["query"] = _encode(query)
+    if model is not None:
+        fields["model"] = model
+    r = await get_redis_binary()
+    async with r.pipeline(transaction=True) as pipe:
+        if patient_md is None and not keep_patient:
+            pipe.hdel(_record_key(key), "patient")      # don't pair a new answer with an old patient text
+        pipe.hset(_record_key(key), mapping=fields)
+        pipe.hsetnx(_record_key(key), "created_at", now)   # first write only
+        pipe.expire(_record_key(key), _ttl())
+        await pipe.execute()
+    _l1.set(key, full_md)
+
+async def _read_field(key: str, field: str, legacy_key: str) -> Optional[str]:
+    """One record field, falling back to the pre-hash string key, in one round trip."""
+    r = await get_redis_binary()
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.hget(_record_key(key), field)
+        pipe.get(legacy_key)
+        value, legacy = await pipe.execute()
+    return _decode(value if value is not None else legacy)
+
+async def get_diagnosis(key: str) -> Optional[DiagnosisRecord]:
+    """The whole diagnosis record (legacy string keys as a fallback), or None."""
+    r = await get_redis_binary()
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.hgetall(_record_key(key))
+        pipe.get(key)
+        pipe.get(f"patient_{key}")
+        pipe.get(f"query_{key}")
+        record, full, patient, query = await pipe.execute()
+    if record.get(b"full") is not None:
+        text = {name: _decode(record.get(name.encode())) for name in _TEXT_FIELDS}
+        meta = {k.decode(): v.decode() for k, v in record.items() if k.decode() not in _TEXT_FIELDS}
+        return DiagnosisRecord(
+            full_md=text["full"],
+            patient_md=text["patient"],
+            query=text["query"],
+            model=meta.get("model"),
+            created_at=meta.get("created_at"),
+            updated_at=meta.get("updated_at"),
+            approved=meta.get("approved") == "1",
+            version=int(meta.get("v", SCHEMA_VERSION)),
+        )
+    if full is not None:
+        return DiagnosisRecord(full_md=_decode(full), patient_md=_decode(patient), query=_decode(query), version=1)
+    return None
+
 # Legacy functions for backward compatibility
 async def get_md(key: str) -> Optional[str]:
-    """Return markdown answer or None."""
-    return await get(key)
+    """Return markdown answer or None (L1 first, then Redis)."""
+    md = _l1.get(key)
+    metrics.incr("answer_cache_total", tier="l1", outcome="miss" if md is None else "hit")
+    if md is not None:
+        return md
+    md = await _read_field(key, "full", key)
+    metrics.incr("answer_cache_total", tier="redis", outcome="miss" if md is None else "hit")
+    if md is not None:
+        _l1.set(key, md)
+    return md
 
 async def set_md(key: str, md: str) -> None:
-    """Store answer with rolling TTL."""
-    await set(key, md)
+    """Store an approved answer with rolling TTL (cache priming: the stored patient text is kept)."""
+    await set_diagnosis_record(key, md, approved=True, keep_patient=True)
 
-# New functions for storing both full diagnosis and patient response
-async def set_diagnosis_with_patient_response(key: str, full_diagnosis: str, patient_response: str) -> None:
-    """Store both full diagnosis and patient response with rolling TTL."""
-    r = await get_redis()
-    ttl = TTL_DAYS * 24 * 3600
-    
-    # Store full diagnosis with original key
-    await r.set(key, full_diagnosis, ex=ttl)
-    
-    # Store patient response with patient_ prefix
-    patient_key = f"patient_{key}"
-    await r.set(patient_key, patient_response, ex=ttl)
+async def set_diagnosis_with_patient_response(key: str, full_diagnosis: str, patient_response: str, **fields) -> None:
+    """Store both full diagnosis and patient response (plus `set_diagnosis_record` fields) with rolling TTL."""
+    await set_diagnosis_record(key, full_diagnosis, patient_response, **fields)
 
 async def get_patient_response(key: str) -> Optional[str]:
     """Get patient response from cache."""
-    r = await get_redis()
-    patient_key = f"patient_{key}"
-    return await r.get(patient_key)
+    return await _read_field(key, "patient", f"patient_{key}")
+
+async def get_query(key: str) -> Optional[str]:
+    """Get the symptom query stored with a diagnosis."""
+    return await _read_field(key, "query", f"query_{key}")
 
 async def clear_cache() -> None:
     """Clear all data from Redis cache."""
     r = await get_redis()
     await r.flushall()
+    _l1.clear()
+    from src.cache import events
+    try:
+        await events.publish(ANSWER_CHANNEL, "clear")   # other workers drop their L1 too
+    except Exception as e:
+        logger.warning(f"Could not publish answer cache clear: {e}")
 
 async def clear_pattern(pattern: str = "*") -> None:
     """Clear cache keys matching a pattern."""
     r = await get_redis()
     keys = await r.keys(pattern)
     if keys:
-        await r.delete(*keys) 
\ No newline at end of file
+        await r.delete(*keys)
+        for key in keys:
+            _l1.pop(key[len(_RECORD_PREFIX):] if key.startswith(_RECORD_PREFIX) else key) 
\ No newline at end of file
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""src/cache/semantic_partitions.py
+
+Demographic partitions of the semantic answer cache.
+
+An approved answer only serves patients like the one it was written for,
+so answers are grouped by (gender, age band) and a lookup searches its own
+partition, plus `SEMANTIC_NEIGHBOR_BANDS` adjacent age bands of the same
+gender. Partition keys look like "female_18-29" / "male_75+".
+
+Demographics come from the symptom query itself ("Стать: …, Вік: …,
+Симптоми: …"), so stored answers and incoming requests are partitioned the
+same way. Queries without them (free-text knowledge-base search) span all
+partitions.
+
+Each partition may have its own similarity threshold, read from the JSON file
+at SEMANTIC_THRESHOLDS_PATH (written by scripts/calibrate_semantic_threshold.py)
+and re-read when the file changes:
+
+    {"default": 0.92, "partitions": {"female_0-0": 0.95, ...}}
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_QUERY_RE = re.compile(r"Стать:\s*(?P<gender>[^,]*),\s*Вік:\s*(?P<age>\d{1,3})")
+
+def normalize_gender(gender: Optional[str]) -> str:
+    g = (gender or "").strip().lower()
+    if g.startswith(("m", "ч")):
+        return "male"
+    if g.startswith(("f", "ж")):
+        return "female"
+    return "other"
+
+def age_bands() -> List[int]:
+    """Lower bounds of the age bands, ascending (SEMANTIC_AGE_BANDS)."""
+    return sorted({int(b) for b in settings.semantic_age_bands.split(",") if b.strip()} | {0})
+
+def _band_label(bands: List[int], i: int) -> str:
+    if i == len(bands) - 1:
+        return f"{bands[i]}+"
+    return f"{bands[i]}-{bands[i + 1] - 1}"
+
+def _band_index(bands: List[int], age: int) -> int:
+    return max(i for i, lower in enumerate(bands) if age >= lower)
+
+def partition_key(gender: Optional[str], age: int) -> str:
+    bands = age_bands()
+    return f"{normalize_gender(gender)}_{_band_label(bands, _band_index(bands, age))}"
+
+def demographics(query: str) -> Optional[Tuple[str, int]]:
+    """(gender, age) from a "Стать: …, Вік: …" symptom query, if present."""
+    match = _QUERY_RE.search(query)
+    if not match:
+        return None
+    return match.group("gender"), int(match.group("age"))
+
+def partition_for(query: str) -> Optional[str]:
+    found = demographics(query)
+    return partition_key(*found) if found else None
+
+def lookup_partitions(query: str) -> Optional[List[str]]:
+    """Partitions a lookup for `query` searches (None = all of them)."""
+    found = demographics(query)
+    if found is None:
+        return None
+    gender, age = found
+    bands = age_bands()
+    i = _band_index(bands, age)
+    reach = settings.semantic_neighbor_bands
+    return [f"{normalize_gender(gender)}_{_band_label(bands, j)}"
+            for j in range(max(0, i - reach), min(len(bands), i + reach + 1))]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-partition thresholds
+# ─────────────────────────────────────────────────────────────────────────────
+
+_thresholds: Dict[str, float] = {}
+_thresholds_default: Optional[float] = None
+_thresholds_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+def _load_thresholds() -> None:
+    global _thresholds, _thresholds_default, _thresholds_mtime
+    path = settings.semantic_thresholds_path
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        _thresholds, _thresholds_default, _thresholds_mtime = {}, None, None
+        return
+    if mtime == _thresholds_mtime:
+        return
+    with _lock:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            _thresholds = {k: float(v) for k, v in (data.get("partitions") or {}).items()}
+            _thresholds_default = float(data["default"]) if data.get("default") is not None else None
+            logger.info(f"Semantic thresholds loaded from {path}: {len(_thresholds)} partitions")
+        except Exception as e:
+            logger.warning(f"Could not read semantic thresholds from {path}: {e}")
+        _thresholds_mtime = mtime
+
+def threshold(partition: Optional[str]) -> float:
+    """Similarity a hit in `partition` must exceed."""
+    _load_thresholds()
+    default = _thresholds_default if _thresholds_default is not None else settings.semantic_similarity_threshold
+    return _thresholds.get(partition, default) if partition else default
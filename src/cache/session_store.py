@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""src/cache/session_store.py
+
+Pluggable store for short-lived per-user state (assistant conversations,
+intake sessions).
+
+• RedisSessionStore  — one hash per session (`session:<namespace>:<id>`),
+                       sliding TTL, MULTI/EXEC (or a Lua script) for every
+                       write; shared by all workers and survives restarts.
+• MemorySessionStore — bounded LRU with sliding TTL for single-node runs.
+
+Pick one with SESSION_STORE=redis (default) | memory; use `get_session_store()`.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from src.cache.lru import LRUCache
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HSET + EXPIRE only if the session still exists (an expired one is not revived half-empty)
+_UPDATE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+class SessionStore(ABC):
+    """Interface: values are JSON-serialisable dicts keyed by (namespace, id)."""
+
+    @abstractmethod
+    async def get(self, namespace: str, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def save(self, namespace: str, session_id: str, data: Dict[str, Any]) -> None:
+        """Replace the whole record."""
+
+    @abstractmethod
+    async def update(self, namespace: str, session_id: str, fields: Dict[str, Any]) -> bool:
+        """Atomically set some fields of an existing session, keeping the rest.
+
+        Returns False (nothing written) when the session expired or was deleted;
+        callers treat that as a restart rather than recreate a partial record.
+        """
+
+    @abstractmethod
+    async def delete(self, namespace: str, session_id: str) -> bool:
+        ...
+
+class MemorySessionStore(SessionStore):
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: LRUCache[Dict[str, Any]] = LRUCache(maxsize, ttl, sliding=True)
+
+    async def get(self, namespace: str, session_id: str) -> Optional[Dict[str, Any]]:
+        data = self._cache.get((namespace, session_id))
+        return dict(data) if data is not None else None
+
+    async def save(self, namespace: str, session_id: str, data: Dict[str, Any]) -> None:
+        self._cache.set((namespace, session_id), dict(data))
+
+    async def update(self, namespace: str, session_id: str, fields: Dict[str, Any]) -> bool:
+        data = self._cache.get((namespace, session_id))
+        if data is None:
+            return False
+        self._cache.set((namespace, session_id), {**data, **fields})
+        return True
+
+    async def delete(self, namespace: str, session_id: str) -> bool:
+        return self._cache.pop((namespace, session_id)) is not None
+
+class RedisSessionStore(SessionStore):
+
+    def __init__(self, ttl: float):
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _key(namespace: str, session_id: str) -> str:
+        return f"session:{namespace}:{session_id}"
+
+    async def _redis(self):
+        from src.cache.redis_cache import get_redis
+        return await get_redis()
+
+    async def get(self, namespace: str, session_id: str) -> Optional[Dict[str, Any]]:
+        r = await self._redis()
+        key = self._key(namespace, session_id)
+        async with r.pipeline(transaction=True) as pipe:
+            raw, _ = await pipe.hgetall(key).expire(key, self.ttl).execute()   # read + slide TTL
+        if not raw:
+            return None
+        return {field: json.loads(value) for field, value in raw.items()}
+
+    async def save(self, namespace: str, session_id: str, data: Dict[str, Any]) -> None:
+        r = await self._redis()
+        key = self._key(namespace, session_id)
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if data:
+                pipe.hset(key, mapping={f: json.dumps(v, ensure_ascii=False) for f, v in data.items()})
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def update(self, namespace: str, session_id: str, fields: Dict[str, Any]) -> bool:
+        r = await self._redis()
+        key = self._key(namespace, session_id)
+        if not fields:
+            return bool(await r.exists(key))
+        pairs = [item for f, v in fields.items() for item in (f, json.dumps(v, ensure_ascii=False))]
+        return bool(await r.eval(_UPDATE_LUA, 1, key, self.ttl, *pairs))
+
+    async def delete(self, namespace: str, session_id: str) -> bool:
+        r = await self._redis()
+        return bool(await r.delete(self._key(namespace, session_id)))
+
+_store: Optional[SessionStore] = None
+
+def get_session_store() -> SessionStore:
+    """Process-wide store chosen by SESSION_STORE."""
+    global _store
+    if _store is None:
+        if settings.session_store == "redis":
+            _store = RedisSessionStore(settings.session_ttl_s)
+        else:
+            _store = MemorySessionStore(settings.session_memory_max, settings.session_ttl_s)
+            logger.warning("SESSION_STORE=memory keeps sessions per worker process; "
+                           "use it only when the API runs a single worker")
+        logger.info(f"Session store: {type(_store).__name__}")
+    return _store
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""src/cache/vector_index.py
+
+Flat inner-product vector index keyed by integer ids (DoctorAnswer.id).
+
+• `upsert` replaces the vector of a known id, `remove` deletes it.
+• Deletes are tombstones: the row stays in the faiss index but no longer
+  maps to an id, and searches skip it. Removing rows from a flat index
+  shifts every later position, so this is much cheaper.
+• Once the tombstones pass `max_tombstone_ratio` of the live rows, the index
+  is compacted (rebuilt from the live vectors). Memory therefore stays
+  proportional to the number of live entries.
+
+Concurrent `search` calls are safe; mutations are not. Shared instances are
+treated as immutable and changed through `copy()` (see doctor_semantic_index).
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+_MIN_TOMBSTONES = 16        # don't rebuild tiny indexes for every delete
+
+class IdIndex:
+
+    def __init__(self, dim: int, max_tombstone_ratio: float = 0.25):
+        self.dim = dim
+        self.max_tombstone_ratio = max_tombstone_ratio
+        self._index = faiss.IndexFlatIP(dim)
+        self._row_ids: List[Optional[int]] = []     # faiss row → id (None = tombstone)
+        self._rows: Dict[int, int] = {}             # id → faiss row
+        self.tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._rows
+
+    def ids(self) -> List[int]:
+        """Live ids in insertion order."""
+        return [item_id for item_id in self._row_ids if item_id is not None]
+
+    @property
+    def ntotal(self) -> int:
+        """Rows held by faiss, tombstones included."""
+        return self._index.ntotal
+
+    def _tombstone(self, item_id: int) -> bool:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+        self._row_ids[row] = None
+        self.tombstones += 1
+        return True
+
+    def upsert(self, ids: Iterable[int], vecs: np.ndarray) -> None:
+        """Add or replace the vectors of `ids` (rows of `vecs`, L2-normalised)."""
+        ids = list(ids)
+        if not ids:
+            return
+        for item_id in ids:
+            self._tombstone(item_id)
+        start = self._index.ntotal
+        self._index.add(np.asarray(vecs, dtype="float32"))
+        for offset, item_id in enumerate(ids):
+            self._rows[item_id] = start + offset
+            self._row_ids.append(item_id)
+        self.maybe_compact()
+
+    def remove(self, item_id: int) -> bool:
+        removed = self._tombstone(item_id)
+        if removed:
+            self.maybe_compact()
+        return removed
+
+    def search(self, vec: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        """Up to `k` (id, similarity) pairs, best first, tombstones skipped."""
+        if not self._rows:
+            return []
+        depth = min(self._index.ntotal, k + self.tombstones)
+        D, I = self._index.search(np.asarray(vec, dtype="float32").reshape(1, -1), depth)
+        hits = []
+        for score, row in zip(D[0], I[0]):
+            item_id = self._row_ids[row] if row >= 0 else None
+            if item_id is not None:
+                hits.append((item_id, float(score)))
+                if len(hits) == k:
+                    break
+        return hits
+
+    def copy(self) -> "IdIndex":
+        obj = IdIndex(self.dim, self.max_tombstone_ratio)
+        obj._index = faiss.clone_index(self._index)
+        obj._row_ids = list(self._row_ids)
+        obj._rows = dict(self._rows)
+        obj.tombstones = self.tombstones
+        return obj
+
+    def maybe_compact(self) -> bool:
+        if self.tombstones < _MIN_TOMBSTONES or self.tombstones <= self.max_tombstone_ratio * len(self):
+            return False
+        self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Rebuild the faiss index from the live rows only."""
+        if not self.tombstones:
+            return
+        rows = [row for row, item_id in enumerate(self._row_ids) if item_id is not None]
+        ids = [self._row_ids[row] for row in rows]
+        vecs = self._index.reconstruct_batch(np.array(rows, dtype="int64")) if rows \
+            else np.zeros((0, self.dim), dtype="float32")
+        self._index = faiss.IndexFlatIP(self.dim)
+        self._index.add(vecs)
+        self._row_ids = list(ids)
+        self._rows = {item_id: row for row, item_id in enumerate(ids)}
+        self.tombstones = 0
+
+    # ── persistence ──────────────────────────────────────────────────────────
+
+    def write(self, path: str) -> List[int]:
+        """Write a compacted faiss index to `path` (self is left as is); returns its row ids."""
+        target = self
+        if self.tombstones:
+            target = self.copy()
+            target.compact()
+        faiss.write_index(target._index, path)
+        return list(target._row_ids)
+
+    @classmethod
+    def read(cls, path: str, ids: List[int], max_tombstone_ratio: float = 0.25) -> "IdIndex":
+        index = faiss.read_index(path)
+        if index.ntotal != len(ids):
+            raise ValueError(f"index has {index.ntotal} rows but the id map has {len(ids)}")
+        obj = cls(index.d, max_tombstone_ratio)
+        obj._index = index
+        obj._row_ids = list(ids)
+        obj._rows = {item_id: row for row, item_id in enumerate(ids)}
+        return obj
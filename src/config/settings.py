@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -5,6 +7,57 @@ class Settings(BaseSettings):
     # OpenAI configuration
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     openai_model: str = Field("gpt-4o-mini", env="OPENAI_MODEL")
+    openai_base_url: str = Field("", env="OPENAI_BASE_URL")   # override for proxies / local fake servers
+    
+    # LLM admission control (per provider, per worker process)
+    llm_max_concurrency: int = Field(8, env="LLM_MAX_CONCURRENCY")
+    llm_provider_concurrency: Dict[str, int] = Field(default_factory=dict, env="LLM_PROVIDER_CONCURRENCY")  # JSON, e.g. {"openai": 8}
+    llm_max_queue: int = Field(32, env="LLM_MAX_QUEUE")
+    llm_queue_timeout_s: float = Field(10.0, env="LLM_QUEUE_TIMEOUT_S")
+    llm_retry_after_s: int = Field(5, env="LLM_RETRY_AFTER_S")
+    
+    # LLM call policy: deadlines, retries with jitter, hedging
+    llm_default_deadline_s: float = Field(30.0, env="LLM_DEFAULT_DEADLINE_S")
+    llm_call_deadlines_s: Dict[str, float] = Field(
+        default_factory=lambda: {"intent": 8.0, "extract": 10.0, "assistant": 20.0, "diagnosis": 60.0,
+                                 "draft_edit": 20.0},
+        env="LLM_CALL_DEADLINES_S",
+    )
+    llm_max_retries: int = Field(2, env="LLM_MAX_RETRIES")
+    llm_backoff_base_s: float = Field(0.5, env="LLM_BACKOFF_BASE_S")
+    llm_backoff_max_s: float = Field(8.0, env="LLM_BACKOFF_MAX_S")
+    llm_hedge_call_sites: List[str] = Field(default_factory=list, env="LLM_HEDGE_CALL_SITES")  # JSON, e.g. ["intent"]
+    llm_hedge_min_samples: int = Field(20, env="LLM_HEDGE_MIN_SAMPLES")
+    assistant_time_budget_s: float = Field(90.0, env="ASSISTANT_TIME_BUDGET_S")
+    
+    # Diagnosis generation: "structured" (JSON schema → markdown) or "markdown" (legacy)
+    diagnosis_output_mode: str = Field("structured", env="DIAGNOSIS_OUTPUT_MODE")
+    diagnosis_top_k: int = Field(3, env="DIAGNOSIS_TOP_K")
+    # Start cache lookups + retrieval concurrently with intent classification (opt-in)
+    speculative_retrieval_enabled: bool = Field(False, env="SPECULATIVE_RETRIEVAL_ENABLED")
+    
+    # Diagnosis model routing (fast vs strong tier)
+    model_router_enabled: bool = Field(True, env="MODEL_ROUTER_ENABLED")
+    openai_model_fast: str = Field("", env="OPENAI_MODEL_FAST")          # empty → OPENAI_MODEL
+    openai_model_strong: str = Field("gpt-4o", env="OPENAI_MODEL_STRONG")
+    router_strong_score: int = Field(2, env="ROUTER_STRONG_SCORE")        # signals needed for strong tier
+    router_symptom_count: int = Field(3, env="ROUTER_SYMPTOM_COUNT")
+    router_child_age: int = Field(2, env="ROUTER_CHILD_AGE")
+    router_elderly_age: int = Field(75, env="ROUTER_ELDERLY_AGE")
+    router_min_top_score: float = Field(0.80, env="ROUTER_MIN_TOP_SCORE")
+    router_min_score_gap: float = Field(0.01, env="ROUTER_MIN_SCORE_GAP")
+    router_fast_temperature: float = Field(0.2, env="ROUTER_FAST_TEMPERATURE")
+    router_strong_temperature: float = Field(0.2, env="ROUTER_STRONG_TEMPERATURE")
+    
+    # Intent classification: local e5 nearest-centroid, LLM only below the margin
+    intent_local_enabled: bool = Field(True, env="INTENT_LOCAL_ENABLED")
+    intent_local_margin: float = Field(0.02, env="INTENT_LOCAL_MARGIN")    # top-1 minus top-2 cosine
+    intent_log_enabled: bool = Field(False, env="INTENT_LOG_ENABLED")      # stores patient messages
+    intent_log_path: str = Field("logs/intent_log.csv", env="INTENT_LOG_PATH")
+    
+    # Doctor directory (in-memory, fuzzy name / position matching)
+    doctor_directory_ttl_s: float = Field(300.0, env="DOCTOR_DIRECTORY_TTL_S")  # picks up other workers' writes
+    doctor_match_min_score: float = Field(0.6, env="DOCTOR_MATCH_MIN_SCORE")     # trigram Dice similarity
     
     # LangSmith configuration
     langsmith_api_key: str = Field("", env="LANGSMITH_API_KEY")
@@ -15,6 +68,18 @@ class Settings(BaseSettings):
     model_id: str = Field("intfloat/multilingual-e5-base", env="MODEL_ID")
     index_path: str = Field("data/faiss_index", env="INDEX_PATH")
     map_path: str = Field("data/doc_map.pkl", env="MAP_PATH")
+    semantic_index_path: str = Field("data/semantic_index", env="SEMANTIC_INDEX_PATH")  # approved-answer cache
+    semantic_sync_interval_s: float = Field(60, env="SEMANTIC_SYNC_INTERVAL_S")  # pick up other workers' approvals
+    semantic_index_max_tombstone_ratio: float = Field(0.25, env="SEMANTIC_INDEX_MAX_TOMBSTONE_RATIO")  # compact above
+    semantic_similarity_threshold: float = Field(0.92, env="SEMANTIC_SIMILARITY_THRESHOLD")  # default hit threshold
+    semantic_thresholds_path: str = Field("data/semantic_thresholds.json", env="SEMANTIC_THRESHOLDS_PATH")  # per partition
+    semantic_age_bands: str = Field("0,1,3,6,12,18,30,45,60,75", env="SEMANTIC_AGE_BANDS")  # band lower bounds
+    semantic_neighbor_bands: int = Field(0, env="SEMANTIC_NEIGHBOR_BANDS")  # adjacent age bands also searched
+    semantic_draft_min_similarity: float = Field(0.85, env="SEMANTIC_DRAFT_MIN_SIMILARITY")  # near misses above this
+    draft_edit_enabled: bool = Field(True, env="DRAFT_EDIT_ENABLED")  # adapt a near-miss answer instead of full RAG
+    draft_edit_max_tokens: int = Field(400, env="DRAFT_EDIT_MAX_TOKENS")  # output budget for the edit list
+    draft_edit_log_path: str = Field("logs/draft_edits.csv", env="DRAFT_EDIT_LOG_PATH")  # audit log
+    diagnosis_log_path: str = Field("logs/diagnoses.csv", env="DIAGNOSIS_LOG_PATH")  # generated answers, for calibration
     
     # Database configuration
     database_url: str = Field("sqlite:///data/clinic.db", env="DATABASE_URL")
@@ -22,6 +87,15 @@ class Settings(BaseSettings):
     # Redis configuration
     redis_url: str = Field("redis://cache:6379/0", env="REDIS_URL")
     redis_ttl_days: int = Field(30, env="REDIS_TTL_DAYS")
+    symptom_key_age_bands: bool = Field(False, env="SYMPTOM_KEY_AGE_BANDS")  # exact-cache key uses the age band
+    answer_l1_max: int = Field(1000, env="ANSWER_L1_MAX")          # hot answers kept in-process (0 = off)
+    answer_l1_ttl_s: float = Field(300.0, env="ANSWER_L1_TTL_S")   # staleness bound if an invalidation is missed
+    redis_compress_min_bytes: int = Field(1024, env="REDIS_COMPRESS_MIN_BYTES")  # zstd for larger cached texts (0 = off)
+    
+    # Session store for conversations / intake: "redis" (multi-worker) or "memory" (single node)
+    session_store: str = Field("redis", env="SESSION_STORE")
+    session_ttl_s: float = Field(6 * 3600, env="SESSION_TTL_S")          # sliding, renewed on every access
+    session_memory_max: int = Field(10000, env="SESSION_MEMORY_MAX")    # LRU bound for the memory store
     
     # API configuration
     api_base_url: str = Field("http://familydoc:8000", env="API_BASE_URL")
@@ -33,6 +107,7 @@ class Settings(BaseSettings):
     
     # Debug configuration
     debug_mode: bool = Field(False, env="DEBUG_MODE")
+    server_timing_enabled: bool = Field(False, env="SERVER_TIMING_ENABLED")  # Server-Timing header + per-request stage log
     
     # AWS & ECR configuration
     aws_access_key_id: str = Field("", env="AWS_ACCESS_KEY_ID")
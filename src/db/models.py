@@ -36,8 +36,10 @@ class DoctorAnswer(SQLModel, table=True):
     """Cache of answers a doctor marked as approved or edited."""
     __tablename__ = "doctor_answers"      # renamed table
     id: int | None = Field(default=None, primary_key=True)
-    symptoms_hash: str  # SHA-256 of gender|age|symptoms
+    symptoms_hash: str  # versioned canonical key (src/utils/symptom_key.py); older rows: SHA-256 of gender|age|symptoms
+    query: str | None = None  # symptom query that produced the answer (semantic cache key)
     answer_md: str
     approved: bool = False
     doctor_id: int | None = Field(default=None, foreign_key="doctors.id")
-    created_at: datetime = Field(default_factory=datetime.utcnow) 
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)  # semantic index sync mark
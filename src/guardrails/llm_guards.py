@@ -3,6 +3,8 @@ import re
 from guardrails import Guard
 from pydantic import BaseModel, Field, validator
 
+from src.utils import timing
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Banned Words List
 # ─────────────────────────────────────────────────────────────────────────────
@@ -60,16 +62,17 @@ def guard_input(text: str) -> str:
     Returns:
         Cleaned and validated text
     """
-    try:
-        result = input_guard.validate(text)
-        return result.validated_output.text
-    except Exception as e:
-        # If validation fails, truncate and clean
-        cleaned = text[:1000]  # Truncate to max length
-        # Strip banned words
-        words = cleaned.lower().split()
-        filtered_words = [word for word in words if word not in BANNED_WORDS]
-        return ' '.join(filtered_words)
+    with timing.stage("guard_input"):
+        try:
+            result = input_guard.validate(text)
+            return result.validated_output.text
+        except Exception as e:
+            # If validation fails, truncate and clean
+            cleaned = text[:1000]  # Truncate to max length
+            # Strip banned words
+            words = cleaned.lower().split()
+            filtered_words = [word for word in words if word not in BANNED_WORDS]
+            return ' '.join(filtered_words)
 
 def guard_output(response: str) -> str:
     """
@@ -81,14 +84,15 @@ def guard_output(response: str) -> str:
     Returns:
         Validated and formatted response with disclaimer
     """
-    try:
-        result = output_guard.validate(response)
-        return result.validated_output.response
-    except Exception as e:
-        # If validation fails, truncate and add disclaimer
-        truncated = response[:2000]
-        disclaimer = "\n\n⚠️ **Важливо:** Це лише попередній діагноз. Завжди консультуйтесь з лікарем для остаточного діагнозу та лікування."
-        return truncated + disclaimer
+    with timing.stage("guard_output"):
+        try:
+            result = output_guard.validate(response)
+            return result.validated_output.response
+        except Exception as e:
+            # If validation fails, truncate and add disclaimer
+            truncated = response[:2000]
+            disclaimer = "\n\n⚠️ **Важливо:** Це лише попередній діагноз. Завжди консультуйтесь з лікарем для остаточного діагнозу та лікування."
+            return truncated + disclaimer
 
 def is_input_valid(text: str) -> bool:
     """
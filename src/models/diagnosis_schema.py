@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""src/models/diagnosis_schema.py
+
+Structured diagnosis returned by the LLM in JSON mode, plus a renderer back
+to the markdown layout doctors and the Telegram bot already use.
+
+Because the markdown is produced by `render_markdown`, the patient section
+can later be cut out with two `str.find` calls instead of regex heuristics.
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+PATIENT_HEADER = "## ✍️ 1. Коротка відповідь для пацієнта"
+DOCTOR_HEADER  = "## 🩺 2. Професійна відповідь для лікаря"
+_SEPARATOR     = "\n\n---\n"
+
+class StructuredDiagnosis(BaseModel):
+    """Schema the model must return in structured mode."""
+    patient_summary: str = Field(..., min_length=1, description="Ймовірний діагноз простими словами")
+    next_steps: List[str] = Field(default_factory=list, description="3-5 наступних кроків для пацієнта")
+    red_flags: List[str] = Field(default_factory=list, description="Коли обов'язково звернутися до лікаря")
+    doctor_markdown: str = Field(..., min_length=1, description="Професійна відповідь для лікаря (markdown)")
+
+def parse_structured_diagnosis(raw: str) -> Optional[StructuredDiagnosis]:
+    """Validate the model's JSON once; None if it does not match the schema."""
+    try:
+        return StructuredDiagnosis.model_validate_json(raw)
+    except ValidationError:
+        return None
+
+def render_patient_section(diagnosis: StructuredDiagnosis) -> str:
+    """Patient-facing text (what `extract_patient_response` used to dig out)."""
+    lines = [f"1. Ймовірний діагноз: {diagnosis.patient_summary.strip()}"]
+    if diagnosis.next_steps:
+        lines.append("2. Наступні кроки:")
+        lines.extend(f"   - {step.strip()}" for step in diagnosis.next_steps)
+    if diagnosis.red_flags:
+        lines.append("3. Коли обов'язково звернутися до лікаря:")
+        lines.extend(f"   - {flag.strip()}" for flag in diagnosis.red_flags)
+    return "\n".join(lines)
+
+def render_markdown(diagnosis: StructuredDiagnosis) -> str:
+    """Full markdown in the same two-section layout as the legacy prompt."""
+    return (
+        f"{PATIENT_HEADER}\n{render_patient_section(diagnosis)}"
+        f"{_SEPARATOR}{DOCTOR_HEADER}\n{diagnosis.doctor_markdown.strip()}"
+    )
+
+def patient_section_from_markdown(markdown: str) -> Optional[str]:
+    """Slice the patient section out of markdown produced by `render_markdown`."""
+    start = markdown.find(PATIENT_HEADER)
+    if start == -1:
+        return None
+    start += len(PATIENT_HEADER)
+    end = markdown.find(_SEPARATOR + DOCTOR_HEADER, start)
+    if end == -1:
+        return None
+    section = markdown[start:end].strip()
+    return section or None
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""src/models/draft_edit.py
+
+Draft-edit generation for semantic near misses.
+
+When the closest approved answer is just below the semantic threshold
+(SEMANTIC_DRAFT_MIN_SIMILARITY up to the threshold), the LLM gets that
+answer and the new symptoms and returns a short list of find/replace
+edits instead of a whole new diagnosis. Output tokens, the slow part of
+generation, shrink to the differences, and DRAFT_EDIT_MAX_TOKENS caps them.
+
+The edits are applied locally and must each match the draft exactly once;
+anything else (model says the case is new, invalid JSON, a failed edit,
+hitting the token cap, an error) falls back to full RAG generation. Every
+attempt is appended to DRAFT_EDIT_LOG_PATH with its outcome, so drafted
+answers can be audited against the doctor's review.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from src.config import settings
+from src.models.prompts import DRAFT_EDIT_SYSTEM_PROMPT, DRAFT_EDIT_USER_TEMPLATE
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class DraftEditResult:
+    outcome: str                        # edited | unchanged | new_case | invalid | truncated | error
+    response: Optional[str] = None      # adapted answer; None → fall back to full generation
+    edits: int = 0
+    output_tokens: Optional[int] = None
+    seconds: float = 0.0
+
+class DraftEditError(ValueError):
+    """The model's edits could not be parsed or applied to the draft."""
+
+def parse_edits(content: str) -> Optional[List[Tuple[str, str]]]:
+    """(find, replace) pairs from the model's JSON; None when it marked the case as new."""
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise DraftEditError(f"invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise DraftEditError("expected a JSON object")
+    if data.get("new_case"):
+        return None
+    edits = data.get("edits")
+    if not isinstance(edits, list):
+        raise DraftEditError("missing 'edits' list")
+    pairs = []
+    for edit in edits:
+        if not isinstance(edit, dict) or not isinstance(edit.get("find"), str) \
+                or not isinstance(edit.get("replace"), str) or not edit["find"]:
+            raise DraftEditError(f"malformed edit: {edit!r}")
+        pairs.append((edit["find"], edit["replace"]))
+    return pairs
+
+def apply_edits(draft: str, edits: List[Tuple[str, str]]) -> str:
+    """Apply the edits in order; each `find` must occur exactly once in the current text."""
+    text = draft
+    for find, replace in edits:
+        count = text.count(find)
+        if count != 1:
+            raise DraftEditError(f"edit target found {count} times: {find[:60]!r}")
+        text = text.replace(find, replace)
+    return text
+
+_llm = None
+
+def _get_llm():
+    global _llm
+    if _llm is None:
+        from src.models import llm_client
+        _llm = llm_client.make_chat_model(
+            "draft_edit", temperature=0.0, max_tokens=settings.draft_edit_max_tokens,
+        ).bind(response_format={"type": "json_object"})
+    return _llm
+
+async def agenerate_draft_edit(query: str, draft_md: str, draft_query: Optional[str]) -> DraftEditResult:
+    """Adapt an approved answer (`draft_md`, written for `draft_query`) to `query`."""
+    from src.models import llm_client
+
+    messages = [
+        ("system", DRAFT_EDIT_SYSTEM_PROMPT),
+        ("human", DRAFT_EDIT_USER_TEMPLATE.format(draft_query=draft_query or "—", draft=draft_md, query=query)),
+    ]
+    started = time.perf_counter()
+    result = DraftEditResult("error")
+    try:
+        message = await llm_client.ainvoke(_get_llm(), messages, call_site="draft_edit")
+        result.output_tokens = (getattr(message, "usage_metadata", None) or {}).get("output_tokens")
+        if (getattr(message, "response_metadata", None) or {}).get("finish_reason") == "length":
+            result.outcome = "truncated"
+        else:
+            edits = parse_edits(message.content)
+            if edits is None:
+                result.outcome = "new_case"
+            else:
+                result.response = apply_edits(draft_md, edits)
+                result.edits = len(edits)
+                result.outcome = "edited" if edits else "unchanged"
+    except DraftEditError as e:
+        logger.info(f"Draft edit rejected, generating from scratch: {e}")
+        result.outcome = "invalid"
+    except Exception as e:
+        logger.warning(f"Draft edit failed, generating from scratch: {e}")
+    result.seconds = time.perf_counter() - started
+    metrics.incr("draft_edit_total", outcome=result.outcome)
+    metrics.observe("draft_edit_seconds", result.seconds, outcome=result.outcome)
+    return result
+
+def log_draft_edit(symptoms_hash: str, draft_answer_id: int, similarity: float, result: DraftEditResult) -> None:
+    """Append the attempt to the draft-edit audit log."""
+    try:
+        log_file = Path(settings.draft_edit_log_path)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with log_file.open("a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow([
+                datetime.now().isoformat(),
+                symptoms_hash,
+                draft_answer_id,
+                f"{similarity:.4f}",
+                result.outcome,
+                result.edits,
+                "" if result.output_tokens is None else result.output_tokens,
+                f"{result.seconds:.3f}",
+            ])
+    except Exception as e:
+        logger.warning(f"Failed to log draft edit: {e}")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""src/models/embeddings.py
+
+Lazily loaded, process-wide e5 sentence embedder (settings.model_id).
+
+e5 models are trained with "query: " / "passage: " prefixes; callers that
+compare short user messages with each other should embed both sides as
+queries.
+"""
+from __future__ import annotations
+
+import os
+# Disable tokenizers parallelism to avoid warnings in multiprocessing
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+import threading
+from typing import List
+
+import numpy as np
+
+from src.config import settings
+
+_model = None
+_lock = threading.Lock()
+
+def get_embedder():
+    """Return the shared SentenceTransformer, loading it on first use."""
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(settings.model_id)
+    return _model
+
+def embed_queries(texts: List[str]) -> np.ndarray:
+    """L2-normalised float32 embeddings for short user queries."""
+    vecs = get_embedder().encode([f"query: {t}" for t in texts], normalize_embeddings=True)
+    return np.asarray(vecs, dtype="float32")
@@ -1,19 +1,39 @@
 """
 Intent classification for assistant messages (Ukrainian-first).
 
-We keep an ultra-light few-shot prompt and force the model to return
-exactly one of:
+Returns exactly one of:
     clinic_info | doctor_schedule | diagnose
+
+Rule path: one compiled regex catches unambiguous messages (address, opening
+hours, a doctor's schedule, age + symptom) in a single scan.
+
+Local path: nearest-centroid over e5 embeddings, trained from the few-shot
+examples below plus LLM-labelled rows of the intent log. Only when the
+margin between the two closest centroids is small do we fall back to the
+few-shot LLM prompt (one static system prefix).
 """
 
 from __future__ import annotations
+import asyncio
+import csv
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
-from typing import Literal
+from pathlib import Path
+from typing import Callable, List, Literal, Optional, Sequence, Tuple
 
-from langchain_openai import ChatOpenAI
+import numpy as np
+from fastapi import HTTPException
 from langchain_core.prompts import ChatPromptTemplate
 
 from src.config import settings
+from src.models import llm_client
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
 
 # ─────────────────────────────────────────────────────────────────────────────
 class IntentEnum(str, Enum):
@@ -22,73 +42,304 @@ class IntentEnum(str, Enum):
     DIAGNOSE        = "diagnose"
 
 # ─────────── LLM setup ───────────────────────────────────────────────────────
-_llm = ChatOpenAI(
-    model=settings.openai_model,  # read from OPENAI_MODEL env var
-    temperature=0.0,
-    api_key=settings.openai_api_key,
-)
+_llm = llm_client.make_chat_model("intent", temperature=0.0)  # model from OPENAI_MODEL env var
+
+# ─────────── Few-shot examples ──────────────────────────────────────────────
+# Rendered once into a static system prefix (identical on every call, so the
+# provider can cache it); only the user message at the end varies.
+_EXAMPLES: list[tuple[str, IntentEnum]] = [
+    # ——— clinic_info ———
+    ("Де знаходиться ваша клініка?", IntentEnum.CLINIC_INFO),
+    ("Який у вас номер телефону та години роботи?", IntentEnum.CLINIC_INFO),
+    ("Які години роботи клініки?", IntentEnum.CLINIC_INFO),
+    ("Які послуги надає клініка?", IntentEnum.CLINIC_INFO),
+    ("Адреса клініки?", IntentEnum.CLINIC_INFO),
+    ("Ви працюєте в суботу?", IntentEnum.CLINIC_INFO),
+    ("До котрої години відкрито сьогодні?", IntentEnum.CLINIC_INFO),
+    ("Як до вас доїхати?", IntentEnum.CLINIC_INFO),
+    ("Чи можна у вас зробити аналіз крові?", IntentEnum.CLINIC_INFO),
+    ("Скільки коштує консультація?", IntentEnum.CLINIC_INFO),
+    ("Чи є у вас вакцинація дітей?", IntentEnum.CLINIC_INFO),
+    ("Дайте контактний телефон реєстратури", IntentEnum.CLINIC_INFO),
+    ("Де ви розташовані?", IntentEnum.CLINIC_INFO),
+    ("Графік роботи клініки у вихідні", IntentEnum.CLINIC_INFO),
+
+    # ——— doctor_schedule ———
+    ("Коли приймає доктор Іваненко?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Графік роботи лікаря 12?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Чи є у вас лікар педіатр?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Які лікарі у вас працюють?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Чи є у вас сімейний лікар?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Хто з лікарів приймає дітей?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Коли можна потрапити до терапевта?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Чи працює завтра лікар Петренко?", IntentEnum.DOCTOR_SCHEDULE),
+    ("У які дні приймає гінеколог?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Розклад педіатра на цьому тижні", IntentEnum.DOCTOR_SCHEDULE),
+    ("Хто сьогодні черговий лікар?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Чи приймає кардіолог у п'ятницю?", IntentEnum.DOCTOR_SCHEDULE),
+    ("Коли приймає д-р Коваленко?", IntentEnum.DOCTOR_SCHEDULE),
+
+    # ——— diagnose ———
+    ("У мене два дні температура 38 і кашель.", IntentEnum.DIAGNOSE),
+    ("Моєму сину 5 років, болить живіт.", IntentEnum.DIAGNOSE),
+    ("Болить горло, важко ковтати", IntentEnum.DIAGNOSE),
+    ("Нежить і чхання вже тиждень", IntentEnum.DIAGNOSE),
+    ("Дитині 8 місяців, температура 39", IntentEnum.DIAGNOSE),
+    ("Жінка 45 років, головний біль і запаморочення", IntentEnum.DIAGNOSE),
+    ("Нудота та блювання після їжі", IntentEnum.DIAGNOSE),
+    ("Свербить шкіра на руках, з'явився висип", IntentEnum.DIAGNOSE),
+    ("Сильна втома і слабкість останній місяць", IntentEnum.DIAGNOSE),
+    ("Набрякають ноги ввечері, мені 70 років", IntentEnum.DIAGNOSE),
+    ("Часто бігаю в туалет вночі", IntentEnum.DIAGNOSE),
+    ("Закладений ніс у доньки 3 роки", IntentEnum.DIAGNOSE),
+    ("Діарея у дитини другий день", IntentEnum.DIAGNOSE),
+    ("Задишка при ходьбі та кашель", IntentEnum.DIAGNOSE),
+    ("Що робити, якщо судоми в ногах ночами?", IntentEnum.DIAGNOSE),
+]
+
+def _render_system_prefix() -> str:
+    lines = [
+        "You classify Ukrainian patient queries for a family-medicine clinic assistant.",
+        "Return ONLY one token: clinic_info, doctor_schedule, or diagnose.",
+        "",
+        "clinic_info — address, opening hours, phone, prices, services of the clinic.",
+        "doctor_schedule — which doctors work here, a doctor's schedule or availability.",
+        "diagnose — the user describes symptoms or a health problem (own or a relative's).",
+        "",
+        "Examples:",
+    ]
+    lines += [f"Q: {text}\nA: {intent.value}" for text, intent in _EXAMPLES]
+    return "\n".join(lines)
 
 # ─────────── Prompt ─────────────────────────────────────────────────────────
+_SYSTEM_PREFIX = _render_system_prefix()
+
 _PROMPT = ChatPromptTemplate.from_messages(
     [
-        (
-            "system",
-            (
-                "You classify Ukrainian patient queries. "
-                "Return ONLY one token: clinic_info, doctor_schedule, or diagnose."
-            ),
-        ),
-        # ——— clinic_info ———
-        ("user", "Де знаходиться ваша клініка?"),
-        ("assistant", "clinic_info"),
-        ("user", "Який у вас номер телефону та години роботи?"),
-        ("assistant", "clinic_info"),
-        ("user", "Які години роботи клініки?"),
-        ("assistant", "clinic_info"),
-        ("user", "Які послуги надає клініка?"),
-        ("assistant", "clinic_info"),
-        ("user", "Адреса клініки?"),
-        ("assistant", "clinic_info"),
-
-        # ——— doctor_schedule ———
-        ("user", "Коли приймає доктор Іваненко?"),
-        ("assistant", "doctor_schedule"),
-        ("user", "Графік роботи лікаря 12?"),
-        ("assistant", "doctor_schedule"),
-        ("user", "Чи є у вас лікар педіатр?"),
-        ("assistant", "doctor_schedule"),
-        ("user", "Які лікарі у вас працюють?"),
-        ("assistant", "doctor_schedule"),
-        ("user", "Чи є у вас сімейний лікар?"),
-        ("assistant", "doctor_schedule"),
-        ("user", "Хто з лікарів приймає дітей?"),
-        ("assistant", "doctor_schedule"),
-
-        # ——— diagnose ———
-        ("user", "У мене два дні температура 38 і кашель."),
-        ("assistant", "diagnose"),
-        ("user", "Моєму сину 5 років, болить живіт."),
-        ("assistant", "diagnose"),
-
-        # ——— runtime slot ———
+        ("system", _SYSTEM_PREFIX),
+        # ——— runtime slot (the only variable part) ———
         ("user", "{text}"),
     ]
 )
 
 _chain = _PROMPT | _llm
 
+# ─────────── Result ──────────────────────────────────────────────────────────
+@dataclass
+class IntentResult:
+    intent: IntentEnum
+    confidence: Optional[float]     # local: softmax over centroid similarities
+    path: str                       # "rule" | "local" | "llm" | "fallback"
+
+# ─────────── Rule fast path ──────────────────────────────────────────────────
+# (name, intent, pattern). `None` intent marks parts of a compound rule.
+_RULES: list[tuple[str, Optional[IntentEnum], str]] = [
+    ("address", IntentEnum.CLINIC_INFO,
+     r"\bадрес\w*|\bде\s+(?:ви\s+|ваша\s+клініка\s+)?(?:знаходит|розташован)\w*"
+     r"|\bяк\s+(?:до\s+вас\s+)?(?:доїхати|дістатися|дійти)"),
+    ("hours", IntentEnum.CLINIC_INFO,
+     r"\bгодин\w*\s+роботи|\bрежим\w*\s+роботи|\bграфік\w*\s+роботи\s+клінік\w*"
+     r"|\bдо\s+котрої\b|\bпрацюєте\s+(?:в|у)\s+(?:суботу|неділю|вихідн\w*)"),
+    ("phone", IntentEnum.CLINIC_INFO,
+     r"\bномер\w*\s+телефон\w*|\bтелефон\w*\s+реєстратур\w*"),
+    ("doctor_schedule", IntentEnum.DOCTOR_SCHEDULE,
+     r"\b(?:графік|розклад)\w*\s+(?:роботи\s+|прийому\s+)?"
+     r"(?:лікар|доктор|педіатр|терапевт|гінеколог|кардіолог|невролог)\w*"
+     r"|\bколи\s+приймає\b|\bчи\s+працює\s+(?:сьогодні\s+|завтра\s+)?(?:лікар|доктор)\w*"),
+    ("age", None,
+     r"\b\d{1,3}\s*(?:-?\s*)(?:рік|роки|років|року|міс\w*|тиж\w*)\b"),
+    ("symptom", None,
+     r"\b(?:болить|болять|біль|температур\w*|кашел\w*|кашля\w*|нежить|блюван\w*|нудот\w*"
+     r"|діаре\w*|пронос\w*|висип\w*|свербі\w*|задишк\w*|запаморочен\w*|слабкість)"),
+]
+
+_RULE_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, _, pattern in _RULES),
+    re.IGNORECASE,
+)
+_RULE_INTENT = {name: intent for name, intent, _ in _RULES}
+_RULE_INTENT["age_symptom"] = IntentEnum.DIAGNOSE
+
+def match_rules(text: str) -> Optional[Tuple[IntentEnum, List[str]]]:
+    """Single regex scan; returns (intent, rule names) when exactly one intent fires."""
+    hits = {m.lastgroup for m in _RULE_RE.finditer(text)}
+    if not hits:
+        return None
+    if {"age", "symptom"} <= hits:
+        hits = (hits - {"age", "symptom"}) | {"age_symptom"}
+    hits.discard("age")
+    hits.discard("symptom")
+    intents = {_RULE_INTENT[name] for name in hits}
+    if len(intents) != 1:
+        if len(intents) > 1:
+            logger.info(f"Intent rules conflict {sorted(hits)} for '{text}', falling through")
+        return None
+    return intents.pop(), sorted(hits)
+
+def _classify_rules(text: str) -> Optional[IntentResult]:
+    matched = match_rules(text)
+    if matched is None:
+        return None
+    intent, rules = matched
+    for rule in rules:
+        metrics.incr("intent_rule_hits_total", rule=rule)
+    logger.info(f"Intent rule hit {rules} → {intent.value} for '{text}'")
+    return IntentResult(intent, 1.0, "rule")
+
+# ─────────── Local classifier ────────────────────────────────────────────────
+_SOFTMAX_TEMPERATURE = 0.02         # e5 cosines are tightly packed; sharpen them
+
+class CentroidIntentClassifier:
+    """Nearest-centroid classifier over normalised sentence embeddings."""
+
+    def __init__(self, embed: Callable[[List[str]], np.ndarray]):
+        self._embed = embed
+        self._labels: List[IntentEnum] = []
+        self._centroids: Optional[np.ndarray] = None
+
+    def fit(self, samples: Sequence[Tuple[str, IntentEnum]]) -> "CentroidIntentClassifier":
+        vecs = self._embed([text for text, _ in samples])
+        targets = np.array([intent.value for _, intent in samples])
+        self._labels = [intent for intent in IntentEnum if (targets == intent.value).any()]
+        centroids = []
+        for intent in self._labels:
+            centroid = vecs[targets == intent.value].mean(axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+        self._centroids = np.stack(centroids).astype("float32")
+        return self
+
+    def predict(self, text: str) -> Tuple[IntentEnum, float, float]:
+        """Return (intent, confidence, margin between the two closest centroids)."""
+        sims = self._centroids @ self._embed([text])[0]
+        order = np.argsort(sims)[::-1]
+        margin = float(sims[order[0]] - sims[order[1]]) if len(order) > 1 else 1.0
+        probs = np.exp((sims - sims.max()) / _SOFTMAX_TEMPERATURE)
+        probs /= probs.sum()
+        return self._labels[order[0]], float(probs[order[0]]), margin
+
+def _load_logged_examples(path: str) -> List[Tuple[str, IntentEnum]]:
+    """LLM-labelled rows of the intent log (ts, text, intent, confidence, path)."""
+    log_file = Path(path)
+    if not log_file.exists():
+        return []
+    samples = []
+    with log_file.open(newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 5 and row[4] == "llm" and row[1].strip():
+                try:
+                    samples.append((row[1], IntentEnum(row[2])))
+                except ValueError:
+                    continue
+    return samples
+
+def _log_intent(text: str, result: IntentResult) -> None:
+    """Append the decision to the intent log (training data + audit), if enabled."""
+    if not settings.intent_log_enabled:
+        return
+    try:
+        log_file = Path(settings.intent_log_path)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with log_file.open("a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow([
+                datetime.now().isoformat(),
+                text[:500],
+                result.intent.value,
+                "" if result.confidence is None else f"{result.confidence:.3f}",
+                result.path,
+            ])
+    except Exception as e:
+        logger.warning(f"Failed to log intent: {e}")
+
+_local: Optional[CentroidIntentClassifier] = None
+_local_unavailable = False
+_local_lock = threading.Lock()
+
+def _get_local_classifier() -> Optional[CentroidIntentClassifier]:
+    """Train the local classifier on first use; None if embeddings are unavailable."""
+    global _local, _local_unavailable
+    if _local is not None or _local_unavailable or not settings.intent_local_enabled:
+        return _local
+    with _local_lock:
+        if _local is None and not _local_unavailable:
+            try:
+                from src.models.embeddings import embed_queries
+                samples = _EXAMPLES + _load_logged_examples(settings.intent_log_path)
+                _local = CentroidIntentClassifier(embed_queries).fit(samples)
+                logger.info(f"Local intent classifier trained on {len(samples)} examples")
+            except Exception as e:
+                _local_unavailable = True
+                logger.warning(f"Local intent classifier unavailable, using LLM only: {e}")
+    return _local
+
+def reload_local_classifier() -> None:
+    """Retrain from the examples and the current intent log."""
+    global _local, _local_unavailable
+    with _local_lock:
+        _local, _local_unavailable = None, False
+    _get_local_classifier()
+
+def _classify_local(text: str) -> Optional[IntentResult]:
+    """Local decision, or None when the margin is too small to trust."""
+    classifier = _get_local_classifier()
+    if classifier is None or not text.strip():
+        return None
+    intent, confidence, margin = classifier.predict(text)
+    if margin < settings.intent_local_margin:
+        logger.info(f"Local intent margin {margin:.3f} < {settings.intent_local_margin} "
+                    f"(best={intent.value}), asking LLM")
+        return None
+    return IntentResult(intent, confidence, "local")
+
+def record_intent(text: str, result: IntentResult) -> IntentResult:
+    """Count and log a final intent decision."""
+    metrics.incr("intent_path_total", path=result.path, intent=result.intent.value)
+    _log_intent(text, result)
+    return result
+
+async def aclassify_local(text: str) -> Optional[IntentResult]:
+    """Rules, then the local classifier; None when only the LLM can decide."""
+    return _classify_rules(text) or await asyncio.to_thread(_classify_local, text)
+
 # ─────────── Public helper ───────────────────────────────────────────────────
-def classify_intent(text: str) -> IntentEnum:               # noqa: D401
-    """Return `IntentEnum` for the user message."""
+def _parse_intent(raw: str) -> IntentEnum:
+    raw = raw.strip().lower()
+    logger.debug(f"Raw LLM intent label: '{raw}'")   # never the patient's text
+    return IntentEnum(raw)                 # type: ignore[arg-type]
+
+def classify(text: str) -> IntentResult:
+    """Rules, then the local classifier, then the few-shot LLM below the margin."""
+    local = _classify_rules(text) or _classify_local(text)
+    if local is not None:
+        return record_intent(text, local)
     try:
         # BREAKPOINT: Set a breakpoint here to debug the classification
-        response = _chain.invoke({"text": text})
+        response = llm_client.invoke(_chain, {"text": text}, call_site="intent")
         # Extract content from AIMessage object
-        raw: str = response.content.strip().lower()
-        print(f"DEBUG: Raw LLM response for '{text}': '{raw}'")
-        return IntentEnum(raw)             # type: ignore[arg-type]
+        return record_intent(text, IntentResult(_parse_intent(response.content), None, "llm"))
     except Exception as e:
-        # Log the error for debugging
-        print(f"Intent classification error: {e}")
+        logger.warning(f"Intent classification error: {e}")
         # Fallback – be safe and treat as medical question
-        return IntentEnum.DIAGNOSE
\ No newline at end of file
+        return record_intent(text, IntentResult(IntentEnum.DIAGNOSE, None, "fallback"))
+
+async def aclassify(text: str) -> IntentResult:
+    """Async `classify`; the LLM call runs under the shared limiter / deadline / retry policy."""
+    local = await aclassify_local(text)
+    if local is not None:
+        return record_intent(text, local)
+    try:
+        response = await llm_client.ainvoke(_chain, {"text": text}, call_site="intent")
+        return record_intent(text, IntentResult(_parse_intent(response.content), None, "llm"))
+    except HTTPException:
+        # overload (503) and exhausted time budget (504) must reach the client
+        raise
+    except Exception as e:
+        logger.warning(f"Intent classification error: {e}")
+        return record_intent(text, IntentResult(IntentEnum.DIAGNOSE, None, "fallback"))
+
+def classify_intent(text: str) -> IntentEnum:               # noqa: D401
+    """Return `IntentEnum` for the user message."""
+    return classify(text).intent
+
+async def aclassify_intent(text: str) -> IntentEnum:
+    """Async `classify_intent`."""
+    return (await aclassify(text)).intent
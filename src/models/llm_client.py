@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+"""src/models/llm_client.py
+
+Shared LLM client policy for every `ChatOpenAI` call site:
+• **make_chat_model(call_site, temperature)** — model factory with the call site's timeout, no hidden SDK retries
+• **ainvoke(runnable, inputs, call_site=...)** — limiter slot + per-call-site deadline,
+  exponential backoff with full jitter and optional hedging
+• **time_budget(seconds)** — overall deadline shared by all calls of one request
+
+Hedging: for call sites listed in `LLM_HEDGE_CALL_SITES`, a duplicate request is
+sent once the first one is slower than the observed p95 latency; the first
+successful answer wins and the other request is cancelled.  A hedge only fires
+if a limiter slot is free right away, so it never adds to queueing under load.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+import openai
+from fastapi import HTTPException, status
+from langchain_openai import ChatOpenAI
+
+from src.config import settings
+from src.models.llm_limiter import get_limiter, llm_slot
+from src.utils import metrics, timing
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Model factory
+# ─────────────────────────────────────────────────────────────────────────────
+
+def call_site_deadline(call_site: str) -> float:
+    return settings.llm_call_deadlines_s.get(call_site, settings.llm_default_deadline_s)
+
+def make_chat_model(call_site: str, temperature: float, model: Optional[str] = None, **kwargs) -> ChatOpenAI:
+    """Create a `ChatOpenAI` whose HTTP timeout matches the call site's deadline."""
+    params = dict(
+        model=model or settings.openai_model,
+        temperature=temperature,
+        api_key=settings.openai_api_key,
+        timeout=call_site_deadline(call_site),
+        max_retries=0,                      # retries are handled by this module
+    )
+    if settings.openai_base_url:
+        params["base_url"] = settings.openai_base_url
+    params.update(kwargs)
+    return ChatOpenAI(**params)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Request time budget
+# ─────────────────────────────────────────────────────────────────────────────
+
+_budget_deadline: ContextVar[Optional[float]] = ContextVar("llm_budget_deadline", default=None)
+
+class LLMBudgetExceededError(HTTPException):
+    """The request ran out of its overall LLM time budget."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Не вдалося підготувати відповідь вчасно. Спробуйте ще раз.",
+        )
+
+@contextmanager
+def time_budget(seconds: float) -> Iterator[None]:
+    """Limit the total time all LLM calls inside the block may take."""
+    token = _budget_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _budget_deadline.reset(token)
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current request budget, or None if unbounded."""
+    deadline = _budget_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def _budget_exceeded(call_site: str) -> LLMBudgetExceededError:
+    metrics.incr("llm_budget_exceeded_total", call_site=call_site)
+    return LLMBudgetExceededError()
+
+def _call_timeout(call_site: str) -> float:
+    timeout = call_site_deadline(call_site)
+    left = remaining_budget()
+    if left is not None:
+        if left <= 0:
+            raise _budget_exceeded(call_site)
+        timeout = min(timeout, left)
+    return timeout
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Retry policy
+# ─────────────────────────────────────────────────────────────────────────────
+
+_RETRYABLE = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+def _is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, _RETRYABLE)
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    cap = min(settings.llm_backoff_max_s, settings.llm_backoff_base_s * (2 ** attempt))
+    return random.uniform(0, cap)
+
+def _should_retry(exc: BaseException, attempt: int, call_site: str) -> Optional[float]:
+    """Return the sleep before the next attempt, or None to give up."""
+    if not _is_retryable(exc) or attempt >= settings.llm_max_retries:
+        return None
+    delay = _backoff(attempt)
+    left = remaining_budget()
+    if left is not None and left <= delay:
+        return None
+    metrics.incr("llm_retries_total", call_site=call_site, reason=type(exc).__name__)
+    logger.warning(f"LLM call '{call_site}' failed ({type(exc).__name__}), "
+                   f"retry {attempt + 1}/{settings.llm_max_retries} in {delay:.2f}s")
+    return delay
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Hedging
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _hedge_delay(call_site: str) -> Optional[float]:
+    if call_site not in settings.llm_hedge_call_sites:
+        return None
+    if metrics.count("llm_call_seconds", call_site=call_site) < settings.llm_hedge_min_samples:
+        return None
+    return metrics.percentile("llm_call_seconds", 0.95, call_site=call_site)
+
+async def _run_hedged(runnable, inputs, call_site: str, provider: str):
+    delay = _hedge_delay(call_site)
+    primary = asyncio.ensure_future(runnable.ainvoke(inputs))
+    hedge = None
+    try:
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        limiter = get_limiter(provider)
+        if not limiter.try_acquire():
+            metrics.incr("llm_hedges_skipped_total", call_site=call_site)
+            return await primary
+        try:
+            metrics.incr("llm_hedges_total", call_site=call_site)
+            hedge = asyncio.ensure_future(runnable.ainvoke(inputs))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.incr("llm_hedge_wins_total", call_site=call_site)
+                        return task.result()
+            return primary.result()                 # both failed: surface the primary error
+        finally:
+            limiter.release()
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Token usage (incl. provider prompt-prefix cache hits)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _record_usage(call_site: str, result: Any) -> None:
+    """Log prompt / cached / completion tokens reported by the API."""
+    usage = getattr(result, "usage_metadata", None)
+    if not usage:
+        return
+    prompt_tokens = usage.get("input_tokens", 0)
+    completion_tokens = usage.get("output_tokens", 0)
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+    metrics.incr("llm_prompt_tokens_total", prompt_tokens, call_site=call_site)
+    metrics.incr("llm_cached_prompt_tokens_total", cached_tokens, call_site=call_site)
+    metrics.incr("llm_completion_tokens_total", completion_tokens, call_site=call_site)
+    if prompt_tokens:
+        metrics.observe("llm_prompt_cache_ratio", cached_tokens / prompt_tokens, call_site=call_site)
+    logger.info(f"LLM usage [{call_site}]: prompt={prompt_tokens} cached={cached_tokens} "
+                f"completion={completion_tokens}")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Public API
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def ainvoke(runnable, inputs: Any, *, call_site: str, provider: str = "openai"):
+    """Invoke a LangChain runnable under the shared deadline / retry / hedging policy."""
+    with timing.stage(f"llm_{call_site}"):      # limiter wait + retries included
+        attempt = 0
+        while True:
+            timeout = _call_timeout(call_site)
+            try:
+                async with llm_slot(provider):
+                    started = time.perf_counter()
+                    result = await asyncio.wait_for(
+                        _run_hedged(runnable, inputs, call_site, provider), timeout)
+                metrics.observe("llm_call_seconds", time.perf_counter() - started, call_site=call_site)
+                _record_usage(call_site, result)
+                return result
+            except Exception as exc:
+                left = remaining_budget()
+                if isinstance(exc, asyncio.TimeoutError) and left is not None and left <= 0:
+                    raise _budget_exceeded(call_site) from exc     # the budget, not the call site, cut it short
+                delay = _should_retry(exc, attempt, call_site)
+                if delay is None:
+                    metrics.incr("llm_failures_total", call_site=call_site, reason=type(exc).__name__)
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+def invoke(runnable, inputs: Any, *, call_site: str):
+    """Blocking variant for scripts and Streamlit (deadline + retries, no limiter/hedging)."""
+    with timing.stage(f"llm_{call_site}"):      # retries included
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                result = runnable.invoke(inputs)
+                metrics.observe("llm_call_seconds", time.perf_counter() - started, call_site=call_site)
+                _record_usage(call_site, result)
+                return result
+            except Exception as exc:
+                delay = _should_retry(exc, attempt, call_site)
+                if delay is None:
+                    metrics.incr("llm_failures_total", call_site=call_site, reason=type(exc).__name__)
+                    raise
+                attempt += 1
+                time.sleep(delay)
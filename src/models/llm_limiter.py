@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""src/models/llm_limiter.py
+
+Admission control for outbound LLM calls.
+
+Each provider gets a `ConcurrencyLimiter` that allows at most
+`max_concurrency` calls in flight.  Extra callers wait in a bounded,
+priority-ordered queue (doctor-facing traffic first, then patients).
+When the queue is full, or a caller waits longer than `queue_timeout`,
+`LLMOverloadedError` is raised – an HTTP 503 with `Retry-After`.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Priorities
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+    DOCTOR  = 0
+    PATIENT = 1
+
+_current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.PATIENT)
+
+async def doctor_priority() -> None:
+    """FastAPI dependency: LLM calls made by this request jump the patient queue.
+
+    Must be an async dependency: sync ones run in a worker thread, and the
+    priority set there would not reach the endpoint.
+    """
+    _current_priority.set(Priority.DOCTOR)
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Errors
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LLMOverloadedError(HTTPException):
+    """Raised when the LLM wait queue is full or the wait took too long."""
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервіс тимчасово перевантажений. Спробуйте ще раз трохи пізніше.",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.provider = provider
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Limiter
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ConcurrencyLimiter:
+    """Priority-aware semaphore with a bounded wait queue."""
+
+    def __init__(
+        self,
+        provider: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._active = 0
+        self._queued = 0
+        self._waiters: List[tuple] = []        # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _publish_gauges(self) -> None:
+        metrics.set_gauge("llm_inflight", self._active, provider=self.provider)
+        metrics.set_gauge("llm_queue_depth", self._queued, provider=self.provider)
+
+    def _reject(self, reason: str, priority: Priority) -> LLMOverloadedError:
+        metrics.incr("llm_rejected_total", provider=self.provider, reason=reason,
+                     priority=priority.name.lower())
+        logger.warning(f"LLM admission rejected ({self.provider}, {reason}): "
+                       f"inflight={self._active}, queued={self._queued}")
+        return LLMOverloadedError(self.provider, self.retry_after)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now (never queues)."""
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._publish_gauges()
+            return True
+        return False
+
+    async def acquire(self, priority: Optional[Priority] = None) -> None:
+        priority = current_priority() if priority is None else priority
+        if self.try_acquire():
+            metrics.observe("llm_queue_seconds", 0.0, provider=self.provider, priority=priority.name.lower())
+            return
+
+        if self._queued >= self.max_queue:
+            raise self._reject("queue_full", priority)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        self._queued += 1
+        self._publish_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up – pass it on.
+                self.release()
+            else:
+                future.cancel()
+                self._queued -= 1
+                self._publish_gauges()
+            if isinstance(exc, asyncio.TimeoutError):
+                raise self._reject("queue_timeout", priority) from None
+            raise
+        finally:
+            metrics.observe("llm_queue_seconds", time.perf_counter() - started,
+                            provider=self.provider, priority=priority.name.lower())
+
+    def release(self) -> None:
+        # Hand the slot directly to the highest-priority live waiter
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._queued -= 1
+            future.set_result(None)
+            self._publish_gauges()
+            return
+        self._active -= 1
+        self._publish_gauges()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registry
+# ─────────────────────────────────────────────────────────────────────────────
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+def get_limiter(provider: str = "openai") -> ConcurrencyLimiter:
+    """Return the process-wide limiter for a provider."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = ConcurrencyLimiter(
+            provider=provider,
+            max_concurrency=settings.llm_provider_concurrency.get(
+                provider, settings.llm_max_concurrency),
+            max_queue=settings.llm_max_queue,
+            queue_timeout=settings.llm_queue_timeout_s,
+            retry_after=settings.llm_retry_after_s,
+        )
+        _limiters[provider] = limiter
+    return limiter
+
+def llm_slot(provider: str = "openai", priority: Optional[Priority] = None):
+    """`async with llm_slot(): ...` around every outbound LLM request."""
+    return get_limiter(provider).slot(priority)
+
+def get_limiter_stats() -> Dict[str, Dict[str, int]]:
+    """Current in-flight / queued counts per provider."""
+    return {
+        name: {
+            "inflight": limiter.active,
+            "queued": limiter.queued,
+            "max_concurrency": limiter.max_concurrency,
+            "max_queue": limiter.max_queue,
+        }
+        for name, limiter in _limiters.items()
+    }
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""src/models/model_router.py
+
+Pick the diagnosis model tier from cheap local signals:
+• number of distinct symptoms in the request
+• retrieval score spread (ambiguous or weak protocol matches)
+• patient age extremes (infants, elderly)
+• red-flag keywords (always routed to the strong model)
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional, Sequence
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ModelTier(str, Enum):
+    FAST   = "fast"
+    STRONG = "strong"
+
+@dataclass
+class RouteDecision:
+    tier: ModelTier
+    model: str
+    temperature: float
+    score: int
+    reasons: List[str] = field(default_factory=list)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Signals
+# ─────────────────────────────────────────────────────────────────────────────
+
+RED_FLAG_KEYWORDS = (
+    "біль у грудях", "біль в грудях", "задишк", "задуха", "не може дихати",
+    "втрата свідомості", "непритомн", "судом", "кров", "параліч", "оніміння",
+    "сплутаність", "висип не зникає", "ригідність", "синюшн", "зневоднен",
+    "не мочиться", "найсильніший головний біль", "вагітн",
+)
+
+_SYMPTOM_SPLIT = re.compile(r"[,;.\n]+|\s+(?:і|й|та|а також)\s+")
+
+def count_symptoms(symptoms: str) -> int:
+    """Rough number of distinct complaints in free text."""
+    return len([part for part in _SYMPTOM_SPLIT.split(symptoms.lower()) if len(part.strip()) > 2])
+
+def find_red_flags(symptoms: str) -> List[str]:
+    text = symptoms.lower()
+    return [keyword for keyword in RED_FLAG_KEYWORDS if keyword in text]
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Router
+# ─────────────────────────────────────────────────────────────────────────────
+
+def route_diagnosis(symptoms: str, age: Optional[int], retrieval_scores: Sequence[float]) -> RouteDecision:
+    """Return the tier to use for this diagnosis and why."""
+    reasons: List[str] = []
+    score = 0
+
+    flags = find_red_flags(symptoms)
+    if flags:
+        reasons.append(f"red_flags={','.join(flags)}")
+        score += settings.router_strong_score
+
+    n_symptoms = count_symptoms(symptoms)
+    if n_symptoms >= settings.router_symptom_count:
+        reasons.append(f"symptoms={n_symptoms}")
+        score += 1
+
+    if age is not None and (age <= settings.router_child_age or age >= settings.router_elderly_age):
+        reasons.append(f"age={age}")
+        score += 1
+
+    scores = sorted(retrieval_scores, reverse=True)
+    if scores:
+        if scores[0] < settings.router_min_top_score:
+            reasons.append(f"weak_retrieval={scores[0]:.3f}")
+            score += 1
+        elif len(scores) > 1 and scores[0] - scores[1] < settings.router_min_score_gap:
+            reasons.append(f"ambiguous_retrieval={scores[0] - scores[1]:.3f}")
+            score += 1
+
+    if settings.model_router_enabled and score >= settings.router_strong_score:
+        decision = RouteDecision(ModelTier.STRONG, settings.openai_model_strong,
+                                 settings.router_strong_temperature, score, reasons)
+    else:
+        decision = RouteDecision(ModelTier.FAST, settings.openai_model_fast or settings.openai_model,
+                                 settings.router_fast_temperature, score, reasons)
+
+    logger.info(f"Model route: tier={decision.tier.value} model={decision.model} "
+                f"score={score} reasons={reasons or ['simple']}")
+    return decision
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+"""src/models/patient_extractor.py
+
+Joint extraction of intent + patient slots from one assistant message:
+• intent      (rules / local classifier, see `intent_classifier`)
+• gender      ('m' / 'f')
+• age         (years; "дитині 5 міс." → 0 with age_months=5, "синові 7" → 7)
+• symptoms    (the message without the demographic phrases)
+
+Everything is first done locally with one compiled regex scan. A single
+combined JSON LLM call is made only when the intent is undecided, or when
+a diagnose message is missing slots but hints that it contains them in a
+form the regex does not cover (spelled-out numbers, other relatives).
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from src.models import llm_client
+from src.models.intent_classifier import IntentEnum, IntentResult, aclassify_local, record_intent
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PatientSlots:
+    gender: Optional[str] = None
+    age: Optional[int] = None
+    age_months: Optional[int] = None
+    symptoms: str = ""
+    intent: Optional[IntentResult] = None
+    path: str = "local"                     # "local" | "llm"
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Local extraction (one regex scan)
+# ─────────────────────────────────────────────────────────────────────────────
+
+_POSSESSIVE = r"(?:мо(?:єму|їй|ій|я|єї|го)\s+)?"
+_RELATIVE = (r"синові|сину|синок|синочку|доньці|донці|дочці|донечці|донька|дочка|"
+             r"онукові|онуку|онуці|онучці|дитині|дитина|малюку|малюкові|малюк")
+_FEMALE = (r"жінка|жінці|жінки|жіноча|жіноч\w*|дівчина|дівчині|дівчинка|дівчинці|донька|доньці|"
+           r"дочка|дочці|донечка|донечці|онука|онуці|онучці|мама|мамі|бабуся|бабусі|дружина|дружині|"
+           r"вагітна|female|woman|girl")
+_MALE = (r"чоловік|чоловіку|чоловікові|чоловіча|чоловіч\w*|хлопець|хлопцю|хлопчик|хлопчику|"
+         r"син|сина|сину|синові|синок|синочку|онук|онукові|онуку|тато|татові|дідусь|дідусеві|"
+         r"male|man|boy")
+
+_SLOT_RE = re.compile(
+    r"(?<!\w)(?:"
+    rf"(?P<relative>{_POSSESSIVE}(?:{_RELATIVE}))\s*,?\s*(?P<relative_age>\d{{1,2}})"
+    r"(?!\s*(?:міс|рік|рок|year|month|тиж|°|град|[.,]\d|\d))"
+    r"|(?P<age_months>\d{1,2})\s*-?\s*(?:міс\w*|month\w*)\.?"
+    r"|(?P<age_years>\d{1,3})\s*-?\s*(?:рік|рок\w*|year\w*|р\.)"
+    r"|(?:вік|age)\s*:?\s*(?P<age_label>\d{1,3})"
+    rf"|(?P<female>{_POSSESSIVE}(?:{_FEMALE}))"
+    rf"|(?P<male>{_POSSESSIVE}(?:{_MALE}))"
+    r"|(?P<subject>(?:у\s+)?(?:дитині|дитина|дитини|малюка|немовляти|немовля)|мені)"
+    r"|(?P<bare_number>\d{1,3})(?![.,]?\d|\s*(?:°|град))"
+    r")(?!\w)",
+    re.IGNORECASE,
+)
+
+_RELATIVE_GENDER = (("син", "m"), ("онук", "m"), ("малюк", "m"),
+                    ("дон", "f"), ("доч", "f"), ("онуц", "f"), ("онучц", "f"))
+
+# Diagnose messages that probably carry slots the regex cannot read
+_SLOT_HINT_RE = re.compile(
+    r"(?<!\w)(?:\w+надцять|двадцят\w*|тридцят\w*|сорок\w*|п'ятдесят\w*|шістдесят\w*|"
+    r"сімдесят\w*|вісімдесят\w*|немовл\w*|новонароджен\w*|підліт\w*|пенсіонер\w*|"
+    r"батьк\w*|брат\w*|сестр\w*|тещ\w*|свекр\w*)(?!\w)",
+    re.IGNORECASE,
+)
+
+def _relative_gender(word: str) -> Optional[str]:
+    word = word.lower().split()[-1]
+    for stem, gender in _RELATIVE_GENDER:
+        if word.startswith(stem):
+            return None if stem == "малюк" else gender
+    return None
+
+def _clean_symptoms(text: str, spans: list[tuple[int, int]]) -> str:
+    """Cut the demographic phrases out and tidy up the punctuation left behind."""
+    for start, end in sorted(spans, reverse=True):
+        text = text[:start] + text[end:]
+    text = re.sub(r"\s*([,;])(?:\s*[,;])+", r"\1", text)
+    text = re.sub(r"\s{2,}", " ", text)
+    return text.strip(" ,.;:-—\n\t")
+
+_CHILD_MAX_AGE = 17
+
+def extract_slots(text: str, expect_age: bool = False) -> PatientSlots:
+    """Gender, age and cleaned symptoms from one regex scan (no intent).
+
+    `expect_age` also reads a bare number ("30") as the age — used when the
+    message answers our own question about the patient's age.
+    """
+    slots = PatientSlots()
+    spans: list[tuple[int, int]] = []
+    for match in _SLOT_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "relative_age":
+            relative = match.group("relative")
+            age = int(match.group("relative_age"))
+            gender = _relative_gender(relative)
+            slots.gender = slots.gender or gender
+            if gender is None and age > _CHILD_MAX_AGE:
+                continue                    # "дитині 39" is a temperature, not an age
+            slots.age = slots.age if slots.age is not None else age
+        elif kind == "age_months":
+            if slots.age is None:
+                slots.age_months = int(match.group("age_months"))
+                slots.age = slots.age_months // 12
+        elif kind in ("age_years", "age_label"):
+            if slots.age is None:
+                slots.age = int(match.group(kind))
+        elif kind in ("female", "male"):
+            slots.gender = slots.gender or ("f" if kind == "female" else "m")
+        elif kind == "bare_number":
+            if not expect_age or slots.age is not None:
+                continue
+            slots.age = int(match.group("bare_number"))
+        spans.append(match.span())
+
+    slots.symptoms = _clean_symptoms(text, spans) or text.strip()
+    if slots.age_months is not None and slots.age_months < 24:
+        # keep the infant's age in months visible to retrieval and the model
+        slots.symptoms = f"Дитина {slots.age_months} міс.: {slots.symptoms}"
+    return slots
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Combined LLM call (intent + slots in one JSON answer)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _JointAnswer(BaseModel):
+    intent: IntentEnum
+    gender: Optional[str] = None
+    age_years: Optional[int] = None
+    age_months: Optional[int] = None
+    symptoms: str = ""
+
+_JOINT_SYSTEM_PREFIX = """You read one Ukrainian message sent to a family-medicine clinic assistant.
+Return ONLY a JSON object with the fields:
+- "intent": "clinic_info" (address, opening hours, phone, prices, services),
+  "doctor_schedule" (which doctors work here, a doctor's schedule), or
+  "diagnose" (symptoms or a health problem, own or a relative's);
+- "gender": "m" or "f" of the patient (the person with the symptoms), or null;
+- "age_years": the patient's age in full years, or null;
+- "age_months": the age in months if it was given in months, otherwise null;
+- "symptoms": the complaint in the patient's words without age / gender
+  phrases, or "" if there is none.
+Do not guess values that are not stated or clearly implied."""
+
+_JOINT_PROMPT = ChatPromptTemplate.from_messages(
+    [("system", _JOINT_SYSTEM_PREFIX), ("user", "{text}")]
+)
+
+_joint_chain = _JOINT_PROMPT | llm_client.make_chat_model("extract", temperature=0.0).bind(
+    response_format={"type": "json_object"}
+)
+
+def _merge(slots: PatientSlots, answer: _JointAnswer) -> PatientSlots:
+    """Locally found values are exact; the model only fills the gaps."""
+    if slots.gender is None and answer.gender in ("m", "f"):
+        slots.gender = answer.gender
+    if slots.age is None:
+        if answer.age_years is not None:
+            slots.age = answer.age_years
+        elif answer.age_months is not None:
+            slots.age_months = answer.age_months
+            slots.age = answer.age_months // 12
+    if answer.symptoms.strip():
+        slots.symptoms = answer.symptoms.strip()
+    return slots
+
+def _needs_llm(intent: Optional[IntentResult], slots: PatientSlots, text: str) -> bool:
+    if intent is None:
+        return True
+    if intent.intent != IntentEnum.DIAGNOSE or (slots.gender and slots.age is not None):
+        return False
+    return bool(_SLOT_HINT_RE.search(text))
+
+async def aextract(text: str) -> PatientSlots:
+    """Intent + patient slots; at most one LLM call."""
+    slots = extract_slots(text)
+    intent = await aclassify_local(text)
+
+    if _needs_llm(intent, slots, text):
+        try:
+            response = await llm_client.ainvoke(_joint_chain, {"text": text}, call_site="extract")
+            answer = _JointAnswer.model_validate_json(response.content)
+            slots = _merge(slots, answer)
+            slots.path = "llm"
+            if intent is None:
+                intent = IntentResult(answer.intent, None, "llm")
+        except HTTPException:
+            # overload (503) and exhausted time budget (504) must reach the client
+            raise
+        except Exception as e:
+            logger.warning(f"Joint extraction failed, using local slots: {e}")
+            if intent is None:
+                intent = IntentResult(IntentEnum.DIAGNOSE, None, "fallback")
+
+    slots.intent = record_intent(text, intent)
+    metrics.incr("patient_extract_total", path=slots.path)
+    logger.info(f"Extracted intent={intent.intent.value} ({intent.path}) gender={slots.gender} "
+                f"age={slots.age} months={slots.age_months} via {slots.path}")
+    return slots
@@ -9,17 +9,28 @@ This module provides a unified interface for the entire RAG pipeline:
 """
 from __future__ import annotations
 
+import logging
 import os
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
-from langchain_openai import ChatOpenAI
 from langchain.schema import Document
 
 from src.config import settings
 from src.models.langchain_vector_store import search_documents
-from src.models.prompts import FAMILY_DOCTOR_PROMPT_TEMPLATE
+from src.models.prompts import (
+    FAMILY_DOCTOR_SYSTEM_PROMPT,
+    FAMILY_DOCTOR_JSON_SYSTEM_PROMPT,
+    FAMILY_DOCTOR_USER_TEMPLATE,
+)
+from src.models.diagnosis_schema import parse_structured_diagnosis, render_markdown
+from src.models.model_router import RouteDecision, route_diagnosis
+from src.utils import metrics, speculative, timing
+from src.models import llm_client
+
+logger = logging.getLogger(__name__)
 
 # ────────────────────────── LangSmith Setup ─────────────────────────────────
 # Explicitly set LangSmith environment variables if configured
@@ -30,14 +41,28 @@ if settings.langsmith_api_key:
     os.environ["LANGCHAIN_TRACING_V2"] = "true"
 
 # ────────────────────────── LLM Setup ──────────────────────────────────────
-llm = ChatOpenAI(
-    model=settings.openai_model,
-    temperature=0.2,
-    api_key=settings.openai_api_key
-)
+llm = llm_client.make_chat_model("diagnosis", temperature=0.2)
+
+# Per-tier models chosen by `model_router`, created on first use
+_routed_llms: Dict[Tuple[str, float], Any] = {}
+
+def _llm_for(decision: RouteDecision):
+    key = (decision.model, decision.temperature)
+    if key not in _routed_llms:
+        _routed_llms[key] = llm_client.make_chat_model(
+            "diagnosis", temperature=decision.temperature, model=decision.model)
+    return _routed_llms[key]
 
 # ────────────────────────── Prompt Template ────────────────────────────────
-prompt = ChatPromptTemplate.from_template(FAMILY_DOCTOR_PROMPT_TEMPLATE)
+# Static system prefix first, variable context + query last (provider prefix cache)
+prompt = ChatPromptTemplate.from_messages([
+    ("system", FAMILY_DOCTOR_SYSTEM_PROMPT),
+    ("human", FAMILY_DOCTOR_USER_TEMPLATE),
+])
+json_prompt = ChatPromptTemplate.from_messages([
+    ("system", FAMILY_DOCTOR_JSON_SYSTEM_PROMPT),
+    ("human", FAMILY_DOCTOR_USER_TEMPLATE),
+])
 
 # ────────────────────────── Helper Functions ────────────────────────────────
 def retrieve_documents(query: str, top_k: int = 3) -> List[Document]:
@@ -83,7 +108,7 @@ def generate_rag_response(query: str, top_k: int = 3) -> Dict[str, Any]:
     try:
         # LangChain will automatically trace if LangSmith is configured
         chain = create_rag_chain(top_k)
-        response = chain.invoke({"query": query})
+        response = llm_client.invoke(chain, {"query": query}, call_site="diagnosis")
         
         # Get retrieved documents for additional context
         documents = retrieve_documents(query, top_k)
@@ -95,7 +120,72 @@ def generate_rag_response(query: str, top_k: int = 3) -> Dict[str, Any]:
         }
             
     except Exception as e:
-        print(f"RAG chain error: {e}")
+        logger.warning(f"RAG chain error: {e}")
+        raise
+
+async def agenerate_rag_response(
+    query: str,
+    top_k: int = 3,
+    symptoms: Optional[str] = None,
+    age: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Async RAG pipeline for the API: retrieves once, LLM call under the shared policy.
+    
+    The model tier is picked by `model_router` from the symptoms, age and
+    retrieval scores.  In structured mode the result also carries
+    `structured` (a `StructuredDiagnosis`), so callers get the patient text
+    by field access.
+    """
+    import asyncio
+    
+    try:
+        # reuse retrieval started speculatively alongside intent classification
+        with timing.stage("retrieval"):
+            documents = await speculative.take("retrieval", (query, top_k))
+            if documents is speculative.MISSING:
+                documents = await asyncio.to_thread(retrieve_documents, query, top_k)
+        context = format_context(documents)
+        
+        route = route_diagnosis(
+            symptoms or query,
+            age,
+            [doc.metadata.get("similarity_score", 0.0) for doc in documents],
+        )
+        routed_llm = _llm_for(route)
+        started = time.perf_counter()
+        
+        structured = None
+        if settings.diagnosis_output_mode == "structured":
+            messages = json_prompt.format_messages(query=query, context=context)
+            json_llm = routed_llm.bind(response_format={"type": "json_object"})
+            message = await llm_client.ainvoke(json_llm, messages, call_site="diagnosis")
+            structured = parse_structured_diagnosis(message.content)
+            if structured is None:
+                metrics.incr("diagnosis_structured_fallback_total", tier=route.tier.value)
+                logger.warning("Structured diagnosis failed validation, regenerating as markdown")
+        
+        if structured is not None:
+            response = render_markdown(structured)
+        else:
+            messages = prompt.format_messages(query=query, context=context)
+            message = await llm_client.ainvoke(routed_llm, messages, call_site="diagnosis")
+            response = message.content
+        
+        elapsed = time.perf_counter() - started
+        metrics.incr("diagnosis_route_total", tier=route.tier.value)
+        metrics.observe("diagnosis_llm_seconds", elapsed, tier=route.tier.value)
+        logger.info(f"Diagnosis generated by {route.tier.value} tier ({route.model}) in {elapsed:.2f}s")
+        
+        return {
+            "response": response,
+            "structured": structured,
+            "route": route,
+            "documents": documents,
+            "query": query
+        }
+    
+    except Exception as e:
+        logger.warning(f"RAG chain error: {e}")
         raise
 
 # ───────────────────────── Module self-test ─────────────────────────────────
@@ -18,9 +18,16 @@ def extract_patient_response(full_diagnosis: str) -> str:
     """
     import re
     import logging
+    from src.models.diagnosis_schema import patient_section_from_markdown
     
     logger = logging.getLogger(__name__)
     
+    # Fast path: markdown rendered from a structured diagnosis has a fixed layout
+    patient_section = patient_section_from_markdown(full_diagnosis)
+    if patient_section:
+        return patient_section
+    
+    # Legacy answers (free-form markdown from before structured generation)
     # Look for the patient response section with multiple possible patterns
     patterns = [
         # Pattern 1: Standard format with emoji
@@ -0,0 +1,104 @@
+"""In-process metrics registry.
+
+Counters and latency observations are kept per worker process and exposed
+as a JSON snapshot via the `/metrics` endpoint of the API server.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Tuple
+
+# Keep the last N observations per series for percentile estimates
+_WINDOW = 500
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_observations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_WINDOW))
+_gauges: Dict[str, float] = {}
+
+
+def _series(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+def incr(name: str, value: float = 1.0, **labels) -> None:
+    """Increment a counter."""
+    key = _series(name, labels)
+    with _lock:
+        _counters[key] += value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record a single observation (e.g. latency in seconds)."""
+    key = _series(name, labels)
+    with _lock:
+        _observations[key].append(value)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    """Set a gauge to the current value."""
+    key = _series(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def percentile(name: str, q: float, **labels) -> float | None:
+    """Return the q-th percentile (0..1) of recent observations, or None."""
+    key = _series(name, labels)
+    with _lock:
+        values = sorted(_observations.get(key, ()))
+    if not values:
+        return None
+    idx = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[idx]
+
+
+def count(name: str, **labels) -> int:
+    """Number of recent observations kept for a series."""
+    key = _series(name, labels)
+    with _lock:
+        return len(_observations.get(key, ()))
+
+
+def counter(name: str, **labels) -> float:
+    """Current value of a counter (0 if never incremented)."""
+    key = _series(name, labels)
+    with _lock:
+        return _counters.get(key, 0.0)
+
+
+def _summarize(values: Tuple[float, ...]) -> Dict[str, float]:
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        "count": n,
+        "avg": sum(ordered) / n,
+        "p50": ordered[int(0.50 * (n - 1))],
+        "p95": ordered[int(0.95 * (n - 1))],
+        "max": ordered[-1],
+    }
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Return a JSON-serialisable view of all metrics."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        observations = {k: tuple(v) for k, v in _observations.items() if v}
+    return {
+        "counters": counters,
+        "gauges": gauges,
+        "observations": {k: _summarize(v) for k, v in observations.items()},
+    }
+
+
+def reset() -> None:
+    """Drop all recorded metrics (used by tests)."""
+    with _lock:
+        _counters.clear()
+        _observations.clear()
+        _gauges.clear()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""src/utils/speculative.py
+
+Request-scoped speculative work.
+
+A handler opens `scope()`, starts work it will *probably* need with
+`start(kind, key, coro)` and moves on. Code further down asks for the
+result with `await take(kind, key)`: a finished or running task is reused,
+anything else returns `MISSING` and the caller does the work itself.
+Whatever is not taken when the scope closes (or on `cancel_all()`) is
+cancelled.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Hashable, Iterator, Optional, Tuple
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+_Key = Tuple[str, Hashable]
+_tasks: ContextVar[Optional[Dict[_Key, asyncio.Task]]] = ContextVar("speculative_tasks", default=None)
+
+@contextmanager
+def scope() -> Iterator[None]:
+    """Own the speculative tasks started inside the block."""
+    token = _tasks.set({})
+    try:
+        yield
+    finally:
+        cancel_all(outcome="unused")
+        _tasks.reset(token)
+
+def start(kind: str, key: Hashable, work: Awaitable[Any]) -> None:
+    """Run `work` in the background for a later `take(kind, key)`."""
+    tasks = _tasks.get()
+    if tasks is None or (kind, key) in tasks:
+        if asyncio.iscoroutine(work):
+            work.close()                # not awaited on purpose
+        return
+    tasks[(kind, key)] = asyncio.ensure_future(work)
+    metrics.incr("speculative_total", kind=kind, outcome="started")
+
+async def take(kind: str, key: Hashable) -> Any:
+    """Result of the speculative task, or `MISSING` if there is none / it failed."""
+    tasks = _tasks.get()
+    task = tasks.pop((kind, key), None) if tasks else None
+    if task is None:
+        return MISSING
+    try:
+        result = await task
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            raise                       # the caller itself is being cancelled
+        return MISSING
+    except Exception as e:
+        logger.warning(f"Speculative {kind} failed, recomputing: {e}")
+        metrics.incr("speculative_total", kind=kind, outcome="failed")
+        return MISSING
+    metrics.incr("speculative_total", kind=kind, outcome="used")
+    return result
+
+def cancel_all(outcome: str = "cancelled") -> None:
+    """Cancel every pending speculative task of this request."""
+    tasks = _tasks.get()
+    if not tasks:
+        return
+    for (kind, _), task in tasks.items():
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()            # retrieve it so asyncio does not warn about it
+        metrics.incr("speculative_total", kind=kind, outcome=outcome)
+    tasks.clear()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""src/utils/symptom_key.py
+
+Canonical exact-cache key for a (gender, age, symptoms) request.
+
+`symptoms_key` hashes a canonical form of the symptoms, so that different
+phrasings of the same complaint share one cache entry:
+
+    "Кашель, температура 38°C"  ┐
+    "температура 38 і кашель"   ├─ same key
+    "kashel, temperatura 38"    ┘
+
+Canonicalisation (deterministic, no models):
+• lower case, Unicode NFKC, apostrophes dropped;
+• numbers normalised: "38,5" → "38.5", "38.0" → "38", units such as
+  "°C" / "градусів" removed;
+• Cyrillic transliterated to Latin, so Latin-typed input meets Cyrillic;
+• punctuation and stopwords removed;
+• light stemming: one common Ukrainian inflection ending stripped, then
+  the stem normalised (doubled final consonant and the fleeting /
+  alternating vowel of the last syllable dropped: "кашель" and "кашлю" →
+  `kashl`, "живіт" and "живота" → `zhyvt`);
+• negations bound to the word they apply to before sorting, so their scope
+  survives: "не" / "без" to the next word ("не зліва" → `ne_zlv`), a
+  trailing "ні" to the previous one ("праве ні" → `ni_prav`);
+• tokens de-duplicated and sorted.
+
+Gender is normalised ("m" / "чоловіча" → "male"); with SYMPTOM_KEY_AGE_BANDS
+the age is replaced by its semantic-cache age band.
+
+Keys carry a version prefix (`KEY_VERSION`). Changing the rules must bump it;
+approved answers stored under older keys are still found through
+`legacy_symptoms_hash` (the pre-canonical v1 hash).
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from hashlib import sha256
+from typing import List
+
+from src.cache.semantic_partitions import normalize_gender, partition_key
+from src.config import settings
+from src.utils.transliteration import transliterate_ukrainian
+
+KEY_VERSION = "v3"
+
+_STOPWORDS_UK = {
+    "і", "й", "та", "а", "але", "або", "в", "у", "з", "із", "зі", "на", "до", "від", "по", "при",
+    "для", "що", "як", "це", "є", "я", "мене", "мені", "мій", "моя", "моє", "мої", "ми", "нас",
+    "він", "вона", "його", "її", "їх", "вже", "ще", "також", "теж", "дуже", "трохи", "вчора",
+    "сьогодні", "зараз", "маю", "має",
+}
+# Negations kept as part of the token they apply to: prefix ones bind the next word, "ні" the previous
+_NEGATIONS_BEFORE = {"не", "без"}
+_NEGATIONS_AFTER = {"ні"}
+# Inflection endings; stemming runs on the transliterated token, so they are matched in Latin
+_ENDINGS_UK = {
+    "ами", "ями", "ого", "ому", "ими", "ої", "ою", "ею", "ів", "їв", "ах", "ях", "ам", "ям",
+    "ом", "ем", "ий", "ій", "их", "ім", "им", "ся", "а", "я", "у", "ю", "о", "е", "и", "і",
+}
+_VOWELS = "aeiouy"
+# Fleeting / alternating vowel of the last syllable: кашель ~ кашлю, живіт ~ живота, слабкість ~ слабкості
+_FLEETING_RE = re.compile(rf"(?<=[^{_VOWELS}])[eio](?=[^{_VOWELS}]{{1,2}}$)")
+
+_APOSTROPHES = dict.fromkeys(map(ord, "'’ʼ`"), None)
+_DECIMAL_RE = re.compile(r"(\d+)[.,](\d+)")
+_UNIT_RE = re.compile(r"(?<=\d)\s*(?:°\s*[cс]?|градус\w*|град\.?)(?!\w)")
+_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|\w+")
+
+def _latin(words):
+    return {transliterate_ukrainian(w).lower() for w in words}
+
+_STOPWORDS = _STOPWORDS_UK | _latin(_STOPWORDS_UK)
+_NEG_BEFORE = _latin(_NEGATIONS_BEFORE)
+_NEG_AFTER = _latin(_NEGATIONS_AFTER)
+# longest first; stripped only when ≥ 3 letters remain
+_ENDINGS = sorted(_latin(_ENDINGS_UK), key=len, reverse=True)
+
+def _number(token: str) -> str:
+    whole, _, frac = token.partition(".")
+    frac = frac.rstrip("0")
+    return f"{int(whole)}.{frac}" if frac else str(int(whole))
+
+def _stem(token: str) -> str:
+    """Strip one inflection ending, then normalise the stem so every case form of a word agrees."""
+    for ending in _ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= 3:
+            token = token[:-len(ending)]
+            break
+    if len(token) > 3 and token[-1] == token[-2]:
+        token = token[:-1]              # нежиттю → nezhytt → nezhyt
+    stem = _FLEETING_RE.sub("", token)
+    return stem if len(stem) >= 3 else token    # "біль" ≠ "білий": too short to tell apart
+
+def _bind_negations(words: List[str]) -> List[str]:
+    """Merge each negation into the word it negates ("ne", "zlv" → "ne_zlv")."""
+    bound: List[str] = []
+    pending = []                        # prefix negations waiting for their word
+    for word in words:
+        if word in _NEG_BEFORE:
+            pending.append(word)
+        elif word in _NEG_AFTER and bound and not pending:
+            bound[-1] = f"{word}_{bound[-1]}"
+        else:
+            bound.append("_".join(pending + [word]))
+            pending = []
+    return bound + pending              # a dangling negation stays a token of its own
+
+def canonical_tokens(symptoms: str) -> List[str]:
+    """Sorted, de-duplicated canonical tokens of a free-text symptom description."""
+    text = unicodedata.normalize("NFKC", symptoms).lower().translate(_APOSTROPHES)
+    text = _DECIMAL_RE.sub(r"\1.\2", text)
+    text = _UNIT_RE.sub(" ", text)
+    words = []
+    for token in _TOKEN_RE.findall(text):
+        if token[0].isdigit():
+            words.append(_number(token))
+            continue
+        token = transliterate_ukrainian(token).lower()
+        if token in _NEG_BEFORE or token in _NEG_AFTER:
+            words.append(token)
+        elif token not in _STOPWORDS:
+            words.append(_stem(token))
+    return sorted(set(_bind_negations(words)))
+
+def canonical_symptoms(symptoms: str) -> str:
+    return " ".join(canonical_tokens(symptoms))
+
+def symptoms_key(gender: str, age: int, symptoms: str) -> str:
+    """Versioned exact-cache key (`DoctorAnswer.symptoms_hash`) for a request."""
+    if settings.symptom_key_age_bands:
+        demographic = partition_key(gender, age)
+    else:
+        demographic = f"{normalize_gender(gender)}|{int(age)}"
+    raw = f"{demographic}|{canonical_symptoms(symptoms)}"
+    return f"{KEY_VERSION}_{sha256(raw.encode()).hexdigest()}"
+
+def legacy_symptoms_hash(gender: str, age: int, symptoms: str) -> str:
+    """v1 key (raw gender, age and lower-cased symptoms) of answers approved before `symptoms_key`."""
+    raw = f"{gender}|{age}|{symptoms.strip().lower()}"
+    return sha256(raw.encode()).hexdigest()
+
+def symptom_query(gender: str, age: int, symptoms: str) -> str:
+    """Retrieval / semantic-cache query ("Стать: …, Вік: …, Симптоми: …")."""
+    return f"Стать: {gender}, Вік: {age}, Симптоми: {symptoms}"
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""src/utils/timing.py
+
+Request-scoped stage timer.
+
+The API middleware opens a `RequestTimer` per request; code anywhere below
+it wraps work in `with stage("retrieval"):` and records outcomes with
+`mark("cache", "semantic")`. At the end the middleware emits a
+`Server-Timing` header and one structured log line.
+
+A stage opened inside another is recorded under a dotted name
+(`intent.llm_intent`), so a parent's time is never split into or added to
+its children: top-level stages (no dot) sum to at most the request total.
+
+Without an active timer (disabled, scripts, tests) `stage` and `mark` are a
+context-variable lookup and nothing else.
+"""
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}      # name → accumulated seconds
+        self.marks: Dict[str, str] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value (durations in ms, marks as descriptions)."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts += [f'{name};desc="{value}"' for name, value in self.marks.items()]
+        parts.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def log_line(self, **fields) -> str:
+        """One JSON object with the request fields, stage durations (ms) and marks."""
+        record = dict(fields)
+        record["total_ms"] = round(self.total() * 1000, 1)
+        record["stages_ms"] = {name: round(s * 1000, 1) for name, s in self.stages.items()}
+        record.update(self.marks)
+        return json.dumps(record, ensure_ascii=False)
+
+_current: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+_stage_path: ContextVar[Optional[str]] = ContextVar("timing_stage", default=None)
+
+def start_request() -> RequestTimer:
+    timer = RequestTimer()
+    _current.set(timer)
+    return timer
+
+def current() -> Optional[RequestTimer]:
+    return _current.get()
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Add the wall time of the block to stage `name` (`parent.name` when nested)."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    parent = _stage_path.get()
+    path = f"{parent}.{name}" if parent else name
+    token = _stage_path.set(path)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_path.reset(token)
+        timer.add(path, time.perf_counter() - started)
+
+def mark(name: str, value: str) -> None:
+    """Record an outcome (e.g. which cache tier answered) for the current request."""
+    timer = _current.get()
+    if timer is not None:
+        timer.marks[name] = value
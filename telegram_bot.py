@@ -18,8 +18,6 @@ from telegram.ext import (
     filters, ContextTypes
 )
 
-# Import conversation state management
-from src.api.router_assistant import _conversation_states
 from src.utils import extract_patient_response
 
 async def handle_edited_diagnosis(update: Update, context: ContextTypes.DEFAULT_TYPE, editing_state: dict, edited_text: str):
@@ -157,6 +155,22 @@ class APIClient:
             logger.error(f"Error calling API: {e}")
             return None
     
+    async def reset_conversation(self, user_id: str, chat_id: str) -> bool:
+        """Clear the assistant conversation state for this user/chat."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.delete(
+                    f"{self.base_url}/assistant/conversation/{user_id}/{chat_id}"
+                ) as response:
+                    if response.status == 200:
+                        return True
+                    error_text = await response.text()
+                    logger.error(f"API error: {response.status} - {error_text}")
+                    return False
+        except Exception as e:
+            logger.error(f"Error calling reset API: {e}")
+            return False
+    
     async def approve_diagnosis(self, request_id: str, doctor_id: int) -> Optional[dict]:
         """Approve a diagnosis via the doctor review endpoint."""
         try:
@@ -285,10 +299,8 @@ async def reset_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
     
-    # Clear conversation state
-    key = f"{user_id}:{chat_id}"
-    if key in _conversation_states:
-        del _conversation_states[key]
+    # Clear conversation state (kept by the API in its session store)
+    await api_client.reset_conversation(str(user_id), str(chat_id))
     
     await update.message.reply_text("🔄 Розмову скинуто. Можете почати заново!")
 
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Tests for the in-process L1 answer cache in front of Redis."""
+import asyncio
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.cache import events, redis_cache
+from src.utils import metrics
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    """Dict standing in for the Redis diagnosis records; records every read."""
+    store, gets = {}, []
+
+    async def read_field(key, field, legacy_key):
+        gets.append(key)
+        return store.get(key)
+
+    monkeypatch.setattr(redis_cache, "_read_field", read_field)
+    redis_cache._l1.clear()
+    metrics.reset()
+    yield store, gets
+    redis_cache._l1.clear()
+
+
+def test_hot_answers_are_served_without_redis(remote):
+    store, gets = remote
+    store["h1"] = "answer"
+    assert asyncio.run(redis_cache.get_md("h1")) == "answer"
+    assert asyncio.run(redis_cache.get_md("h1")) == "answer"
+    assert asyncio.run(redis_cache.get_md("missing")) is None
+    assert gets == ["h1", "missing"]
+
+    stats = redis_cache.answer_cache_stats()
+    assert stats["l1"] == {"lookups": 3, "hits": 1, "hit_ratio": pytest.approx(1 / 3)}
+    assert stats["redis"] == {"lookups": 2, "hits": 1, "hit_ratio": 0.5}
+    assert stats["overall"]["hit_ratio"] == pytest.approx(2 / 3)
+
+
+def test_invalidation_events_drop_answers(remote):
+    store, gets = remote
+    store.update(h1="draft", h2="other")
+    asyncio.run(redis_cache.get_md("h1"))
+    asyncio.run(redis_cache.get_md("h2"))
+    store["h1"] = "approved"                     # another worker approved an edit
+
+    redis_cache._apply_answer_event(events.Event(redis_cache.ANSWER_CHANNEL, 1, "invalidate", {"keys": ["h1"]}))
+    assert asyncio.run(redis_cache.get_md("h1")) == "approved"
+    assert gets[-1] == "h1"
+    asyncio.run(redis_cache.get_md("h2"))
+    assert gets.count("h2") == 1                  # untouched entries stay hot
+
+    redis_cache.answer_subscriber().resync()       # missed events → drop everything
+    assert len(redis_cache._l1) == 0
+
+
+def test_invalidate_md_publishes_to_other_workers(remote, monkeypatch):
+    published = []
+
+    async def publish(channel, event_type, payload=None):
+        published.append((channel, event_type, payload))
+        return 1
+
+    monkeypatch.setattr(events, "publish", publish)
+    redis_cache._l1.set("h1", "approved")
+    asyncio.run(redis_cache.invalidate_md("h1"))
+    assert "h1" not in redis_cache._l1
+    assert published == [(redis_cache.ANSWER_CHANNEL, "invalidate", {"keys": ["h1"]})]
+
+
+def test_clear_cache_survives_a_failed_publish(monkeypatch):
+    flushed = []
+
+    class FakeRedis:
+        async def flushall(self):
+            flushed.append(True)
+
+    async def get_redis():
+        return FakeRedis()
+
+    async def publish(channel, event_type, payload=None):
+        raise ConnectionError("pub/sub down")
+
+    monkeypatch.setattr(redis_cache, "get_redis", get_redis)
+    monkeypatch.setattr(events, "publish", publish)
+    redis_cache._l1.set("h1", "answer")
+    asyncio.run(redis_cache.clear_cache())
+    assert flushed and len(redis_cache._l1) == 0
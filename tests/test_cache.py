@@ -2,7 +2,8 @@ import pytest
 import redis
 from unittest.mock import patch, MagicMock
 from src.cache.redis_cache import get_md, set_md
-from src.cache.doctor_semantic_index import semantic_lookup, _load_vectors
+from src.cache.doctor_semantic_index import semantic_lookup, reset_semantic_index
+import src.cache.doctor_semantic_index as semantic_index
 
 
 class TestRedisCache:
@@ -37,73 +38,63 @@ class TestRedisCache:
 class TestSemanticCache:
     """Test semantic cache functionality."""
     
-    @patch('src.cache.doctor_semantic_index._model')
-    @patch('src.cache.doctor_semantic_index._index')
-    @patch('src.cache.doctor_semantic_index._texts')
-    def test_semantic_lookup_hit(self, mock_texts, mock_index, mock_model):
-        """Test successful semantic lookup."""
-        mock_texts.__getitem__.return_value = "Similar diagnosis"
-        mock_index.ntotal = 1
-        mock_model.encode.return_value = [[0.1, 0.2, 0.3]]
-        mock_index.search.return_value = ([[0.95]], [[0]])  # High similarity score
+    @patch('src.cache.doctor_semantic_index._answer_md')
+    @patch('src.cache.doctor_semantic_index._cache')
+    def test_semantic_lookup_hit(self, mock_cache, mock_answer_md):
+        """Test successful semantic lookup returns the answer by id."""
+        mock_answer_md.return_value = "Similar diagnosis"
+        mock_cache.search.return_value = [(42, 0.95)]  # High similarity score
         
         result = semantic_lookup("test symptoms")
         assert result == "Similar diagnosis"
+        mock_answer_md.assert_called_once_with(42)
     
-    @patch('src.cache.doctor_semantic_index._index')
-    def test_semantic_lookup_empty_index(self, mock_index):
+    @patch('src.cache.doctor_semantic_index._cache')
+    def test_semantic_lookup_empty_index(self, mock_cache):
         """Test lookup with empty index."""
-        mock_index.ntotal = 0
+        mock_cache.search.return_value = []
         result = semantic_lookup("test symptoms")
         assert result is None
     
-    @patch('src.cache.doctor_semantic_index._model')
-    @patch('src.cache.doctor_semantic_index._index')
-    @patch('src.cache.doctor_semantic_index._texts')
-    def test_semantic_lookup_low_similarity(self, mock_texts, mock_index, mock_model):
+    @patch('src.cache.doctor_semantic_index._cache')
+    def test_semantic_lookup_low_similarity(self, mock_cache):
         """Test lookup with low similarity score."""
-        mock_index.ntotal = 1
-        mock_model.encode.return_value = [[0.1, 0.2, 0.3]]
-        mock_index.search.return_value = ([[0.5]], [[0]])  # Low similarity score
+        mock_cache.search.return_value = [(42, 0.5)]  # Low similarity score
         
         result = semantic_lookup("test symptoms")
         assert result is None
     
-    @patch('src.cache.doctor_semantic_index.Session')
-    @patch('src.cache.doctor_semantic_index._model')
-    def test_load_vectors_with_data(self, mock_model, mock_session):
-        """Test loading vectors with approved answers."""
-        # Mock database session and approved answers
-        mock_session_instance = MagicMock()
-        mock_session.return_value.__enter__.return_value = mock_session_instance
+    @patch('src.cache.doctor_semantic_index.SemanticIndex.save')
+    @patch('src.cache.doctor_semantic_index._approved_rows')
+    @patch('src.cache.doctor_semantic_index._empty_index')
+    @patch('src.cache.doctor_semantic_index.embed_queries')
+    def test_reset_with_data(self, mock_embed, mock_empty_index, mock_rows, mock_save):
+        """Test rebuilding embeds the symptom queries of approved answers."""
+        import numpy as np
+        from src.cache.vector_index import IdIndex
+        mock_rows.return_value = [(7, "Стать: male, Вік: 30, Симптоми: кашель", None)]
+        mock_empty_index.return_value = IdIndex(768)
+        mock_embed.return_value = np.full((1, 768), 0.1, dtype="float32")
         
-        mock_answer = MagicMock()
-        mock_answer.answer_md = "Test answer"
-        mock_session_instance.exec.return_value.all.return_value = [mock_answer]
+        reset_semantic_index()
         
-        mock_model.get_sentence_embedding_dimension.return_value = 768
-        mock_model.encode.return_value = [[0.1] * 768]
-        
-        index, texts = _load_vectors()
-        
-        assert len(texts) == 1
-        assert texts[0] == "Test answer"
-        assert index.ntotal == 1
+        snap = semantic_index._cache.snapshot()
+        assert snap.ids() == [7]
+        assert snap.partitions["male_30-44"].ids() == [7]
+        mock_embed.assert_called_once_with(["Стать: male, Вік: 30, Симптоми: кашель"])
     
-    @patch('src.cache.doctor_semantic_index.Session')
-    @patch('src.cache.doctor_semantic_index._model')
-    def test_load_vectors_empty(self, mock_model, mock_session):
-        """Test loading vectors with no approved answers."""
-        mock_session_instance = MagicMock()
-        mock_session.return_value.__enter__.return_value = mock_session_instance
-        mock_session_instance.exec.return_value.all.return_value = []
-        
-        mock_model.get_sentence_embedding_dimension.return_value = 768
+    @patch('src.cache.doctor_semantic_index.SemanticIndex.save')
+    @patch('src.cache.doctor_semantic_index._approved_rows')
+    @patch('src.cache.doctor_semantic_index._empty_index')
+    def test_reset_empty(self, mock_empty_index, mock_rows, mock_save):
+        """Test rebuilding with no approved answers."""
+        from src.cache.vector_index import IdIndex
+        mock_rows.return_value = []
+        mock_empty_index.return_value = IdIndex(768)
         
-        index, texts = _load_vectors()
+        reset_semantic_index()
         
-        assert len(texts) == 0
-        assert index.ntotal == 0
+        assert len(semantic_index._cache.snapshot()) == 0
 
 
 class TestCacheIntegration:
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Tests for sequenced cache-invalidation events."""
+import asyncio
+import json
+import os
+from unittest.mock import patch
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.cache import events
+
+
+class FakeRedis:
+    """Runs the publish script in Python and records what was published."""
+
+    def __init__(self):
+        self.counters = {}
+        self.published = []
+
+    async def eval(self, script, numkeys, key, channel, body):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        self.published.append((channel, f"{self.counters[key]}|{body}"))
+        return self.counters[key]
+
+
+def _message(seq, event_type="upsert", origin="other-worker", **payload):
+    return f"{seq}|" + json.dumps({"type": event_type, "payload": payload, "origin": origin})
+
+
+def _subscriber(last_seq=0):
+    applied, resyncs = [], []
+    sub = events.Subscriber("test", applied.append, lambda: resyncs.append(True))
+    sub.last_seq = last_seq
+    return sub, applied, resyncs
+
+
+def test_publish_numbers_events_per_channel():
+    fake = FakeRedis()
+
+    async def get_redis():
+        return fake
+
+    with patch.object(events, "get_redis", get_redis):
+        assert asyncio.run(events.publish("a", "upsert", {"id": 1})) == 1
+        assert asyncio.run(events.publish("a", "remove", {"id": 1})) == 2
+        assert asyncio.run(events.publish("b", "clear")) == 1
+
+    channel, data = fake.published[1]
+    event = events.decode(channel, data)
+    assert (event.seq, event.type, event.payload, event.origin) == (2, "remove", {"id": 1}, events.ORIGIN)
+
+
+def test_in_order_events_are_applied():
+    sub, applied, resyncs = _subscriber(last_seq=4)
+    asyncio.run(sub.handle(_message(5, id=1)))
+    asyncio.run(sub.handle(_message(6, "remove", id=1)))
+    assert [(e.seq, e.type) for e in applied] == [(5, "upsert"), (6, "remove")]
+    assert resyncs == []
+
+
+def test_gap_triggers_resync_instead_of_apply():
+    sub, applied, resyncs = _subscriber(last_seq=4)
+    asyncio.run(sub.handle(_message(7, id=1)))
+    assert applied == [] and resyncs == [True]
+    asyncio.run(sub.handle(_message(8, id=2)))          # back in sequence
+    assert [e.payload["id"] for e in applied] == [2]
+
+
+def test_counter_reset_triggers_resync():
+    sub, applied, resyncs = _subscriber(last_seq=57)
+    asyncio.run(sub.handle(_message(1, "clear")))
+    assert applied == [] and resyncs == [True]
+    assert sub.last_seq == 1
+
+
+def test_own_events_advance_sequence_without_reapplying():
+    sub, applied, resyncs = _subscriber(last_seq=0)
+    asyncio.run(sub.handle(_message(1, origin=events.ORIGIN, id=1)))
+    asyncio.run(sub.handle(_message(2, id=2)))
+    assert [e.payload["id"] for e in applied] == [2]
+    assert resyncs == []
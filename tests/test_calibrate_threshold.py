@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Tests for the semantic threshold calibration script."""
+import importlib.util
+import os
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.cache import semantic_partitions
+from src.config import settings
+
+_spec = importlib.util.spec_from_file_location(
+    "calibrate_semantic_threshold",
+    Path(__file__).parent.parent / "scripts" / "calibrate_semantic_threshold.py",
+)
+calibrate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(calibrate)
+Sample = calibrate.Sample
+
+
+SAMPLES = [
+    Sample("male_30-44", 0.99, True),
+    Sample("male_30-44", 0.95, True),
+    Sample("male_30-44", 0.93, False),
+    Sample("male_30-44", 0.85, False),
+    Sample("male_30-44", None, False),
+    Sample("female_3-5", 0.97, True),
+]
+
+
+def test_sweep_reports_hit_and_false_hit_rates():
+    curve = calibrate.sweep(SAMPLES[:5], [0.90, 0.94])
+    assert curve[0] == pytest.approx({"threshold": 0.90, "hits": 3, "hit_rate": 0.6, "false_hit_rate": 1 / 3})
+    assert curve[1] == pytest.approx({"threshold": 0.94, "hits": 2, "hit_rate": 0.4, "false_hit_rate": 0.0})
+
+
+def test_lowest_threshold_within_budget_is_chosen_per_partition():
+    result = calibrate.calibrate(SAMPLES, calibrate.grid(0.80, 0.98, 0.01), max_false_rate=0.0, min_samples=2)
+    assert result["male_30-44"]["threshold"] == 0.93
+    assert result["female_3-5"]["threshold"] is None        # too few samples
+    assert result[calibrate.ALL]["samples"] == len(SAMPLES)
+
+
+def test_written_thresholds_are_used_at_runtime(monkeypatch, tmp_path):
+    path = tmp_path / "semantic_thresholds.json"
+    monkeypatch.setattr(settings, "semantic_thresholds_path", str(path))
+    result = calibrate.calibrate(SAMPLES, calibrate.grid(0.80, 0.98, 0.01), max_false_rate=0.0, min_samples=2)
+    config = calibrate.write_thresholds(result, "labels.csv", path)
+
+    assert config["partitions"] == {"male_30-44": 0.93}
+    assert semantic_partitions.threshold("male_30-44") == 0.93
+    assert semantic_partitions.threshold("female_3-5") == config["default"]
+
+
+def _bag_of_words(texts):
+    import numpy as np
+    vocab = sorted({w for t in texts for w in t.lower().split()})
+    vecs = np.array([[t.lower().split().count(w) for w in vocab] for t in texts], dtype="float32")
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def test_agreement_compares_full_answers_without_shared_boilerplate(monkeypatch):
+    from src.models import embeddings
+    monkeypatch.setattr(embeddings, "embed_queries", _bag_of_words)
+    header, disclaimer = "## Попередній діагноз", "⚠️ Це лише попередній діагноз."
+    cached = f"{header}\n\nГостра респіраторна інфекція\n\n{disclaimer}"
+
+    assert calibrate.agreement(cached, cached) == 1.0
+    assert calibrate.agreement(cached, f"{header}\n\nГостра респіраторна вірусна інфекція\n\n{disclaimer}") > 0.8
+    # identical header and disclaimer do not make different diagnoses agree
+    assert calibrate.agreement(cached, f"{header}\n\nМігрень без аури\n\n{disclaimer}") == 0.0
+
+
+def test_log_replay_uses_generated_answers_and_skips_draft_edits(monkeypatch, tmp_path):
+    import csv
+    from src.cache import doctor_semantic_index
+    from src.models import embeddings
+    monkeypatch.setattr(embeddings, "embed_queries", _bag_of_words)
+    monkeypatch.setattr(doctor_semantic_index, "closest_match", lambda query: (1, 0.95))
+    monkeypatch.setattr(calibrate, "_answer_texts", lambda ids: {1: "Гостра респіраторна інфекція"})
+    log = tmp_path / "diagnoses.csv"
+    with log.open("w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([
+            ["t", "h1", "gpt-4o-mini", "Стать: male, Вік: 30, Симптоми: кашель", "Гостра респіраторна інфекція"],
+            ["t", "h2", "gpt-4o", "Стать: male, Вік: 32, Симптоми: головний біль", "Мігрень без аури"],
+            ["t", "h3", "draft_edit", "Стать: male, Вік: 31, Симптоми: кашель", "Гостра респіраторна інфекція"],
+        ])
+
+    samples = calibrate.replay_log(log, 0.9)
+    assert samples == [Sample("male_30-44", 0.95, True), Sample("male_30-44", 0.95, False)]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Tests for the translated clinic card cache."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.cache import clinic_card
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the redis_cache get/set/clear_pattern helpers."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+    async def clear_pattern(self, pattern="*"):
+        prefix = pattern.rstrip("*")
+        for key in [k for k in self.data if k.startswith(prefix)]:
+            del self.data[key]
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    clinic_card._cards.clear()
+    with patch.object(clinic_card.redis_cache, "get", fake.get), \
+         patch.object(clinic_card.redis_cache, "set", fake.set), \
+         patch.object(clinic_card.redis_cache, "clear_pattern", fake.clear_pattern):
+        yield fake
+    clinic_card._cards.clear()
+
+
+def _clinic(**overrides):
+    fields = dict(id=1, address="Kyiv, Main st. 1", opening_hours="Mon-Sat 08-20", services="GP")
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+CARD = {"address": "Київ, вул. Головна, 1", "opening_hours": "Пн-Сб 08:00-20:00",
+        "services": "Сімейний лікар", "phone": None}
+
+
+def test_card_is_served_from_process_then_redis(fake_redis):
+    """A stored card is reused by this worker and by a fresh one via Redis."""
+    clinic = _clinic()
+    assert asyncio.run(clinic_card.get_card(clinic)) is None
+
+    asyncio.run(clinic_card.set_card(clinic, CARD))
+    assert asyncio.run(clinic_card.get_card(clinic)) == CARD
+
+    clinic_card._cards.clear()                  # another worker
+    assert asyncio.run(clinic_card.get_card(clinic)) == CARD
+
+
+def test_edited_row_misses_and_invalidate_drops_copies(fake_redis):
+    """A changed clinic row never gets the old translation; invalidate clears both tiers."""
+    asyncio.run(clinic_card.set_card(_clinic(), CARD))
+
+    assert asyncio.run(clinic_card.get_card(_clinic(opening_hours="Mon-Fri 09-18"))) is None
+
+    asyncio.run(clinic_card.invalidate(1))
+    assert fake_redis.data == {} and clinic_card._cards == {}
+    assert asyncio.run(clinic_card.get_card(_clinic())) is None
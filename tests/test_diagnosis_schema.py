@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Tests for structured diagnosis parsing and markdown rendering."""
+import json
+
+from src.models.diagnosis_schema import (
+    DOCTOR_HEADER,
+    PATIENT_HEADER,
+    parse_structured_diagnosis,
+    patient_section_from_markdown,
+    render_markdown,
+    render_patient_section,
+)
+from src.utils import extract_patient_response
+
+SAMPLE = {
+    "patient_summary": "Ймовірно, гостра респіраторна вірусна інфекція.",
+    "next_steps": ["Пийте багато рідини", "Відпочивайте", "Вимірюйте температуру"],
+    "red_flags": ["Температура вище 39 °C понад 3 дні", "Задишка"],
+    "doctor_markdown": "### Діагноз\nГРВІ\n\n### Обстеження\n- Огляд",
+}
+
+
+def test_parse_valid_json():
+    """A schema-conforming JSON answer is validated once."""
+    diagnosis = parse_structured_diagnosis(json.dumps(SAMPLE, ensure_ascii=False))
+    assert diagnosis is not None
+    assert diagnosis.next_steps[0] == "Пийте багато рідини"
+
+
+def test_parse_invalid_json_returns_none():
+    """Missing required fields or non-JSON text is rejected."""
+    assert parse_structured_diagnosis('{"patient_summary": "x"}') is None
+    assert parse_structured_diagnosis("## not json") is None
+
+
+def test_render_keeps_legacy_layout():
+    """Rendered markdown has both legacy section headers in order."""
+    markdown = render_markdown(parse_structured_diagnosis(json.dumps(SAMPLE)))
+    assert markdown.index(PATIENT_HEADER) < markdown.index(DOCTOR_HEADER)
+    assert "### Діагноз" in markdown
+
+
+def test_patient_section_round_trip():
+    """The patient section cut from rendered markdown equals the direct render."""
+    diagnosis = parse_structured_diagnosis(json.dumps(SAMPLE))
+    disclaimer = "\n\n⚠️ **Важливо:** Це лише попередній діагноз."
+    markdown = render_markdown(diagnosis) + disclaimer
+
+    assert patient_section_from_markdown(markdown) == render_patient_section(diagnosis)
+    assert extract_patient_response(markdown) == render_patient_section(diagnosis)
+
+
+def test_legacy_markdown_falls_back_to_heuristics():
+    """Free-form answers without the rendered layout still use the old path."""
+    legacy = (
+        "## 1. Коротка відповідь для пацієнта\n"
+        "Можливо, у вас застуда. Відпочивайте та пийте багато рідини.\n\n"
+        "## 2. Професійна відповідь для лікаря\nГРВІ"
+    )
+    assert patient_section_from_markdown(legacy) is None
+    assert "застуда" in extract_patient_response(legacy)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Tests for the in-memory fuzzy doctor directory."""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.cache import doctor_directory
+from src.cache.doctor_directory import DoctorDirectory, DoctorEntry
+from src.db.models import Doctor
+
+DOCTORS = [
+    DoctorEntry(1, "Іваненко Петро Олегович", "Сімейний лікар", "Пн-Пт 09-17"),
+    DoctorEntry(2, "Петренко Ольга", "Педіатр", "Вт-Сб 10-16"),
+    DoctorEntry(3, "Olena Kovalenko", "Pediatrician", "Mon 09-13"),
+    DoctorEntry(12, "Шевченко Андрій", "Кардіолог", "Пт 09-12"),
+]
+
+
+def _names(directory, text):
+    return [doctor.full_name for doctor, _ in directory.search(text)]
+
+
+@pytest.fixture
+def directory():
+    return DoctorDirectory(DOCTORS)
+
+
+def test_inflected_and_transliterated_names(directory):
+    """Case endings and Latin / Cyrillic spellings resolve to the same doctor."""
+    assert _names(directory, "Коли приймає Іваненка?") == ["Іваненко Петро Олегович"]
+    assert _names(directory, "When is Dr. Petrenko available?") == ["Петренко Ольга"]
+    assert _names(directory, "Коли приймає д-р Коваленко?") == ["Olena Kovalenko"]
+
+
+def test_position_matches_all_doctors_with_it(directory):
+    """A specialty matches every doctor with it, in either script."""
+    assert _names(directory, "Розклад педіатра") == ["Петренко Ольга", "Olena Kovalenko"]
+
+
+def test_id_and_general_questions(directory):
+    """An explicit id wins; a general question matches nobody."""
+    assert _names(directory, "Графік роботи лікаря 12?") == ["Шевченко Андрій"]
+    assert _names(directory, "Які лікарі у вас працюють?") == []
+
+
+def test_upsert_makes_new_doctor_searchable(directory, monkeypatch):
+    """`create_doctor` refreshes the directory of this worker."""
+    monkeypatch.setattr(doctor_directory, "_directory", directory)
+
+    doctor_directory.upsert(Doctor(id=7, full_name="Бондар Ірина", position="Гінеколог", schedule="Ср 10-14"))
+
+    assert _names(doctor_directory._directory, "Коли приймає гінеколог?") == ["Бондар Ірина"]
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Tests for draft-edit generation on semantic near misses."""
+import asyncio
+import csv
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.config import settings
+from src.models import draft_edit, llm_client
+
+DRAFT = "## Діагноз\nГРВІ у дорослого.\n\n## Лікування\nПарацетамол 500 мг до 4 разів на добу."
+QUERY = "Стать: female, Вік: 8, Симптоми: кашель температура"
+
+
+def _run(monkeypatch, content, finish_reason="stop"):
+    async def fake_ainvoke(runnable, messages, *, call_site, provider="openai"):
+        assert call_site == "draft_edit"
+        assert DRAFT in messages[1][1] and QUERY in messages[1][1]
+        return SimpleNamespace(content=content, usage_metadata={"output_tokens": 42},
+                               response_metadata={"finish_reason": finish_reason})
+
+    monkeypatch.setattr(llm_client, "ainvoke", fake_ainvoke)
+    monkeypatch.setattr(draft_edit, "_llm", object())
+    return asyncio.run(draft_edit.agenerate_draft_edit(QUERY, DRAFT, "Стать: male, Вік: 30, Симптоми: кашель"))
+
+
+def test_edits_are_applied_to_the_draft(monkeypatch):
+    result = _run(monkeypatch, json.dumps({"edits": [
+        {"find": "ГРВІ у дорослого", "replace": "ГРВІ у дитини"},
+        {"find": "500 мг до 4 разів", "replace": "15 мг/кг до 4 разів"},
+    ]}))
+    assert result.outcome == "edited" and result.edits == 2 and result.output_tokens == 42
+    assert "ГРВІ у дитини" in result.response and "15 мг/кг" in result.response
+    assert result.response.startswith("## Діагноз")
+
+
+@pytest.mark.parametrize("content, finish_reason, outcome", [
+    (json.dumps({"new_case": True}), "stop", "new_case"),
+    (json.dumps({"edits": [{"find": "немає в тексті", "replace": "x"}]}), "stop", "invalid"),
+    ("not json", "stop", "invalid"),
+    (json.dumps({"edits": []}), "length", "truncated"),
+])
+def test_unusable_edits_fall_back_to_generation(monkeypatch, content, finish_reason, outcome):
+    result = _run(monkeypatch, content, finish_reason)
+    assert result.outcome == outcome and result.response is None
+
+
+def test_no_edits_keeps_the_approved_answer(monkeypatch):
+    result = _run(monkeypatch, json.dumps({"edits": []}))
+    assert result.outcome == "unchanged" and result.response == DRAFT
+
+
+def test_ambiguous_edit_target_is_rejected():
+    with pytest.raises(draft_edit.DraftEditError):
+        draft_edit.apply_edits("4 рази, 4 рази", [("4 рази", "3 рази")])
+
+
+def test_attempts_are_logged_for_audit(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "draft_edit_log_path", str(tmp_path / "draft_edits.csv"))
+    result = draft_edit.DraftEditResult("edited", "answer", edits=2, output_tokens=42, seconds=0.5)
+    draft_edit.log_draft_edit("abc", 7, 0.8812, result)
+    with open(settings.draft_edit_log_path, newline="", encoding="utf-8") as f:
+        row = next(csv.reader(f))
+    assert row[1:] == ["abc", "7", "0.8812", "edited", "2", "42", "0.500"]
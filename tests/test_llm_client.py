@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""Tests for the shared LLM client policy against a local fake OpenAI server."""
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.config import settings
+from src.models import llm_client
+from src.utils import metrics
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fake OpenAI-compatible server
+# ─────────────────────────────────────────────────────────────────────────────
+
+class FakeLLMServer:
+    """Serves /v1/chat/completions; each request pops the next scripted action."""
+
+    def __init__(self):
+        self.actions = []           # list of (status_code, delay_seconds, content)
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.requests += 1
+                    code, delay, content = server.actions.pop(0) if server.actions else (200, 0, "ok")
+                time.sleep(delay)
+                if code == 200:
+                    body = {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": 0,
+                        "model": "fake-model",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": 1200, "completion_tokens": 1, "total_tokens": 1201,
+                                  "prompt_tokens_details": {"cached_tokens": 1024}},
+                    }
+                else:
+                    body = {"error": {"message": "boom", "type": "server_error"}}
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass        # client gave up (timeout / hedge cancelled)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    server = FakeLLMServer()
+    monkeypatch.setattr(settings, "openai_base_url", server.url)
+    monkeypatch.setattr(settings, "llm_backoff_base_s", 0.01)
+    monkeypatch.setattr(settings, "llm_backoff_max_s", 0.02)
+    monkeypatch.setattr(settings, "llm_max_retries", 2)
+    monkeypatch.setattr(settings, "llm_call_deadlines_s", {"test": 0.5})
+    monkeypatch.setattr(settings, "llm_hedge_call_sites", [])
+    metrics.reset()
+    yield server
+    server.close()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+def test_server_error_is_retried(fake_llm):
+    """A 5xx response is retried with backoff and the next answer is returned."""
+    fake_llm.actions = [(500, 0, ""), (200, 0, "diagnose")]
+    model = llm_client.make_chat_model("test", temperature=0.0)
+
+    result = asyncio.run(llm_client.ainvoke(model, "hi", call_site="test"))
+
+    assert result.content == "diagnose"
+    assert fake_llm.requests == 2
+
+
+def test_stuck_call_hits_deadline_then_retries(fake_llm):
+    """A call slower than the call-site deadline is abandoned and retried."""
+    fake_llm.actions = [(200, 2.0, "slow"), (200, 0, "fast")]
+    model = llm_client.make_chat_model("test", temperature=0.0)
+
+    started = time.perf_counter()
+    result = asyncio.run(llm_client.ainvoke(model, "hi", call_site="test"))
+
+    assert result.content == "fast"
+    assert time.perf_counter() - started < 1.5
+
+
+def test_exhausted_budget_raises_504(fake_llm):
+    """No call is attempted once the request time budget is used up."""
+    model = llm_client.make_chat_model("test", temperature=0.0)
+
+    async def scenario():
+        with llm_client.time_budget(0):
+            await llm_client.ainvoke(model, "hi", call_site="test")
+
+    with pytest.raises(llm_client.LLMBudgetExceededError) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.status_code == 504
+    assert fake_llm.requests == 0
+
+
+def test_budget_running_out_mid_call_raises_504(fake_llm):
+    """A call cut short by the remaining budget (not the call-site deadline) is a 504."""
+    fake_llm.actions = [(200, 1.0, "slow")]
+    model = llm_client.make_chat_model("test", temperature=0.0)
+
+    async def scenario():
+        with llm_client.time_budget(0.2):
+            await llm_client.ainvoke(model, "hi", call_site="test")
+
+    with pytest.raises(llm_client.LLMBudgetExceededError):
+        asyncio.run(scenario())
+    assert fake_llm.requests == 1
+    assert metrics.snapshot()["counters"]["llm_budget_exceeded_total{call_site=test}"] == 1
+
+
+def test_hedged_request_wins_when_primary_is_slow(fake_llm, monkeypatch):
+    """After the p95 delay a duplicate is sent and the faster answer is used."""
+    monkeypatch.setattr(settings, "llm_hedge_call_sites", ["test"])
+    monkeypatch.setattr(settings, "llm_hedge_min_samples", 5)
+    monkeypatch.setattr(settings, "llm_call_deadlines_s", {"test": 5.0})
+    for _ in range(5):
+        metrics.observe("llm_call_seconds", 0.05, call_site="test")
+    fake_llm.actions = [(200, 2.0, "primary"), (200, 0, "hedge")]
+    model = llm_client.make_chat_model("test", temperature=0.0)
+
+    started = time.perf_counter()
+    result = asyncio.run(llm_client.ainvoke(model, "hi", call_site="test"))
+
+    assert result.content == "hedge"
+    assert time.perf_counter() - started < 1.5
+    assert metrics.snapshot()["counters"]["llm_hedge_wins_total{call_site=test}"] == 1
+
+
+def test_cached_prompt_tokens_are_recorded(fake_llm):
+    """Prompt-prefix cache hits reported by the provider land in metrics."""
+    model = llm_client.make_chat_model("test", temperature=0.0)
+
+    asyncio.run(llm_client.ainvoke(model, "hi", call_site="test"))
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["llm_prompt_tokens_total{call_site=test}"] == 1200
+    assert counters["llm_cached_prompt_tokens_total{call_site=test}"] == 1024
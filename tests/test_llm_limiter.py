@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Unit tests for LLM admission control."""
+import os
+import asyncio
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.models import llm_limiter
+from src.models.llm_limiter import ConcurrencyLimiter, LLMOverloadedError, Priority
+from src.utils import metrics
+
+
+def _limiter(**overrides) -> ConcurrencyLimiter:
+    params = dict(provider="test", max_concurrency=1, max_queue=2,
+                  queue_timeout=1.0, retry_after=7)
+    params.update(overrides)
+    return ConcurrencyLimiter(**params)
+
+
+def test_queue_full_raises_503_with_retry_after():
+    """A full wait queue is rejected immediately."""
+    async def scenario():
+        limiter = _limiter(max_queue=0)
+        await limiter.acquire(Priority.PATIENT)
+        with pytest.raises(LLMOverloadedError) as exc_info:
+            await limiter.acquire(Priority.PATIENT)
+        limiter.release()
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "7"
+
+
+def test_queue_timeout_rejects_and_frees_queue():
+    """Waiters that exceed the queue timeout are rejected and leave the queue."""
+    async def scenario():
+        limiter = _limiter(queue_timeout=0.05)
+        await limiter.acquire(Priority.PATIENT)
+        with pytest.raises(LLMOverloadedError):
+            await limiter.acquire(Priority.PATIENT)
+        assert limiter.queued == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_doctor_priority_served_first():
+    """Doctor requests overtake patients that were queued earlier."""
+    order = []
+
+    async def worker(limiter, name, priority):
+        async with limiter.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        limiter = _limiter(max_queue=10)
+        await limiter.acquire(Priority.PATIENT)          # hold the only slot
+        tasks = [
+            asyncio.create_task(worker(limiter, "patient-1", Priority.PATIENT)),
+            asyncio.create_task(worker(limiter, "patient-2", Priority.PATIENT)),
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker(limiter, "doctor", Priority.DOCTOR)))
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+    assert order == ["doctor", "patient-1", "patient-2"]
+
+
+def test_queue_time_is_recorded():
+    """Queue wait time is exported with the same labels whether or not the call queued."""
+    metrics.reset()
+
+    async def scenario():
+        limiter = _limiter()
+        async with limiter.slot(Priority.PATIENT):          # free slot: fast path
+            queued = asyncio.create_task(limiter.acquire(Priority.PATIENT))
+            await asyncio.sleep(0.01)
+        await queued                                        # handed over on release
+        limiter.release()
+
+    asyncio.run(scenario())
+    observations = metrics.snapshot()["observations"]
+    key = "llm_queue_seconds{priority=patient,provider=test}"
+    assert [name for name in observations if name.startswith("llm_queue_seconds")] == [key]
+    assert metrics.count("llm_queue_seconds", priority="patient", provider="test") == 2
+
+
+def test_doctor_review_requests_run_with_doctor_priority():
+    """LLM calls made while serving /doctor_review see Priority.DOCTOR."""
+    import httpx
+    from fastapi import APIRouter, FastAPI
+
+    from src.api import router_doctor_review
+
+    probe = APIRouter(dependencies=router_doctor_review.router.dependencies)
+
+    @probe.get("/probe")
+    async def read_priority():
+        return {"priority": llm_limiter.current_priority().name}
+
+    app = FastAPI()
+    app.include_router(probe)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/probe")
+
+    assert asyncio.run(scenario()).json() == {"priority": "DOCTOR"}
+    assert llm_limiter.current_priority() is Priority.PATIENT     # doesn't leak out of the request
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Tests for the local intent paths: regex rules and nearest-centroid classifier."""
+import os
+import zlib
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import numpy as np
+
+from src.config import settings
+from src.models import intent_classifier
+from src.models.intent_classifier import (
+    CentroidIntentClassifier,
+    IntentEnum,
+    IntentResult,
+    _load_logged_examples,
+    _log_intent,
+    classify,
+    match_rules,
+)
+from src.utils import metrics
+
+
+def _bag_of_words(texts):
+    """Deterministic stand-in for e5: hashed, normalised bag of words."""
+    vecs = np.zeros((len(texts), 256), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in text.lower().replace("?", " ").replace(",", " ").split():
+            vecs[row, zlib.crc32(word.encode()) % 256] += 1.0
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.where(norms == 0, 1.0, norms)
+
+
+TRAIN = [
+    ("адреса клініки", IntentEnum.CLINIC_INFO),
+    ("години роботи клініки", IntentEnum.CLINIC_INFO),
+    ("коли приймає лікар", IntentEnum.DOCTOR_SCHEDULE),
+    ("графік лікаря педіатра", IntentEnum.DOCTOR_SCHEDULE),
+    ("болить горло температура", IntentEnum.DIAGNOSE),
+    ("кашель і температура", IntentEnum.DIAGNOSE),
+]
+
+
+def test_nearest_centroid_prediction():
+    """Texts close to one class's examples get that class with a clear margin."""
+    classifier = CentroidIntentClassifier(_bag_of_words).fit(TRAIN)
+
+    intent, confidence, margin = classifier.predict("яка адреса клініки")
+    assert intent == IntentEnum.CLINIC_INFO
+    assert 0.0 < confidence <= 1.0 and margin > 0.1
+
+    assert classifier.predict("температура і кашель")[0] == IntentEnum.DIAGNOSE
+
+
+def test_low_margin_defers_to_llm(monkeypatch):
+    """Ambiguous text returns None so the caller asks the LLM."""
+    classifier = CentroidIntentClassifier(_bag_of_words).fit(TRAIN)
+    monkeypatch.setattr(intent_classifier, "_local", classifier)
+    monkeypatch.setattr(settings, "intent_local_margin", 0.05)
+
+    local = intent_classifier._classify_local("години роботи клініки")
+    assert local is not None and local.path == "local"
+    assert intent_classifier._classify_local("щось зовсім інше") is None
+
+
+def test_llm_labelled_log_rows_become_training_data(tmp_path, monkeypatch):
+    """Only rows labelled by the LLM are reused for training."""
+    log_path = tmp_path / "intent_log.csv"
+    monkeypatch.setattr(settings, "intent_log_enabled", True)
+    monkeypatch.setattr(settings, "intent_log_path", str(log_path))
+
+    _log_intent("де ви знаходитесь", IntentResult(IntentEnum.CLINIC_INFO, None, "llm"))
+    _log_intent("болить вухо", IntentResult(IntentEnum.DIAGNOSE, 0.97, "local"))
+
+    assert _load_logged_examples(str(log_path)) == [("де ви знаходитесь", IntentEnum.CLINIC_INFO)]
+
+
+def test_rules_decide_unambiguous_messages():
+    """Address, hours, doctor schedule and age + symptom are decided by rules."""
+    assert match_rules("Адреса клініки?")[0] == IntentEnum.CLINIC_INFO
+    assert match_rules("Які години роботи клініки?")[0] == IntentEnum.CLINIC_INFO
+    assert match_rules("Графік роботи лікаря 12?")[0] == IntentEnum.DOCTOR_SCHEDULE
+    assert match_rules("Моєму сину 5 років, болить живіт.") == (IntentEnum.DIAGNOSE, ["age_symptom"])
+
+
+def test_rules_fall_through_when_unmatched_or_conflicting():
+    """A lone symptom or hits for two intents are left to the model."""
+    assert match_rules("болить горло") is None
+    assert match_rules("Коли приймає педіатр? Дитині 5 років, болить живіт") is None
+
+
+def test_rule_hit_skips_models(tmp_path, monkeypatch):
+    """A rule hit is logged and counted without touching embeddings or the LLM."""
+    monkeypatch.setattr(settings, "intent_log_enabled", True)
+    monkeypatch.setattr(settings, "intent_log_path", str(tmp_path / "intent_log.csv"))
+    monkeypatch.setattr(intent_classifier, "_classify_local", lambda text: 1 / 0)
+    metrics.reset()
+
+    result = classify("Де ви знаходитесь?")
+
+    assert (result.intent, result.path) == (IntentEnum.CLINIC_INFO, "rule")
+    assert metrics.snapshot()["counters"]["intent_rule_hits_total{rule=address}"] == 1
+    assert "rule" in (tmp_path / "intent_log.csv").read_text(encoding="utf-8")
+
+
+def test_intent_log_is_off_by_default(tmp_path, monkeypatch):
+    """Patient messages are only written to the intent log when it is enabled."""
+    log_path = tmp_path / "intent_log.csv"
+    monkeypatch.setattr(settings, "intent_log_path", str(log_path))
+
+    _log_intent("болить вухо", IntentResult(IntentEnum.DIAGNOSE, 0.97, "local"))
+
+    assert not log_path.exists()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""Unit tests for complexity-based diagnosis model routing."""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.config import settings
+from src.models.model_router import ModelTier, count_symptoms, route_diagnosis
+
+
+def test_simple_case_uses_fast_tier():
+    """A single mild symptom in an adult with a clear protocol match stays fast."""
+    decision = route_diagnosis("нежить 2 дні", 30, [0.91, 0.84, 0.80])
+    assert decision.tier == ModelTier.FAST
+    assert decision.reasons == []
+
+
+def test_red_flag_forces_strong_tier():
+    """Red-flag keywords alone are enough for the strong model."""
+    decision = route_diagnosis("сильний біль у грудях і пітливість", 45, [0.9, 0.8])
+    assert decision.tier == ModelTier.STRONG
+    assert decision.model == settings.openai_model_strong
+    assert any(reason.startswith("red_flags") for reason in decision.reasons)
+
+
+def test_infant_with_many_symptoms_is_strong():
+    """Age extreme plus many symptoms crosses the threshold."""
+    decision = route_diagnosis("температура, кашель, нежить і погано їсть", 1, [0.9, 0.85])
+    assert decision.tier == ModelTier.STRONG
+    assert "age=1" in decision.reasons
+
+
+def test_ambiguous_retrieval_counts_as_signal():
+    """Near-identical top scores add one signal, not enough on their own."""
+    decision = route_diagnosis("головний біль", 40, [0.85, 0.845])
+    assert decision.tier == ModelTier.FAST
+    assert decision.score == 1
+
+
+def test_router_disabled_always_fast(monkeypatch):
+    """With routing off every case uses the fast tier."""
+    monkeypatch.setattr(settings, "model_router_enabled", False)
+    decision = route_diagnosis("судоми та втрата свідомості", 80, [0.5])
+    assert decision.tier == ModelTier.FAST
+
+
+def test_count_symptoms():
+    assert count_symptoms("кашель, температура 38 і біль у горлі") == 3
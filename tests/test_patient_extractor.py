@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Tests for joint intent + patient slot extraction."""
+import os
+import asyncio
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.config import settings
+from src.models import patient_extractor
+from src.models.intent_classifier import IntentEnum
+from src.models.patient_extractor import aextract, extract_slots
+
+
+@pytest.mark.parametrize("text, gender, age, months, symptoms", [
+    ("Моєму сину 5 років, болить живіт.", "m", 5, None, "болить живіт"),
+    ("синові 7, кашель третій день", "m", 7, None, "кашель третій день"),
+    ("Жінка 45 років, головний біль і запаморочення", "f", 45, None, "головний біль і запаморочення"),
+    ("Дитині 5 міс. температура 38,5", None, 0, 5, "Дитина 5 міс.: температура 38,5"),
+    ("донька 3 роки нежить", "f", 3, None, "нежить"),
+])
+def test_local_slots(text, gender, age, months, symptoms):
+    """Gender, age (incl. months and "синові 7") and the symptom span in one scan."""
+    slots = extract_slots(text)
+    assert (slots.gender, slots.age, slots.age_months, slots.symptoms) == (gender, age, months, symptoms)
+
+
+def test_ambiguous_numbers_are_not_ages():
+    """A temperature after "дитині" and "синяк" are not read as age / gender."""
+    assert extract_slots("дитині 39 температура").age is None
+    assert extract_slots("у мене синяк на нозі").gender is None
+
+
+def test_bare_number_only_when_age_expected():
+    """A reply of just "30" is an age only when we asked for it."""
+    assert extract_slots("30").age is None
+    assert extract_slots("чоловіча, 30", expect_age=True).age == 30
+
+
+def test_complete_local_extraction_makes_no_llm_call(tmp_path, monkeypatch):
+    """Rules decide the intent and regex fills the slots — no model round trip."""
+    monkeypatch.setattr(settings, "intent_log_path", str(tmp_path / "intent_log.csv"))
+
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM must not be called")
+    monkeypatch.setattr(patient_extractor.llm_client, "ainvoke", no_llm)
+
+    slots = asyncio.run(aextract("Моєму сину 5 років, болить живіт."))
+
+    assert slots.intent.intent == IntentEnum.DIAGNOSE and slots.intent.path == "rule"
+    assert (slots.gender, slots.age, slots.path) == ("m", 5, "local")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""Tests for diagnosis records stored as one Redis hash."""
+import asyncio
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.cache import redis_cache
+from src.config import settings
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.commands = redis, []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Bytes-in, bytes-out subset of Redis used by the diagnosis records."""
+
+    def __init__(self):
+        self.strings, self.hashes, self.ttls = {}, {}, {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field.encode())
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        record = self.hashes.setdefault(key, {})
+        for name, v in items.items():
+            record[name.encode()] = v if isinstance(v, bytes) else str(v).encode()
+        return len(items)
+
+    def hsetnx(self, key, field, value):
+        record = self.hashes.setdefault(key, {})
+        if field.encode() in record:
+            return 0
+        record[field.encode()] = str(value).encode()
+        return 1
+
+    def hdel(self, key, *fields):
+        return sum(self.hashes.get(key, {}).pop(f.encode(), None) is not None for f in fields)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    r = FakeRedis()
+
+    async def get_redis_binary():
+        return r
+
+    monkeypatch.setattr(redis_cache, "get_redis_binary", get_redis_binary)
+    redis_cache._l1.clear()
+    yield r
+    redis_cache._l1.clear()
+
+
+def test_record_is_written_in_one_round_trip(fake):
+    asyncio.run(redis_cache.set_diagnosis_record(
+        "h1", "full answer", "patient text", query="Стать: ж, Вік: 30, Симптоми: кашель", model="gpt-4o-mini",
+    ))
+    assert fake.round_trips == 1
+    assert fake.ttls["dx:h1"] == redis_cache.TTL_DAYS * 24 * 3600
+    assert "h1" in redis_cache._l1
+
+    record = asyncio.run(redis_cache.get_diagnosis("h1"))
+    assert fake.round_trips == 2
+    assert (record.full_md, record.patient_md, record.model) == ("full answer", "patient text", "gpt-4o-mini")
+    assert record.query.endswith("кашель")
+    assert record.approved is False
+    assert record.version == redis_cache.SCHEMA_VERSION
+
+
+def test_approval_keeps_query_and_replaces_patient_text(fake):
+    asyncio.run(redis_cache.set_diagnosis_with_patient_response("h1", "draft", "draft patient", query="q"))
+    created = asyncio.run(redis_cache.get_diagnosis("h1")).created_at
+    asyncio.run(redis_cache.set_diagnosis_record("h1", "approved", approved=True))
+    record = asyncio.run(redis_cache.get_diagnosis("h1"))
+    assert (record.full_md, record.patient_md, record.query, record.approved) == ("approved", None, "q", True)
+    assert record.created_at == created                     # first write only
+    assert record.updated_at >= created
+    assert asyncio.run(redis_cache.get_query("h1")) == "q"
+
+
+def test_priming_with_set_md_keeps_patient_text(fake):
+    asyncio.run(redis_cache.set_diagnosis_with_patient_response("h1", "approved", "patient text", query="q"))
+    asyncio.run(redis_cache.set_md("h1", "approved"))       # DB hit re-primes the same answer
+    assert asyncio.run(redis_cache.get_patient_response("h1")) == "patient text"
+    assert asyncio.run(redis_cache.get_diagnosis("h1")).approved is True
+
+
+def test_large_values_are_compressed(fake, monkeypatch):
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(settings, "redis_compress_min_bytes", 100)
+    long_md = "## Діагноз\n" + "Гостра респіраторна вірусна інфекція. " * 50
+    asyncio.run(redis_cache.set_diagnosis_record("h1", long_md, "short"))
+
+    stored = fake.hashes["dx:h1"]
+    assert stored[b"full"].startswith(redis_cache._ZSTD_MAGIC)
+    assert len(stored[b"full"]) < len(long_md.encode())
+    assert stored[b"patient"] == b"short"                    # below the threshold
+
+    redis_cache._l1.clear()
+    assert asyncio.run(redis_cache.get_md("h1")) == long_md
+    assert asyncio.run(redis_cache.get_patient_response("h1")) == "short"
+
+
+def test_compression_can_be_disabled(fake, monkeypatch):
+    monkeypatch.setattr(settings, "redis_compress_min_bytes", 0)
+    asyncio.run(redis_cache.set_diagnosis_record("h1", "x" * 5000))
+    assert fake.hashes["dx:h1"][b"full"] == b"x" * 5000
+
+
+def test_legacy_string_keys_are_read_in_the_same_round_trip(fake):
+    fake.strings.update({"h1": "old full".encode(), "patient_h1": "old patient".encode(), "query_h1": b"old query"})
+
+    assert asyncio.run(redis_cache.get_md("h1")) == "old full"
+    assert asyncio.run(redis_cache.get_patient_response("h1")) == "old patient"
+    assert fake.round_trips == 2
+
+    record = asyncio.run(redis_cache.get_diagnosis("h1"))
+    assert (record.full_md, record.patient_md, record.query, record.version) == (
+        "old full", "old patient", "old query", 1)
+    assert asyncio.run(redis_cache.get_diagnosis("missing")) is None
+
+
+def test_client_is_reused(monkeypatch):
+    monkeypatch.setattr(redis_cache, "_redis_client", None)
+    first = asyncio.run(redis_cache.get_redis())
+    assert asyncio.run(redis_cache.get_redis()) is first
@@ -0,0 +1,354 @@
+import hashlib
+import importlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import numpy as np
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+import src.db
+from src.cache import events
+from src.config import settings
+from src.db.models import DoctorAnswer
+from src.models import embeddings
+
+
+class FakeEmbedder:
+    """Bag-of-words hashing embedder: same words → identical vectors."""
+    dim = 64
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, normalize_embeddings=True):
+        vecs = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(",", " ").split():
+                vecs[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+NOW = datetime.now(timezone.utc)
+QUERY = "Стать: male, Вік: 30, Симптоми: кашель температура"
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(src.db, "engine", engine)
+    monkeypatch.setattr(embeddings, "_model", FakeEmbedder())
+    monkeypatch.setattr(settings, "semantic_index_path", str(tmp_path / "semantic_index"))
+    with Session(engine) as s:
+        s.add(DoctorAnswer(symptoms_hash="a", query=QUERY, answer_md="Approved answer", approved=True, created_at=NOW, updated_at=NOW))
+        s.add(DoctorAnswer(symptoms_hash="b", query="Стать: female, Вік: 5, Симптоми: висип",
+                           answer_md="Pending answer", approved=False, created_at=NOW, updated_at=NOW))
+        s.add(DoctorAnswer(symptoms_hash="c", answer_md="Legacy answer without query", approved=True, created_at=NOW, updated_at=NOW))
+        s.commit()
+    module = importlib.import_module("src.cache.doctor_semantic_index")
+    module.reset_semantic_index()
+    yield module, engine
+    module.clear_semantic_index()
+
+
+def test_only_approved_answers_with_query_are_indexed(index):
+    module, _ = index
+    stats = module.get_semantic_index_stats()
+    assert stats["total_documents"] == 1
+    assert stats["texts_count"] == 1
+
+
+def test_lookup_compares_queries_and_returns_answer_by_id(index):
+    module, _ = index
+    assert module.semantic_lookup(QUERY) == "Approved answer"
+    answer_id, score = module.semantic_match(QUERY)
+    assert answer_id == 1 and score == pytest.approx(1.0)
+    assert module.semantic_lookup("Стать: female, Вік: 70, Симптоми: біль у спині") is None
+
+
+def test_add_doc_to_index_uses_the_answer_id(index):
+    module, engine = index
+    query = "Стать: female, Вік: 5, Симптоми: висип"
+    with Session(engine) as s:
+        answer = s.get(DoctorAnswer, 2)
+        answer.approved = True
+        s.add(answer)
+        s.commit()
+    assert module.semantic_lookup(query) is None
+    module.add_doc_to_index(2, query)
+    assert module.semantic_lookup(query) == "Pending answer"
+
+
+def _approve_new(engine, query, answer_md):
+    with Session(engine) as s:
+        answer = DoctorAnswer(symptoms_hash=query, query=query, answer_md=answer_md,
+                              approved=True, created_at=NOW, updated_at=datetime.now(timezone.utc))
+        s.add(answer)
+        s.commit()
+        return answer.id
+
+
+def test_restart_loads_snapshot_and_embeds_only_new_rows(index, monkeypatch):
+    module, engine = index
+    assert (Path(settings.semantic_index_path) / "meta.json").exists()
+    new_query = "Стать: female, Вік: 40, Симптоми: головний біль"
+    new_id = _approve_new(engine, new_query, "Headache answer")
+
+    embedded = []
+    real_embed = module.embed_queries
+    monkeypatch.setattr(module, "embed_queries", lambda texts: embedded.extend(texts) or real_embed(texts))
+    monkeypatch.setattr(module._cache, "_snapshot", None)      # simulate a fresh process
+
+    assert module.load_and_sync() == 1
+    assert embedded == [new_query]
+    assert module._cache.snapshot().ids() == [1, new_id]
+    assert module.semantic_lookup(new_query) == "Headache answer"
+
+
+def test_periodic_sync_picks_up_other_workers_and_persists(index):
+    module, engine = index
+    query = "Стать: male, Вік: 60, Симптоми: задишка"
+    new_id = _approve_new(engine, query, "Dyspnea answer")
+    assert module.semantic_lookup(query) is None
+
+    assert module.sync_and_save() == 1
+    assert module.semantic_lookup(query) == "Dyspnea answer"
+    assert module.sync_and_save() == 0                  # high-water mark moved on
+
+    meta = json.loads((Path(settings.semantic_index_path) / "meta.json").read_text())
+    assert meta["partitions"] == {"male_30-44": [1], "male_60-74": [new_id]} and meta["high_water"]
+
+
+def test_periodic_sync_reembeds_edits_whose_event_was_missed(index):
+    module, engine = index
+    edited = "Стать: male, Вік: 35, Симптоми: нежить чхання"
+    # another worker edited answer 1 (already indexed); this worker missed the upsert event
+    with Session(engine) as s:
+        answer = s.get(DoctorAnswer, 1)
+        answer.query, answer.updated_at = edited, datetime.now(timezone.utc)
+        s.add(answer)
+        s.commit()
+    assert module.semantic_lookup(edited) is None
+
+    assert module.sync_and_save() == 1
+    assert module.semantic_lookup(edited) == "Approved answer"
+    assert module.semantic_lookup(QUERY) is None
+    assert module.sync_and_save() == 0                  # rows at the high-water mark are not re-embedded
+
+
+def test_remove_and_reconcile_follow_the_database(index):
+    module, engine = index
+    other = "Стать: male, Вік: 60, Симптоми: задишка"
+    other_id = _approve_new(engine, other, "Dyspnea answer")
+    module.add_doc_to_index(other_id, other)
+
+    assert module.remove_from_index(1)
+    assert module._cache.snapshot().ids() == [other_id]
+    assert module.semantic_lookup(QUERY) is None
+    assert module.semantic_lookup(other) == "Dyspnea answer"
+
+    # another worker unapproved `other`; this worker missed the event
+    with Session(engine) as s:
+        answer = s.get(DoctorAnswer, other_id)
+        answer.approved = False
+        s.add(answer)
+        s.commit()
+    module.reconcile()
+    assert module._cache.snapshot().ids() == [1]
+    assert module.semantic_lookup(QUERY) == "Approved answer"
+
+
+def test_events_from_other_workers_are_applied(index):
+    module, engine = index
+    query = "Стать: female, Вік: 40, Симптоми: головний біль"
+    new_id = _approve_new(engine, query, "Headache answer")
+
+    module.apply_event(events.Event(module.CHANNEL, 1, "upsert", {"id": new_id, "query": query}))
+    assert module.semantic_lookup(query) == "Headache answer"
+    module.apply_event(events.Event(module.CHANNEL, 2, "remove", {"id": new_id}))
+    assert module.semantic_lookup(query) is None
+    module.apply_event(events.Event(module.CHANNEL, 3, "clear"))
+    assert module.get_semantic_index_stats()["total_documents"] == 0
+
+
+def test_clear_survives_sync_restart_and_reconcile(index, monkeypatch):
+    module, engine = index
+    cleared_at = module.clear_semantic_index()
+    assert cleared_at is not None
+    assert module.sync_and_save() == 0                  # approvals up to the clear stay out
+    module.reconcile()
+    assert module._cache.snapshot().ids() == []
+
+    monkeypatch.setattr(module._cache, "_snapshot", None)      # simulate a restart
+    assert module.load_and_sync() == 0
+    assert module.semantic_lookup(QUERY) is None
+
+    query = "Стать: male, Вік: 60, Симптоми: задишка"
+    new_id = _approve_new(engine, query, "Dyspnea answer")
+    assert module.sync_and_save() == 1                  # later approvals are indexed again
+    assert module._cache.snapshot().ids() == [new_id]
+
+    # a worker that applies the "clear" event uses the publisher's mark
+    module._cache.reset()
+    module.apply_event(events.Event(module.CHANNEL, 1, "clear", {"cleared_at": cleared_at}))
+    assert module.sync() == 1 and module._cache.snapshot().ids() == [new_id]
+
+    module.apply_event(events.Event(module.CHANNEL, 2, "reset"))
+    assert module._cache.snapshot().ids() == [new_id, 1]
+
+
+def test_edit_replaces_the_entry_instead_of_appending(index):
+    module, _ = index
+    module.add_doc_to_index(1, "Стать: male, Вік: 30, Симптоми: нежить")
+    stats = module.get_semantic_index_stats()
+    assert stats["total_documents"] == 1 and stats["tombstones"] == 1
+    assert module.semantic_match(QUERY) is None
+    assert module.semantic_lookup("Стать: male, Вік: 30, Симптоми: нежить") == "Approved answer"
+
+
+def test_semantic_search_ranks_ids_with_scores(index):
+    module, engine = index
+    close = "Стать: male, Вік: 30, Симптоми: кашель нежить"
+    close_id = _approve_new(engine, close, "Cold answer")
+    far = "Стать: female, Вік: 70, Симптоми: біль у спині"
+    far_id = _approve_new(engine, far, "Back pain answer")
+    module.sync()
+
+    hits = module.semantic_search(QUERY, top_k=3)
+    assert [answer_id for answer_id, _ in hits][:2] == [1, close_id]
+    assert hits[0][1] == pytest.approx(1.0)
+    assert all(a[1] >= b[1] for a, b in zip(hits, hits[1:]))
+
+    strict = module.semantic_search(QUERY, top_k=3, min_similarity=hits[1][1])
+    assert far_id not in [answer_id for answer_id, _ in strict]
+
+
+def test_readers_keep_their_snapshot_while_writers_swap(index):
+    module, engine = index
+    before = module._cache.snapshot()
+    query = "Стать: female, Вік: 40, Симптоми: головний біль"
+    module.add_doc_to_index(99, query)
+
+    after = module._cache.snapshot()
+    assert after is not before
+    assert 99 not in before and 99 in after                     # published snapshots are never mutated
+    assert after.partitions["male_30-44"] is before.partitions["male_30-44"]   # untouched partitions are shared
+
+
+def test_concurrent_lookups_and_writes(index):
+    module, _ = index
+    errors = []
+
+    def read():
+        try:
+            for _ in range(200):
+                assert module.semantic_match(QUERY)[0] == 1
+        except Exception as e:                                  # pragma: no cover - reported below
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for answer_id in range(100, 160):
+        module.add_doc_to_index(answer_id, f"Стать: male, Вік: {answer_id}, Симптоми: слабкість")
+        module.remove_from_index(answer_id - 1)
+    for thread in readers:
+        thread.join()
+    assert errors == []
+
+
+def test_workers_saving_to_the_same_directory_never_mix_their_files(index):
+    module, _ = index
+    path = Path(settings.semantic_index_path)
+    workers = []
+    for queries in (["Стать: male, Вік: 60, Симптоми: задишка"],
+                    ["Стать: female, Вік: 5, Симптоми: висип", "Стать: female, Вік: 40, Симптоми: головний біль"]):
+        worker = module.SemanticIndex()
+        worker._publish({}, {}, None)
+        for answer_id, query in enumerate(queries, start=10):
+            worker.upsert(answer_id, query)
+        workers.append(worker)
+    layouts = [{key: index.ids() for key, index in worker.snapshot().partitions.items()} for worker in workers]
+    errors = []
+
+    def write(worker):
+        try:
+            for _ in range(30):
+                worker.save(str(path))
+        except Exception as e:                                  # pragma: no cover - reported below
+            errors.append(e)
+
+    def read():
+        for _ in range(30):
+            snap = module.SemanticIndex()._read(path)
+            if snap is None or {key: index.ids() for key, index in snap.partitions.items()} not in layouts:
+                errors.append(snap)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in workers] + [threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not list(path.glob("*.tmp"))
+
+
+def test_lookups_stay_within_the_demographic_partition(index):
+    module, engine = index
+    child = "Стать: female, Вік: 3, Симптоми: кашель температура"
+    assert module.semantic_match(child) is None             # same symptoms, adult male answer
+    child_id = _approve_new(engine, child, "Paediatric answer")
+    module.sync()
+    assert module.semantic_lookup(child) == "Paediatric answer"
+    assert module.semantic_lookup(QUERY) == "Approved answer"
+    assert module.get_semantic_index_stats()["partitions"] == {"female_3-5": 1, "male_30-44": 1}
+    # knowledge-base search still spans every partition
+    assert {answer_id for answer_id, _ in module.semantic_search(QUERY, top_k=5)} == {1, child_id}
+
+
+def test_neighbouring_bands_and_partition_thresholds(index, monkeypatch, tmp_path):
+    module, _ = index
+    thresholds = tmp_path / "thresholds.json"
+    thresholds.write_text(json.dumps({"default": 0.5}))
+    monkeypatch.setattr(settings, "semantic_thresholds_path", str(thresholds))
+    older = "Стать: male, Вік: 46, Симптоми: кашель температура"
+    assert module.semantic_match(older) is None
+    monkeypatch.setattr(settings, "semantic_neighbor_bands", 1)
+    assert module.semantic_match(older)[0] == 1
+
+    thresholds.write_text(json.dumps({"default": 0.5, "partitions": {"male_30-44": 1.0}}))
+    os.utime(thresholds, (0, 12345))
+    assert module.semantic_match(QUERY) is None             # an exact match cannot beat 1.0
+
+
+def test_edit_moving_partition_drops_the_old_entry(index):
+    module, _ = index
+    module.add_doc_to_index(1, "Стать: male, Вік: 70, Симптоми: кашель температура")
+    assert module.get_semantic_index_stats()["partitions"] == {"male_60-74": 1}
+    assert module.semantic_match(QUERY) is None
+
+
+def test_near_misses_are_returned_as_draft_candidates(index, monkeypatch, tmp_path):
+    module, _ = index
+    thresholds = tmp_path / "thresholds.json"
+    thresholds.write_text(json.dumps({"default": 0.99}))
+    monkeypatch.setattr(settings, "semantic_thresholds_path", str(thresholds))
+    monkeypatch.setattr(settings, "semantic_draft_min_similarity", 0.5)
+    near = "Стать: male, Вік: 30, Симптоми: кашель температура нежить"
+
+    hit = module.semantic_candidate(QUERY)
+    assert hit.hit and hit.answer_md == "Approved answer"
+    candidate = module.semantic_candidate(near)
+    assert not candidate.hit and candidate.answer_id == 1
+    assert candidate.answer_md == "Approved answer" and candidate.query == QUERY
+    assert module.semantic_lookup(near) is None
+
+    monkeypatch.setattr(settings, "draft_edit_enabled", False)
+    assert module.semantic_candidate(near) is None
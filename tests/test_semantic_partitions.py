@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""Tests for demographic partitioning of the semantic cache."""
+import json
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.cache import semantic_partitions as sp
+from src.config import settings
+
+
+def test_partition_keys_follow_age_bands():
+    assert sp.partition_key("female", 0) == "female_0-0"
+    assert sp.partition_key("m", 17) == "male_12-17"
+    assert sp.partition_key("Чоловік", 30) == "male_30-44"
+    assert sp.partition_key("other", 90) == "other_75+"
+
+
+def test_partition_is_parsed_from_the_symptom_query():
+    assert sp.partition_for("Стать: female, Вік: 5, Симптоми: висип") == "female_3-5"
+    assert sp.partition_for("кашель і нежить") is None
+    assert sp.lookup_partitions("кашель і нежить") is None
+
+
+def test_neighbouring_bands(monkeypatch):
+    monkeypatch.setattr(settings, "semantic_neighbor_bands", 1)
+    assert sp.lookup_partitions("Стать: f, Вік: 20, Симптоми: кашель") == \
+        ["female_12-17", "female_18-29", "female_30-44"]
+    assert sp.lookup_partitions("Стать: f, Вік: 0, Симптоми: кашель") == ["female_0-0", "female_1-2"]
+
+
+def test_thresholds_file_is_reloaded_when_changed(monkeypatch, tmp_path):
+    path = tmp_path / "thresholds.json"
+    monkeypatch.setattr(settings, "semantic_thresholds_path", str(path))
+    assert sp.threshold("male_30-44") == settings.semantic_similarity_threshold
+
+    path.write_text(json.dumps({"default": 0.9, "partitions": {"male_30-44": 0.95}}))
+    assert sp.threshold("male_30-44") == 0.95
+    assert sp.threshold("female_0-0") == 0.9
+    assert sp.threshold(None) == 0.9
+
+    path.write_text(json.dumps({"partitions": {"male_30-44": 0.97}}))
+    os.utime(path, (0, 12345))
+    assert sp.threshold("male_30-44") == 0.97
+    assert sp.threshold("female_0-0") == settings.semantic_similarity_threshold
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Tests for the LRU cache and the in-memory session store."""
+import os
+import asyncio
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from src.cache.lru import LRUCache
+from src.cache.session_store import MemorySessionStore
+
+
+def test_lru_evicts_least_recently_used():
+    """The bound holds and reads refresh recency."""
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_lru_ttl_expires_and_slides():
+    """Entries expire after the TTL unless a sliding read renews them."""
+    cache = LRUCache(maxsize=10, ttl=0.05, sliding=True)
+    cache.set("kept", 1)
+    cache.set("dropped", 2)
+    time.sleep(0.03)
+    assert cache.get("kept") == 1
+    time.sleep(0.03)
+
+    assert cache.get("kept") == 1
+    assert cache.get("dropped") is None
+
+
+def test_memory_store_round_trip():
+    """Save replaces, update merges, delete reports whether anything was removed."""
+    store = MemorySessionStore(maxsize=100, ttl=60)
+
+    async def scenario():
+        await store.save("conversation", "1:2", {"collecting_info": True, "symptoms": "кашель"})
+        await store.update("conversation", "1:2", {"extracted_age": 30})
+        state = await store.get("conversation", "1:2")
+        state["mutated"] = True                     # callers get a copy
+        return state, await store.get("conversation", "1:2"), \
+            await store.delete("conversation", "1:2"), await store.delete("conversation", "1:2")
+
+    state, stored, first_delete, second_delete = asyncio.run(scenario())
+    assert state["extracted_age"] == 30 and state["symptoms"] == "кашель"
+    assert "mutated" not in stored
+    assert (first_delete, second_delete) == (True, False)
+
+
+def test_intake_steps_write_only_their_fields(monkeypatch):
+    """Two workers holding the same session each persist their own step."""
+    from src.api import router_intake
+    from src.cache import session_store
+
+    store = MemorySessionStore(maxsize=100, ttl=60)
+    monkeypatch.setattr(session_store, "_store", store)
+
+    async def scenario():
+        session = router_intake.IntakeSession(session_id="s1", step=router_intake.IntakeStep.GENDER)
+        await router_intake._save_session(session)
+        worker_a = await router_intake._get_session("s1")
+        worker_b = await router_intake._get_session("s1")
+        worker_a.gender = router_intake.Gender.FEMALE
+        await router_intake._save_session(worker_a, "gender")
+        worker_b.doctor_id = 7
+        await router_intake._save_session(worker_b, "doctor_id")
+        return await router_intake._get_session("s1")
+
+    merged = asyncio.run(scenario())
+    assert merged.gender == router_intake.Gender.FEMALE
+    assert merged.doctor_id == 7
+
+
+def test_update_does_not_revive_a_missing_session(monkeypatch):
+    """An expired or deleted session is reported, not recreated with only the new fields."""
+    import pytest
+    from fastapi import HTTPException
+    from src.api import router_intake
+    from src.cache import session_store
+
+    store = MemorySessionStore(maxsize=100, ttl=60)
+    monkeypatch.setattr(session_store, "_store", store)
+
+    async def scenario():
+        assert await store.update("conversation", "1:2", {"extracted_age": 30}) is False
+        session = router_intake.IntakeSession(session_id="s1", step=router_intake.IntakeStep.GENDER)
+        await router_intake._save_session(session)
+        await store.delete("intake", "s1")                  # expired / deleted by another request
+        session.gender = router_intake.Gender.FEMALE
+        with pytest.raises(HTTPException) as exc_info:
+            await router_intake._save_session(session, "gender")
+        return exc_info.value, await store.get("conversation", "1:2"), await store.get("intake", "s1")
+
+    error, conversation, intake = asyncio.run(scenario())
+    assert error.status_code == 404
+    assert conversation is None and intake is None
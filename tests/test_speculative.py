@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Tests for request-scoped speculative tasks."""
+import asyncio
+
+from src.utils import metrics, speculative
+
+
+def test_taken_result_is_reused():
+    """Work started early is awaited once and not recomputed."""
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "cached answer"
+
+    async def scenario():
+        with speculative.scope():
+            speculative.start("exact", "hash", lookup())
+            speculative.start("exact", "hash", lookup())        # duplicate is dropped
+            return await speculative.take("exact", "hash"), await speculative.take("exact", "hash")
+
+    first, second = asyncio.run(scenario())
+    assert first == "cached answer" and second is speculative.MISSING
+    assert len(calls) == 1
+
+
+def test_cancel_all_and_scope_exit_cancel_pending_work():
+    """Non-diagnose intents cancel the work; leftovers die with the scope."""
+    metrics.reset()
+
+    async def scenario():
+        with speculative.scope():
+            speculative.start("retrieval", "q", asyncio.sleep(10))
+            pending = speculative._tasks.get()[("retrieval", "q")]
+            speculative.cancel_all()
+            assert await speculative.take("retrieval", "q") is speculative.MISSING
+            speculative.start("semantic", "q", asyncio.sleep(10))
+            leftover = speculative._tasks.get()[("semantic", "q")]
+        await asyncio.sleep(0)
+        return pending, leftover
+
+    pending, leftover = asyncio.run(scenario())
+    assert pending.cancelled() and leftover.cancelled()
+    counters = metrics.snapshot()["counters"]
+    assert counters["speculative_total{kind=retrieval,outcome=cancelled}"] == 1
+    assert counters["speculative_total{kind=semantic,outcome=unused}"] == 1
+
+
+def test_failures_and_missing_scope_fall_back():
+    """A failed task or no scope at all means the caller computes it itself."""
+    async def boom():
+        raise RuntimeError("redis down")
+
+    async def scenario():
+        with speculative.scope():
+            speculative.start("exact", "h", boom())
+            return await speculative.take("exact", "h")
+
+    assert asyncio.run(scenario()) is speculative.MISSING
+    assert asyncio.run(speculative.take("exact", "h")) is speculative.MISSING
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Tests for the canonical exact-cache symptom key."""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from src.config import settings
+from src.utils.symptom_key import (
+    KEY_VERSION, canonical_symptoms, legacy_symptoms_hash, symptom_query, symptoms_key,
+)
+
+
+@pytest.mark.parametrize("variant", [
+    "температура 38 і кашель",
+    "Кашель; температура 38°C.",
+    "kashel, temperatura 38",
+    "Температура 38,0 градусів, кашель!",
+    "кашель кашель температура 38",
+])
+def test_phrasings_of_the_same_complaint_share_a_key(variant):
+    assert symptoms_key("m", 30, variant) == symptoms_key("male", 30, "Кашель, температура 38")
+
+
+@pytest.mark.parametrize("word, forms", [
+    ("кашель", ["кашлю", "кашля", "кашлем", "кашлі", "кашлі", "кашлів", "кашлями", "кашлях"]),
+    ("нудота", ["нудоти", "нудоту", "нудотою", "нудоті", "нудото"]),
+    ("живіт", ["живота", "животу", "животом", "животі"]),
+    ("слабкість", ["слабкості", "слабкістю"]),
+    ("нежить", ["нежитю", "нежиттю", "нежитем"]),
+    ("температура", ["температури", "температуру", "температурою", "температурі", "температур"]),
+])
+def test_every_case_form_of_a_symptom_shares_a_stem(word, forms):
+    assert {canonical_symptoms(form) for form in forms} == {canonical_symptoms(word)}
+
+
+def test_meaningful_differences_keep_keys_apart():
+    base = symptoms_key("m", 30, "кашель, температура 38")
+    assert symptoms_key("m", 30, "кашель, температура 38.5") != base
+    assert symptoms_key("m", 30, "кашель, без температури") != base
+    assert symptoms_key("f", 30, "кашель, температура 38") != base
+    assert symptoms_key("m", 31, "кашель, температура 38") != base
+
+
+def test_negation_is_kept_and_stopwords_dropped():
+    assert canonical_symptoms("У мене не болить голова") == canonical_symptoms("голова не болить")
+    assert canonical_symptoms("біль справа, не зліва") == "bil ne_zlv sprav"
+
+
+@pytest.mark.parametrize("one, other", [
+    ("болить ліве вухо, праве ні", "болить праве вухо, ліве ні"),
+    ("біль справа, не зліва", "біль зліва, не справа"),
+    ("кашель без температури", "температура без кашлю"),
+    ("не нудить, болить живіт", "нудить, не болить живіт"),
+])
+def test_negation_scope_keeps_opposite_complaints_apart(one, other):
+    assert symptoms_key("f", 40, one) != symptoms_key("f", 40, other)
+
+
+def test_keys_are_versioned_and_legacy_hash_is_unchanged():
+    assert symptoms_key("m", 30, "кашель").startswith(f"{KEY_VERSION}_")
+    # v1: sha256("m|30|кашель") — answers approved before canonical keys are still found by it
+    assert legacy_symptoms_hash("m", 30, "  Кашель ") == \
+        "16c50885a9a7e2e5bfc5a577a7e5a9e58c5f1fefde775608c22154a80786000b"
+
+
+def test_optional_age_bands(monkeypatch):
+    assert symptoms_key("m", 31, "кашель") != symptoms_key("m", 33, "кашель")
+    monkeypatch.setattr(settings, "symptom_key_age_bands", True)
+    assert symptoms_key("m", 31, "кашель") == symptoms_key("m", 33, "кашель")
+    assert symptoms_key("m", 31, "кашель") != symptoms_key("m", 50, "кашель")
+
+
+def test_symptom_query_matches_semantic_partitions():
+    from src.cache.semantic_partitions import partition_for
+    assert partition_for(symptom_query("f", 5, "висип")) == "female_3-5"
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import re
+import time
+
+from src.utils import timing
+
+
+def test_stage_and_mark_are_noops_without_timer():
+    with timing.stage("retrieval"):
+        pass
+    timing.mark("cache", "exact")
+    assert timing.current() is None
+
+
+def test_stages_accumulate_and_render_server_timing():
+    async def handler():
+        timer = timing.start_request()
+        with timing.stage("redis"):
+            time.sleep(0.01)
+        with timing.stage("llm_diagnose"):
+            time.sleep(0.01)
+        with timing.stage("llm_diagnose"):
+            time.sleep(0.01)
+        timing.mark("cache", "miss")
+        return timer
+
+    timer = asyncio.run(handler())
+    assert set(timer.stages) == {"redis", "llm_diagnose"}
+    assert timer.stages["llm_diagnose"] > timer.stages["redis"]
+
+    header = timer.server_timing()
+    assert re.search(r"redis;dur=\d+\.\d", header)
+    assert 'cache;desc="miss"' in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+    record = json.loads(timer.log_line(path="/diagnose", status=200))
+    assert record["path"] == "/diagnose"
+    assert record["cache"] == "miss"
+    assert record["stages_ms"]["redis"] >= 10
+    assert record["total_ms"] >= sum(record["stages_ms"].values()) - 1
+
+
+def test_nested_stages_get_dotted_names_and_are_not_double_counted():
+    def lookup():
+        with timing.stage("semantic"):
+            time.sleep(0.005)
+
+    async def handler():
+        timer = timing.start_request()
+        with timing.stage("intent"):
+            with timing.stage("llm_intent"):
+                time.sleep(0.01)
+            await asyncio.to_thread(lookup)
+        with timing.stage("llm_diagnosis"):
+            time.sleep(0.01)
+        return timer
+
+    timer = asyncio.run(handler())
+    assert set(timer.stages) == {"intent", "intent.llm_intent", "intent.semantic", "llm_diagnosis"}
+    assert timer.stages["intent"] >= timer.stages["intent.llm_intent"]
+    top_level = sum(seconds for name, seconds in timer.stages.items() if "." not in name)
+    assert top_level <= timer.total()
+    assert "intent.llm_intent;dur=" in timer.server_timing()
+
+
+def test_stage_in_worker_thread_reports_to_request_timer():
+    def lookup():
+        with timing.stage("semantic"):
+            time.sleep(0.005)
+
+    async def handler():
+        timer = timing.start_request()
+        await asyncio.to_thread(lookup)
+        return timer
+
+    timer = asyncio.run(handler())
+    assert timer.stages["semantic"] > 0
+    # the timer does not leak out of the request's context
+    assert timing.current() is None
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""Tests for the id-keyed vector index with tombstoned deletes."""
+import numpy as np
+
+from src.cache.vector_index import IdIndex
+
+
+def _unit(dim, hot):
+    vec = np.zeros((1, dim), dtype="float32")
+    vec[0, hot] = 1.0
+    return vec
+
+
+def test_upsert_replaces_the_vector_of_a_known_id():
+    index = IdIndex(8)
+    index.upsert([1, 2], np.vstack([_unit(8, 0), _unit(8, 1)]))
+    index.upsert([1], _unit(8, 2))                  # edited answer
+
+    assert len(index) == 2 and index.tombstones == 1
+    assert (1, 1.0) not in index.search(_unit(8, 0), 2)     # stale vector is unreachable
+    assert index.search(_unit(8, 2), 1) == [(1, 1.0)]
+    assert index.ids() == [2, 1]
+
+
+def test_remove_tombstones_and_search_skips_them():
+    index = IdIndex(8)
+    index.upsert([1, 2, 3], np.vstack([_unit(8, 0), _unit(8, 0) * 0.9 + _unit(8, 1) * 0.1, _unit(8, 3)]))
+    assert index.remove(1)
+    assert not index.remove(1)
+    assert 1 not in index
+    # the best live match is returned even though a tombstone scores higher
+    assert [item_id for item_id, _ in index.search(_unit(8, 0), 1)] == [2]
+
+
+def test_compaction_keeps_memory_proportional_to_live_entries():
+    index = IdIndex(8, max_tombstone_ratio=0.25)
+    ids = list(range(100))
+    index.upsert(ids, np.vstack([_unit(8, i % 8) for i in ids]))
+    for item_id in range(30):
+        index.remove(item_id)
+
+    # compacted once tombstones passed 25 % of the live rows (and the minimum)
+    assert index.ntotal < 100
+    assert index.tombstones <= 0.25 * len(index) or index.tombstones < 16
+    index.compact()
+    assert index.ntotal == len(index) == 70 and index.tombstones == 0
+    assert index.search(_unit(8, 5), 1)[0][0] in range(30, 100)
+
+
+def test_write_and_read_round_trip(tmp_path):
+    index = IdIndex(8)
+    index.upsert([5, 6], np.vstack([_unit(8, 0), _unit(8, 1)]))
+    index.remove(5)
+    ids = index.write(str(tmp_path / "index.faiss"))
+    assert ids == [6]
+
+    loaded = IdIndex.read(str(tmp_path / "index.faiss"), ids)
+    assert loaded.ids() == [6] and loaded.tombstones == 0
+    assert loaded.search(_unit(8, 1), 1) == [(6, 1.0)]